@@ -0,0 +1,166 @@
+"""Parse and evaluate line-delimited infix expressions with a pool of worker processes.
+
+Every non-blank input line is written as one JSON object per line (NDJSON), in
+input order, with its line number, the expression, and either its prefix and
+postfix expressions, operand symbols and principal normal forms, or the error
+message and its position in the expression. Input read from files also gets
+the file name, and line numbers count from 1 in every file.
+"""
+
+from converter import Converter
+from evaluator import (
+    Evaluator,
+    principal_conjunctive_normal_form,
+    principal_disjunctive_normal_form,
+)
+from parser import ParseError
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+import argparse
+import fileinput
+import json
+import os
+import sys
+
+# Per-process state, created once by initialize.
+converter = None
+evaluator = None
+max_variables = None
+
+
+def initialize(variables_limit: int) -> None:
+    global converter, evaluator, max_variables
+    converter = Converter()
+    evaluator = Evaluator()
+    max_variables = variables_limit
+
+
+def process(item: tuple) -> str:
+    """Return the JSON record of a (file name, line number, expression) item."""
+    file_name, line_number, expression = item
+    record = {"line": line_number, "expression": expression}
+    if file_name is not None:
+        record["file"] = file_name
+    try:
+        tree = converter.parser.parse_tree(converter.tokenize(expression))
+    except ParseError as e:
+        record["error"] = str(e)
+        record["position"] = e.pos
+    else:
+        postfix_tokens = list(tree.postfix())
+        operands = evaluator.get_operand_symbols(postfix_tokens)
+        record["prefix"] = converter.list_to_str(tree.prefix())
+        record["postfix"] = converter.list_to_str(postfix_tokens)
+        record["operands"] = operands
+        # The normal forms have up to 2 ** len(operands) indices.
+        if len(operands) <= max_variables:
+            record["pdnf"] = principal_disjunctive_normal_form(postfix_tokens)
+            record["pcnf"] = principal_conjunctive_normal_form(postfix_tokens)
+    return json.dumps(record)
+
+
+def process_chunk(items: list) -> list:
+    return [process(item) for item in items]
+
+
+def read_expressions(lines):
+    """Yield the (file name, line number, expression) items of lines.
+
+    The file name is None, unless lines is a fileinput.FileInput, whose line
+    numbers restart with every file.
+    """
+    if isinstance(lines, fileinput.FileInput):
+        for line in lines:
+            line = line.strip()
+            if len(line) > 0:
+                yield lines.filename(), lines.filelineno(), line
+        return
+    for line_number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if len(line) > 0:
+            yield None, line_number, line
+
+
+def run(
+    lines,
+    output=sys.stdout,
+    workers: int = None,
+    chunk_size: int = 64,
+    variables_limit: int = 16,
+) -> None:
+    """Write the NDJSON records of lines to output.
+
+    With workers == 0, lines are processed in the current process.
+    """
+    if workers is not None and workers < 0:
+        raise Exception("workers must be a non-negative integer")
+    if chunk_size < 1:
+        raise Exception("chunk_size must be a positive integer")
+    expressions = read_expressions(lines)
+    if workers == 0:
+        initialize(variables_limit)
+        for record in map(process, expressions):
+            print(record, file=output)
+        return
+    workers = workers or os.cpu_count()
+    with ProcessPoolExecutor(
+        workers, initializer=initialize, initargs=(variables_limit,)
+    ) as executor:
+        # A new chunk is submitted as soon as one completes, keeping two
+        # chunks per worker running. Chunks are written in input order, and at
+        # most window chunks are held before they are written, to bound memory.
+        window = 8 * workers
+        pending = deque()
+        running = set()
+        while True:
+            while len(running) < 2 * workers and len(pending) < window:
+                items = list(islice(expressions, chunk_size))
+                if len(items) == 0:
+                    break
+                future = executor.submit(process_chunk, items)
+                pending.append(future)
+                running.add(future)
+            if len(pending) == 0:
+                break
+            if len(running) > 0:
+                running = wait(running, return_when=FIRST_COMPLETED).not_done
+            while len(pending) > 0 and pending[0].done():
+                for record in pending.popleft().result():
+                    print(record, file=output)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__)
+    argument_parser.add_argument(
+        "files", nargs="*", help="input files, one expression per line (default: stdin)"
+    )
+    argument_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes, 0 to run in this process "
+        "(default: CPU count)",
+    )
+    argument_parser.add_argument(
+        "-c",
+        "--chunk-size",
+        type=int,
+        default=64,
+        help="number of expressions sent to a worker at a time (default: 64)",
+    )
+    argument_parser.add_argument(
+        "-m",
+        "--max-variables",
+        type=int,
+        default=16,
+        help="skip the normal forms of expressions with more operands (default: 16)",
+    )
+    args = argument_parser.parse_args()
+    if args.workers is not None and args.workers < 0:
+        argument_parser.error("--workers must be a non-negative integer")
+    if args.chunk_size < 1:
+        argument_parser.error("--chunk-size must be a positive integer")
+    with fileinput.input(args.files) as lines:
+        run(lines, sys.stdout, args.workers, args.chunk_size, args.max_variables)
@@ -0,0 +1,329 @@
+from collections import OrderedDict
+from evaluator import FALSE_CONSTANTS, TRUE_CONSTANTS, _to_postfix
+from naive_converter import OPERATORS
+import sys
+
+FALSE = 0
+TRUE = 1
+
+
+class BDD(object):
+    """Reduced ordered binary decision diagrams sharing one unique table.
+
+    A function is represented by a node id. Nodes 0 and 1 are the constants
+    FALSE and TRUE; every other node tests the variable at its level and
+    continues with its low (variable is false) or high (variable is true)
+    child. Because nodes are created only through make_node, two functions are
+    equivalent if and only if they are the same node.
+
+    Results of apply are memoized in an LRU computed table of at most
+    cache_size entries. Evicted results are recomputed when needed again.
+    """
+
+    def __init__(self, variables: list = None, cache_size: int = 1 << 18) -> None:
+        super().__init__()
+        self.operators = OPERATORS
+        self.variables = list()  # level -> variable name
+        self.levels = dict()  # variable name -> level
+        # Terminals sit below every variable.
+        self.level = [sys.maxsize, sys.maxsize]
+        self.low = [FALSE, TRUE]
+        self.high = [FALSE, TRUE]
+        self.unique_table = dict()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        for name in variables or list():
+            self.add_variable(name)
+
+    def add_variable(self, name: str) -> int:
+        """Append name at the bottom of the variable order and return its level."""
+        if name not in self.levels:
+            self.levels[name] = len(self.variables)
+            self.variables.append(name)
+        return self.levels[name]
+
+    def make_node(self, level: int, low: int, high: int) -> int:
+        if low == high:
+            return low
+        key = (level, low, high)
+        node = self.unique_table.get(key)
+        if node is None:
+            node = len(self.level)
+            self.level.append(level)
+            self.low.append(low)
+            self.high.append(high)
+            self.unique_table[key] = node
+        return node
+
+    def variable(self, name: str) -> int:
+        return self.make_node(self.add_variable(name), FALSE, TRUE)
+
+    def negate(self, u: int) -> int:
+        return self.apply("^", u, FALSE)
+
+    def apply(self, operator: str, u: int, v: int) -> int:
+        """Combine u and v with a binary operator of the grammar."""
+        # Iterative Shannon expansion, so the depth of the diagram is not
+        # limited by the recursion limit.
+        stack = [(u, v, False)]
+        results = list()
+        while len(stack) > 0:
+            u, v, expanded = stack.pop()
+            if operator != "^" and u > v:  # the other operators are commutative
+                u, v = v, u
+            key = (operator, u, v)
+            if not expanded:
+                node = self._apply_terminal(operator, u, v)
+                if node is None:
+                    node = self.cache.get(key)
+                    if node is None:
+                        self.misses += 1
+                    else:
+                        self.cache.move_to_end(key)
+                        self.hits += 1
+                if node is not None:
+                    results.append(node)
+                    continue
+                level = min(self.level[u], self.level[v])
+                stack.append((u, v, True))
+                stack.append((*self._cofactors(u, v, level, self.high), False))
+                stack.append((*self._cofactors(u, v, level, self.low), False))
+            else:
+                high = results.pop()
+                low = results.pop()
+                level = min(self.level[u], self.level[v])
+                node = self.make_node(level, low, high)
+                self.cache[key] = node
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+                    self.evictions += 1
+                results.append(node)
+        assert len(results) == 1
+        return results[0]
+
+    def _cofactors(self, u: int, v: int, level: int, child: list) -> tuple:
+        return (
+            child[u] if self.level[u] == level else u,
+            child[v] if self.level[v] == level else v,
+        )
+
+    def _apply_terminal(self, operator: str, u: int, v: int):
+        """Return the result of operator if it follows without expansion, else None."""
+        if u <= TRUE and v <= TRUE:
+            return int(bool(self.operators[operator].lambda_expr([u, v])))
+        if operator == "&":
+            if u == FALSE or u == v:
+                return u
+            if u == TRUE:
+                return v
+        elif operator == "|":
+            if u == TRUE or u == v:
+                return u
+            if u == FALSE:
+                return v
+        elif operator == "^":
+            if u == FALSE or v == TRUE or u == v:
+                return TRUE
+            if u == TRUE:
+                return v
+        elif operator == "~":
+            if u == v:
+                return TRUE
+            if u == TRUE:
+                return v
+        return None
+
+    def ite(self, f: int, g: int, h: int) -> int:
+        """Return the node of (f & g) | (!f & h)."""
+        return self.apply(
+            "|", self.apply("&", f, g), self.apply("&", self.negate(f), h)
+        )
+
+    def from_postfix(self, postfix_tokens: list) -> int:
+        """Build the diagram of postfix_tokens.
+
+        Variables not yet known are appended to the order as they first
+        appear in postfix_tokens.
+        """
+        stack = list()
+        for token in postfix_tokens:
+            if token in self.operators:
+                if self.operators[token].num_operands == 1:
+                    stack.append(self.negate(stack.pop()))
+                else:
+                    v = stack.pop()
+                    stack.append(self.apply(token, stack.pop(), v))
+            elif token in FALSE_CONSTANTS:
+                stack.append(FALSE)
+            elif token in TRUE_CONSTANTS:
+                stack.append(TRUE)
+            else:
+                stack.append(self.variable(token))
+        assert len(stack) == 1
+        return stack[0]
+
+    def from_expression(self, expr) -> int:
+        """Build the diagram of an infix string or a list of postfix tokens."""
+        return self.from_postfix(_to_postfix(expr))
+
+    def is_tautology(self, u: int) -> bool:
+        return u == TRUE
+
+    def is_satisfiable(self, u: int) -> bool:
+        return u != FALSE
+
+    def count_models(self, u: int) -> int:
+        """Return the number of assignments to all variables satisfying u."""
+        counts = {FALSE: 0, TRUE: 1}
+        stack = [u]
+        while len(stack) > 0:
+            node = stack[-1]
+            if node in counts:
+                stack.pop()
+                continue
+            low, high = self.low[node], self.high[node]
+            if low in counts and high in counts:
+                stack.pop()
+                counts[node] = self._scaled_count(counts, node, low)
+                counts[node] += self._scaled_count(counts, node, high)
+            else:
+                stack.extend(child for child in (low, high) if child not in counts)
+        return self._scaled_count(counts, None, u)
+
+    def _scaled_count(self, counts: dict, parent, child: int) -> int:
+        # Levels skipped between parent and child are free variables.
+        parent_level = -1 if parent is None else self.level[parent]
+        child_level = self.level[child]
+        if child_level == sys.maxsize:
+            child_level = len(self.variables)
+        return counts[child] << (child_level - parent_level - 1)
+
+    def find_model(self, u: int):
+        """Return a satisfying assignment of every variable as a dict, or None."""
+        if u == FALSE:
+            return None
+        model = dict.fromkeys(self.variables, False)
+        while u != TRUE:
+            name = self.variables[self.level[u]]
+            if self.low[u] != FALSE:
+                u = self.low[u]
+            else:
+                model[name] = True
+                u = self.high[u]
+        return model
+
+    def minterms(self, u: int, names: list = None) -> list:
+        """Return the sorted row indices of the assignments satisfying u.
+
+        Rows are numbered as in Evaluator.get_truth_table over names, the
+        first name being the most significant bit. names defaults to the
+        variable order and must contain every variable u depends on. The
+        indices are enumerated from the paths to TRUE, expanding the levels
+        each path skips, so the cost is proportional to the number of minterms.
+        """
+        if names is None:
+            names = self.variables
+        weights = {name: 1 << (len(names) - i - 1) for i, name in enumerate(names)}
+        # Weight of each level, then of the names the diagram does not know,
+        # which are free. Variables not in names are None and never tested.
+        order = [weights.get(name) for name in self.variables]
+        order += [weights[name] for name in names if name not in self.levels]
+        result = list()
+        stack = [(u, 0, 0)]
+        while len(stack) > 0:
+            node, depth, index = stack.pop()
+            if node == FALSE:
+                continue
+            if depth == len(order):
+                result.append(index)
+                continue
+            weight = order[depth]
+            if self.level[node] == depth:
+                stack.append((self.high[node], depth + 1, index | weight))
+                stack.append((self.low[node], depth + 1, index))
+            elif weight is None:
+                stack.append((node, depth + 1, index))
+            else:
+                stack.append((node, depth + 1, index | weight))
+                stack.append((node, depth + 1, index))
+        if list(names) != self.variables:
+            result.sort()
+        return result
+
+
+def variable_order(expr, heuristic: str = "dfs") -> list:
+    """Return a static variable order for the diagram of expr.
+
+    "dfs" lists the operands in depth-first order of the expression tree,
+    descending into the deeper operand of each operator first, so that
+    variables combined closely in the formula are close in the order.
+    "fan_in" lists the operands by decreasing number of occurrences, ties
+    broken by first appearance. "appearance" keeps the order of first
+    appearance in the postfix tokens, which is what from_postfix uses.
+    """
+    postfix_tokens = _to_postfix(expr)
+    if heuristic == "dfs":
+        # (depth, symbol, children) subtrees of the expression
+        stack = list()
+        for token in postfix_tokens:
+            if token in OPERATORS:
+                num_operands = OPERATORS[token].num_operands
+                children = tuple(stack[len(stack) - num_operands :])
+                del stack[len(stack) - num_operands :]
+                depth = 1 + max(child[0] for child in children)
+                stack.append((depth, token, children))
+            else:
+                stack.append((0, token, ()))
+        assert len(stack) == 1
+        result = dict()
+        while len(stack) > 0:
+            depth, symbol, children = stack.pop()
+            if len(children) > 0:
+                # Popped deepest first, and left to right among equal depths.
+                stack.extend(sorted(reversed(children), key=lambda child: child[0]))
+            elif symbol not in FALSE_CONSTANTS and symbol not in TRUE_CONSTANTS:
+                result.setdefault(symbol, None)
+        return list(result)
+    counts = dict()
+    for token in postfix_tokens:
+        if (
+            token not in OPERATORS
+            and token not in FALSE_CONSTANTS
+            and token not in TRUE_CONSTANTS
+        ):
+            counts[token] = counts.get(token, 0) + 1
+    if heuristic == "fan_in":
+        return sorted(counts, key=lambda name: -counts[name])
+    if heuristic == "appearance":
+        return list(counts)
+    raise Exception(f"Unknown variable order heuristic {heuristic!r}")
+
+
+def is_tautology(expr) -> bool:
+    bdd = BDD()
+    return bdd.is_tautology(bdd.from_expression(expr))
+
+
+def is_satisfiable(expr) -> bool:
+    bdd = BDD()
+    return bdd.is_satisfiable(bdd.from_expression(expr))
+
+
+def are_equivalent(expr1, expr2) -> bool:
+    bdd = BDD()
+    return bdd.from_expression(expr1) == bdd.from_expression(expr2)
+
+
+def principal_disjunctive_normal_form(expr, heuristic: str = "dfs") -> list:
+    """Return the minterm indices of expr, read from its diagram.
+
+    The result is that of evaluator.principal_disjunctive_normal_form. The
+    diagram is built in the variable order chosen by heuristic.
+    """
+    postfix_tokens = _to_postfix(expr)
+    bdd = BDD(variable_order(postfix_tokens, heuristic))
+    names = sorted(bdd.variables)
+    return bdd.minterms(bdd.from_postfix(postfix_tokens), names)
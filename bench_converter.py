@@ -0,0 +1,69 @@
+"""Scaling benchmark of the conversion pipeline.
+
+For expressions of doubling size, time tokenizing, parsing into postfix tokens
+and converting postfix into prefix tokens, and report the time per token. With
+a linear pipeline the time per token stays flat as the size grows.
+
+Run `python bench_converter.py [max_tokens]`.
+"""
+
+from converter import Converter
+from syntax_tree import Node
+import sys
+import time
+
+
+def balanced_formula(depth: int) -> str:
+    """A complete binary expression of all operators, with 2 ** depth operands."""
+    operators = "&|^~"
+    level = [f"X{i}" for i in range(1 << depth)]
+    while len(level) > 1:
+        operator = operators[len(level) % len(operators)]
+        level = [
+            f"({level[i]} {operator} !{level[i + 1]})" for i in range(0, len(level), 2)
+        ]
+    return level[0]
+
+
+def nested_formula(depth: int) -> str:
+    """A right-nested chain of depth operators."""
+    return "".join(f"X{i} & !(" for i in range(depth)) + "Y" + ")" * depth
+
+
+def measure(converter: Converter, formula: str) -> tuple:
+    Node._table.clear()
+    timings = dict()
+    start = time.perf_counter()
+    infix_tokens = converter.tokenize(formula)
+    timings["tokenize"] = time.perf_counter() - start
+    start = time.perf_counter()
+    postfix_tokens = converter.infix_to_postfix(infix_tokens)
+    timings["parse"] = time.perf_counter() - start
+    start = time.perf_counter()
+    converter.postfix_to_prefix(postfix_tokens)
+    timings["postfix_to_prefix"] = time.perf_counter() - start
+    return len(postfix_tokens), timings
+
+
+if __name__ == "__main__":
+    max_tokens = int(sys.argv[1]) if len(sys.argv) > 1 else 1 << 19
+    converter = Converter()
+    print(
+        f"{'shape':10}{'tokens':>10}"
+        + "".join(
+            f"{stage:>20}" for stage in ("tokenize", "parse", "postfix_to_prefix")
+        )
+        + "  (microseconds per token)"
+    )
+    for name, make_formula, sizes in [
+        ("balanced", balanced_formula, range(10, 30)),
+        ("nested", nested_formula, (1 << i for i in range(10, 30))),
+    ]:
+        for size in sizes:
+            num_tokens, timings = measure(converter, make_formula(size))
+            print(
+                f"{name:10}{num_tokens:>10}"
+                + "".join(f"{1e6 * t / num_tokens:>20.3f}" for t in timings.values())
+            )
+            if num_tokens >= max_tokens:
+                break
@@ -0,0 +1,76 @@
+"""Throughput benchmark of Parser.parse_tree against the previous parse loop.
+
+Run `python bench_parser.py [num_terms] [repeat]`.
+"""
+
+from parser import Parser, Token
+from syntax_tree import Node
+import random
+import sys
+import time
+
+
+def legacy_parse_tree(parser: Parser, tokens: list):
+    """The parse loop driven by the dict-of-dicts grammar.transition_table."""
+    tokens.reverse()
+    stack = [(0, None)]
+    while len(tokens) > 0:
+        token = tokens[-1]
+        expectation = parser.transition_table[stack[-1][0]]
+        if token.symbol in expectation:
+            action = expectation[token.symbol]
+            if action[0] == "s":  # shift and go to state action[1]
+                tokens.pop()
+                stack.append((action[1], token))
+            elif action[0] == "r":  # reduce using rule action[1]
+                rule = parser.rules[action[1]]
+                p = [None]
+                for i in range(-len(rule.body), 0):
+                    p.append(stack[i][1].value)
+                del stack[-len(rule.body) :]
+                if rule.method is not None:
+                    rule.method(p)
+                tokens.append(Token(symbol=rule.head, value=p[0]))
+            elif action[0] == "t":  # terminate
+                return stack[1][1].value
+        else:
+            raise Exception(
+                f"Expect {list(expectation.keys())} but found {token.value} instead"
+            )
+
+
+def random_formula(rng: random.Random, num_terms: int) -> str:
+    terms = [
+        f"{'!' * rng.randint(0, 2)}(X{rng.randint(0, 31)} {rng.choice('&|^~')} Y{i})"
+        for i in range(num_terms)
+    ]
+    parts = terms[:1]
+    for term in terms[1:]:
+        parts.extend((rng.choice("&|^~"), term))
+    return " ".join(parts)
+
+
+def measure(function, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        # Start every run with an empty intern table, so that both loops build
+        # all of their nodes.
+        Node._table.clear()
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    num_terms = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    parser = Parser()
+    tokens = parser.tokenize(random_formula(random.Random(0), num_terms))
+    assert legacy_parse_tree(parser, list(tokens)) is parser.parse_tree(tokens)
+    # The legacy loop consumes its input, so it is given a fresh copy each run.
+    legacy = measure(lambda: legacy_parse_tree(parser, list(tokens)), repeat)
+    packed = measure(lambda: parser.parse_tree(tokens), repeat)
+    for name, seconds in [("legacy", legacy), ("packed", packed)]:
+        print(f"{name:8}{seconds:10.4f} s{len(tokens) / seconds:14,.0f} tokens/s")
+    print(f"speedup {legacy / packed:.2f}x")
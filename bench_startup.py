@@ -0,0 +1,72 @@
+"""Startup benchmark: cold import plus first parse in fresh interpreters.
+
+Each run starts a new Python process that imports a module, creates a
+Converter and converts one expression, timing the import and the first parse
+separately; the wall time of the whole process is measured too. The median of
+the runs is reported for each module.
+
+Run `python bench_startup.py [runs]`.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+MODULES = ["parser", "converter", "evaluator", "batch"]
+
+CHILD = """
+import time
+start = time.perf_counter()
+import {module}
+from converter import Converter
+imported = time.perf_counter()
+converter = Converter()
+converter.infix_to_postfix(converter.tokenize("(P ^ Q) & !R | S ~ T"))
+parsed = time.perf_counter()
+print(imported - start, parsed - imported)
+"""
+
+
+def measure(module: str, runs: int, environment: dict = None) -> dict:
+    timings = {"import": list(), "first_parse": list(), "process": list()}
+    for _ in range(runs):
+        start = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", CHILD.format(module=module)],
+            capture_output=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            env=environment,
+            text=True,
+        ).stdout
+        timings["process"].append(time.perf_counter() - start)
+        import_time, parse_time = map(float, output.split())
+        timings["import"].append(import_time)
+        timings["first_parse"].append(parse_time)
+    return {name: statistics.median(values) for name, values in timings.items()}
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'module':12}{'import':>12}{'first parse':>14}{'process':>12}  (ms)")
+    with tempfile.TemporaryDirectory() as directory:
+        cached = dict(
+            os.environ,
+            PROPOSITIONAL_CALCULUS_TABLES_CACHE=os.path.join(directory, "tables"),
+        )
+        for label, module, environment in [
+            *((module, module, None) for module in MODULES),
+            ("parser*", "parser", cached),
+        ]:
+            timings = measure(module, runs, environment)
+            print(
+                f"{label:12}"
+                + "".join(
+                    f"{1e3 * seconds:>{width}.2f}"
+                    for seconds, width in zip(timings.values(), (12, 14, 12))
+                )
+            )
+    print("* with the packed tables cached in a file")
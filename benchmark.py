@@ -0,0 +1,189 @@
+"""Benchmark suite timing every stage of the pipeline on generated formulas.
+
+Each workload is a seeded random formula from generator.random_formula, and
+each stage is timed separately: Parser.tokenize, Parser.parse,
+Converter.postfix_to_prefix, naive_converter.infix_to_postfix and
+Evaluator.get_truth_table (only for workloads with at most
+TRUTH_TABLE_MAX_VARIABLES operands). Results can be saved as a JSON baseline
+and compared against one, reporting the stages that got slower than the
+threshold allows; the exit status is 1 if there are any.
+
+Run `python benchmark.py [-s baseline.json] [-c baseline.json] [-t 0.1]`.
+"""
+
+from converter import Converter
+from evaluator import Evaluator, _compile_postfix
+from generator import random_formula
+from syntax_tree import Node
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import naive_converter
+
+WORKLOADS = {
+    "small": dict(seed=1, num_operands=16, num_variables=4),
+    "medium": dict(seed=2, num_operands=1000, num_variables=10, max_depth=12),
+    "wide": dict(
+        seed=3,
+        num_operands=2000,
+        num_variables=12,
+        max_depth=6,
+        operator_weights={"&": 1, "|": 1},
+    ),
+    "deep": dict(seed=4, num_operands=5000, num_variables=16, skew=0.9),
+    "large": dict(seed=5, num_operands=50000, num_variables=64, max_depth=32),
+}
+
+TRUTH_TABLE_MAX_VARIABLES = 12
+
+
+def time_stage(function, repeat: int) -> dict:
+    """Call function repeat times and return the min and median seconds."""
+    timings = list()
+    for _ in range(repeat):
+        Node._table.clear()
+        _compile_postfix.cache_clear()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings)}
+
+
+def run_workload(formula: str, repeat: int) -> dict:
+    converter = Converter()
+    parser = converter.parser
+    evaluator = Evaluator()
+    tokens = parser.tokenize(formula)
+    postfix_tokens = parser.parse(tokens)
+    infix_tokens = [token.value for token in tokens[:-1]]
+    stages = {
+        "tokenize": lambda: parser.tokenize(formula),
+        "parse": lambda: parser.parse(tokens),
+        "postfix_to_prefix": lambda: converter.postfix_to_prefix(postfix_tokens),
+        "naive_infix_to_postfix": lambda: naive_converter.infix_to_postfix(
+            infix_tokens
+        ),
+    }
+    num_operands = len(evaluator.get_operand_symbols(postfix_tokens))
+    if num_operands <= TRUTH_TABLE_MAX_VARIABLES:
+        stages["get_truth_table"] = lambda: evaluator.get_truth_table(postfix_tokens)
+    result = {"tokens": len(tokens) - 1, "operands": num_operands, "stages": dict()}
+    for name, function in stages.items():
+        result["stages"][name] = time_stage(function, repeat)
+    return result
+
+
+def run(workloads: dict = WORKLOADS, repeat: int = 5) -> dict:
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "workloads": dict(),
+    }
+    for name, parameters in workloads.items():
+        results["workloads"][name] = run_workload(random_formula(**parameters), repeat)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = 0.1) -> list:
+    """Return the regressions of results against baseline.
+
+    A regression is a stage of a workload whose min time exceeds the baseline
+    min time by more than the threshold fraction, as a (workload, stage,
+    baseline seconds, seconds) tuple. Workloads and stages missing from either
+    side are skipped.
+    """
+    regressions = list()
+    for workload, result in results["workloads"].items():
+        baseline_stages = (
+            baseline["workloads"].get(workload, dict()).get("stages", dict())
+        )
+        for stage, timing in result["stages"].items():
+            if stage not in baseline_stages:
+                continue
+            baseline_time = baseline_stages[stage]["min"]
+            if timing["min"] > baseline_time * (1 + threshold):
+                regressions.append((workload, stage, baseline_time, timing["min"]))
+    return regressions
+
+
+def print_results(results: dict, baseline: dict = None, file=sys.stdout) -> None:
+    print(
+        f"{'workload':10}{'tokens':>8}{'stage':>24}{'min (ms)':>12}"
+        f"{'median (ms)':>14}{'us/token':>10}"
+        + (f"{'change':>10}" if baseline is not None else ""),
+        file=file,
+    )
+    for workload, result in results["workloads"].items():
+        for stage, timing in result["stages"].items():
+            line = (
+                f"{workload:10}{result['tokens']:>8}{stage:>24}"
+                f"{1e3 * timing['min']:>12.3f}{1e3 * timing['median']:>14.3f}"
+                f"{1e6 * timing['min'] / result['tokens']:>10.3f}"
+            )
+            if baseline is not None:
+                baseline_stage = (
+                    baseline["workloads"]
+                    .get(workload, dict())
+                    .get("stages", dict())
+                    .get(stage)
+                )
+                if baseline_stage is not None:
+                    change = timing["min"] / baseline_stage["min"] - 1
+                    line += f"{change:>+10.1%}"
+            print(line, file=file)
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__)
+    argument_parser.add_argument(
+        "-r",
+        "--repeat",
+        type=int,
+        default=5,
+        help="number of timed runs of each stage (default: 5)",
+    )
+    argument_parser.add_argument(
+        "-w",
+        "--workload",
+        action="append",
+        choices=WORKLOADS.keys(),
+        help="workload to run, may be repeated (default: all)",
+    )
+    argument_parser.add_argument(
+        "-s", "--save", metavar="FILE", help="save the results as a JSON baseline"
+    )
+    argument_parser.add_argument(
+        "-c", "--compare", metavar="FILE", help="compare against a JSON baseline"
+    )
+    argument_parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown fraction reported as a regression (default: 0.1)",
+    )
+    args = argument_parser.parse_args()
+    workloads = {name: WORKLOADS[name] for name in (args.workload or WORKLOADS.keys())}
+    results = run(workloads, args.repeat)
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+    if args.save is not None:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for workload, stage, baseline_time, current_time in regressions:
+            print(
+                f"REGRESSION {workload}/{stage}: {1e3 * baseline_time:.3f} ms"
+                f" -> {1e3 * current_time:.3f} ms",
+                file=sys.stderr,
+            )
+        if len(regressions) > 0:
+            sys.exit(1)
@@ -0,0 +1,116 @@
+from collections import OrderedDict, namedtuple
+from converter import Converter
+from evaluator import Evaluator
+import os
+import pickle
+import re
+import threading
+
+ParseResult = namedtuple(
+    typename="ParseResult",
+    field_names=["source", "tokens", "postfix", "prefix", "operands"],
+)
+
+
+def normalize(source: str) -> str:
+    """Remove the whitespace of source that does not separate two operands.
+
+    Sources that differ only in such whitespace have the same tokens.
+    """
+    return re.sub(r" ?([^\w\s]) ?", r"\1", re.sub(r"\s+", " ", source).strip())
+
+
+class ParseCache(object):
+    """Thread-safe LRU cache of parse results keyed on normalized sources.
+
+    A result holds the normalized source, its token stream, postfix and prefix
+    tokens and operand symbols. Token positions refer to the normalized
+    source. Expressions with errors are not cached. If path is given, the
+    cache is loaded from it if it exists and save() writes it back.
+    """
+
+    def __init__(self, maxsize: int = 4096, path: str = None) -> None:
+        super().__init__()
+        self.converter = Converter()
+        self.evaluator = Evaluator()
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    def get(self, source: str) -> ParseResult:
+        key = normalize(source)
+        with self.lock:
+            result = self.entries.get(key)
+            if result is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        # Parse outside of the lock, so that other threads are not blocked.
+        tokens = self.converter.tokenize(key)
+        tree = self.converter.parser.parse_tree(tokens)
+        postfix_tokens = tuple(tree.postfix())
+        result = ParseResult(
+            source=key,
+            tokens=tuple(tokens),
+            postfix=postfix_tokens,
+            prefix=tuple(tree.prefix()),
+            operands=tuple(self.evaluator.get_operand_symbols(postfix_tokens)),
+        )
+        with self.lock:
+            self._insert(key, result)
+        return result
+
+    def _insert(self, key: str, result: ParseResult) -> None:
+        self.entries[key] = result
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self.entries),
+                "maxsize": self.maxsize,
+                "hit_rate": self.hits / lookups if lookups > 0 else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def save(self, path: str = None) -> None:
+        """Write the entries, least recently used first, to path or self.path."""
+        path = self._path(path)
+        with self.lock:
+            results = list(self.entries.values())
+        # Write to a temporary file first, so that a crash does not leave a
+        # truncated cache behind.
+        with open(f"{path}.tmp", "wb") as file:
+            pickle.dump(results, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f"{path}.tmp", path)
+
+    def load(self, path: str = None) -> None:
+        """Add the entries written by save to the cache."""
+        with open(self._path(path), "rb") as file:
+            results = pickle.load(file)
+        with self.lock:
+            for result in results:
+                self._insert(result.source, result)
+
+    def _path(self, path: str) -> str:
+        path = path or self.path
+        if path is None:
+            raise Exception("No path given and the cache has no path")
+        return path
@@ -18,22 +18,48 @@ class Converter(object):
         return self.parser.parse(infix_tokens)
 
     def infix_to_prefix(self, infix_tokens: list) -> list:
-        postfix_tokens = self.infix_to_postfix(infix_tokens)
-        return self.postfix_to_prefix(postfix_tokens)
+        return list(self.iter_prefix(infix_tokens))
+
+    def iter_postfix(self, infix_tokens: list):
+        """Lazily yield the postfix tokens of infix_tokens."""
+        return self.parser.parse_tree(infix_tokens).postfix()
+
+    def iter_prefix(self, infix_tokens: list):
+        """Lazily yield the prefix tokens of infix_tokens."""
+        return self.parser.parse_tree(infix_tokens).prefix()
 
     def postfix_to_prefix(self, postfix_tokens: list) -> list:
+        return list(self.iter_postfix_to_prefix(postfix_tokens))
+
+    def iter_postfix_to_prefix(self, postfix_tokens: list):
+        """Lazily yield the prefix tokens of postfix_tokens in linear time."""
+        # starts[i] is the index of the first token of the subexpression
+        # ending with postfix_tokens[i].
+        starts = list()
         stack = list()
-        print(postfix_tokens)
-        for token in postfix_tokens:
+        for index, token in enumerate(postfix_tokens):
             if token in self.operators:
                 num_operands = self.operators[token].num_operands
-                new_expression = [token] + sum(stack[-num_operands:], start=list())
+                start = stack[-num_operands]
                 del stack[-num_operands:]
             else:  # token is an operand
-                new_expression = [token]
-            stack.append(new_expression)
+                start = index
+            starts.append(start)
+            stack.append(start)
         assert len(stack) == 1
-        return stack[0]
+        # An operator is followed by its operands in prefix order; the last
+        # operand of the subexpression ending at i ends at i - 1, and every
+        # operand ends right before the start of the next one.
+        pending = [len(starts) - 1]
+        while len(pending) > 0:
+            end = pending.pop()
+            token = postfix_tokens[end]
+            yield token
+            if token in self.operators:
+                operand_ends = [end - 1]
+                for _ in range(self.operators[token].num_operands - 1):
+                    operand_ends.append(starts[operand_ends[-1]] - 1)
+                pending.extend(operand_ends)
 
 
 if __name__ == "__main__":
@@ -1,14 +1,48 @@
+from functools import lru_cache
+from itertools import chain, islice, product
+import re
+import sys
+from keyword import iskeyword
 from naive_converter import OPERATORS
-from prettytable import PrettyTable
 from converter import Converter
 
+# Bit-sliced counterparts of OPERATORS. Every operand is a bit-vector over all
+# assignments (bit i holds the value in row i of the truth table), so a single
+# big integer operation evaluates the operator for every row at once. mask has
+# one bit set for each row and is used to keep complements finite.
+BITWISE_OPERATORS = {
+    "!": (lambda opnds, mask: ~opnds[0] & mask),
+    "&": (lambda opnds, mask: opnds[0] & opnds[1]),
+    "|": (lambda opnds, mask: opnds[0] | opnds[1]),
+    "^": (lambda opnds, mask: (~opnds[0] | opnds[1]) & mask),
+    "~": (lambda opnds, mask: ~(opnds[0] ^ opnds[1]) & mask),
+}
+
+# Python source templates of OPERATORS, used to compile postfix expressions.
+# The generated code calls bool as _bool, which no parameter can shadow since
+# operands starting with an underscore are renamed.
+PYTHON_OPERATORS = {
+    "!": "not {0}",
+    "&": "{0} and {1}",
+    "|": "{0} or {1}",
+    "^": "not {0} or {1}",
+    "~": "_bool({0}) == _bool({1})",
+}
+
+# Number of operands evaluated together by the bit-sliced block iterator, i.e.
+# each block covers 1 << BLOCK_BITS rows of the truth table.
+BLOCK_BITS = 12
+
+FALSE_CONSTANTS = frozenset(["0", "F", "False", "false"])
+TRUE_CONSTANTS = frozenset(["1", "T", "True", "true"])
+
 
 class Evaluator(object):
     def __init__(self) -> None:
         super().__init__()
         self.operators = OPERATORS
-        self.false_constants = ["0", "F", "False", "false"]
-        self.true_constants = ["1", "T", "True", "true"]
+        self.false_constants = FALSE_CONSTANTS
+        self.true_constants = TRUE_CONSTANTS
 
     def get_operand_symbols(self, tokens: list) -> list:
         symbols_set = set()
@@ -23,31 +57,355 @@ class Evaluator(object):
         result.sort()
         return result
 
+    def compile(self, postfix_tokens: list):
+        """Compile postfix_tokens into a function of its operand symbols.
+
+        The arguments of the function are the operands in the order returned
+        by get_operand_symbols, and the operand list is available as its
+        `operands` attribute.
+        """
+        return _compile_postfix(
+            tuple(postfix_tokens), tuple(self.get_operand_symbols(postfix_tokens))
+        )
+
     def get_truth_table(self, postfix_tokens: list) -> list:
-        operands = dict().fromkeys(self.get_operand_symbols(postfix_tokens), False)
+        function = self.compile(postfix_tokens)
+        operands = list(function.operands)
         result = list()
-        for i in range(1 << len(operands)):
-            row = list()
-            values_str = bin(i)[2:].zfill(len(operands))
-            for index, key in enumerate(operands.keys()):
-                operands[key] = bool(int(values_str[index]))
-                row.append(int(operands[key]))
-            operand_stack = []
-            for token in postfix_tokens:
-                if token in self.operators:
-                    operator = self.operators[token]
-                    operand_values = operand_stack[-operator.num_operands :]
-                    del operand_stack[-operator.num_operands :]
-                    operand_stack.append(operator.lambda_expr(operand_values))
-                elif token in self.false_constants:
-                    operand_stack.append(False)
-                elif token in self.true_constants:
-                    operand_stack.append(True)
-                else:
-                    operand_stack.append(operands[token])
-            row.append(int(operand_stack[0]))
+        for values in product((0, 1), repeat=len(operands)):
+            row = list(values)
+            row.append(int(function(*values)))
             result.append(row)
-        return list(operands.keys()) + ["result"], result
+        return operands + ["result"], result
+
+    def get_gray_code_results(self, postfix_tokens: list) -> tuple:
+        """Return the operand symbols and the result column as a bytearray.
+
+        Assignments are visited in Gray code order, so exactly one operand
+        changes between consecutive assignments and only the subexpressions
+        containing it are evaluated again. Byte i of the result is the value of
+        row i of the truth table.
+        """
+        operands = self.get_operand_symbols(postfix_tokens)
+        initialize, updates = _compile_gray_code(tuple(postfix_tokens), tuple(operands))
+        num_operands = len(operands)
+        results = bytearray(1 << num_operands)
+        values = list()
+        results[0] = initialize(values)
+        row = 0
+        for step in range(1, len(results)):
+            # The Gray code of step differs from the previous one in its
+            # lowest set bit, which belongs to operand num_operands - bit - 1.
+            bit = (step & -step).bit_length() - 1
+            row ^= 1 << bit
+            results[row] = updates[num_operands - bit - 1](values)
+        return operands, results
+
+    def get_gray_code_truth_table(self, postfix_tokens: list) -> tuple:
+        """Same as get_truth_table, using get_gray_code_results."""
+        operands, results = self.get_gray_code_results(postfix_tokens)
+        rows = list()
+        for values, result in zip(product((0, 1), repeat=len(operands)), results):
+            row = list(values)
+            row.append(result)
+            rows.append(row)
+        return operands + ["result"], rows
+
+    def get_operand_vectors(self, operands: list) -> tuple:
+        """Return the bit-vectors of operands over all assignments, and the row mask."""
+        num_rows = 1 << len(operands)
+        mask = (1 << num_rows) - 1
+        vectors = dict()
+        for index, key in enumerate(operands):
+            # The first operand is the most significant bit of the row index,
+            # so operand `index` alternates between runs of `period` zeros and
+            # `period` ones.
+            period = 1 << (len(operands) - index - 1)
+            block = ((1 << period) - 1) << period
+            vectors[key] = mask // ((1 << (period << 1)) - 1) * block
+        return vectors, mask
+
+    def evaluate_bitwise(
+        self, postfix_tokens: list, operand_vectors: dict, mask: int, zero: int = 0
+    ) -> int:
+        """Evaluate postfix_tokens once over bit-vectors instead of once per row.
+
+        mask and zero are the true and false vectors. Any vectors supporting
+        ~, &, | and ^ can be used, such as NumPy arrays.
+        """
+        operand_stack = []
+        for token in postfix_tokens:
+            if token in self.operators:
+                num_operands = self.operators[token].num_operands
+                operand_values = operand_stack[-num_operands:]
+                del operand_stack[-num_operands:]
+                operand_stack.append(BITWISE_OPERATORS[token](operand_values, mask))
+            elif token in self.false_constants:
+                operand_stack.append(zero)
+            elif token in self.true_constants:
+                operand_stack.append(mask)
+            else:
+                operand_stack.append(operand_vectors[token])
+        return operand_stack[0]
+
+    def get_result_bitmask(self, postfix_tokens: list) -> tuple:
+        """Return the operand symbols and the result column packed into an int.
+
+        Bit i of the result is set if and only if row i of the truth table
+        evaluates to true.
+        """
+        operands = self.get_operand_symbols(postfix_tokens)
+        operand_vectors, mask = self.get_operand_vectors(operands)
+        return operands, self.evaluate_bitwise(postfix_tokens, operand_vectors, mask)
+
+    def get_bitwise_truth_table(self, postfix_tokens: list) -> tuple:
+        """Same as get_truth_table, using bit-sliced evaluation.
+
+        Return the header, the rows and the raw result bitmask.
+        """
+        operands, result = self.get_result_bitmask(postfix_tokens)
+        num_rows = 1 << len(operands)
+        result_bits = format(result, f"0{num_rows}b")[::-1]
+        rows = list()
+        for values, bit in zip(product((0, 1), repeat=len(operands)), result_bits):
+            row = list(values)
+            row.append(int(bit))
+            rows.append(row)
+        return operands + ["result"], rows, result
+
+    def iter_result_bitmasks(
+        self, postfix_tokens: list, start: int = 0, stop: int = None
+    ):
+        """Yield (offset, length, result) for consecutive rows in [start, stop).
+
+        Bit j of result is the value of row offset + j. Rows are evaluated in
+        bit-sliced blocks of 1 << BLOCK_BITS rows, so memory does not depend on
+        the number of operands.
+        """
+        operands = self.get_operand_symbols(postfix_tokens)
+        num_rows = 1 << len(operands)
+        stop = num_rows if stop is None else min(stop, num_rows)
+        block_bits = min(len(operands), BLOCK_BITS)
+        high_operands = operands[: len(operands) - block_bits]
+        # The low operands vary inside a block, and the high operands are
+        # constant within a block and given by the block index.
+        operand_vectors, mask = self.get_operand_vectors(operands[len(high_operands) :])
+        offset = start
+        while offset < stop:
+            block = offset >> block_bits
+            for index, key in enumerate(high_operands):
+                bit = (block >> (len(high_operands) - index - 1)) & 1
+                operand_vectors[key] = mask if bit else 0
+            result = self.evaluate_bitwise(postfix_tokens, operand_vectors, mask)
+            length = min((block + 1) << block_bits, stop) - offset
+            result = (result >> (offset - (block << block_bits))) & ((1 << length) - 1)
+            yield offset, length, result
+            offset += length
+
+    def iter_truth_table(
+        self,
+        postfix_tokens: list,
+        start: int = 0,
+        stop: int = None,
+        chunk_size: int = None,
+    ):
+        """Lazily yield the rows of the truth table in [start, stop).
+
+        If chunk_size is given, yield lists of at most chunk_size rows instead.
+        The header is returned by get_truth_table_header.
+        """
+        rows = self._iter_rows(postfix_tokens, start, stop)
+        if chunk_size is None:
+            yield from rows
+        else:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if len(chunk) == 0:
+                    break
+                yield chunk
+
+    def get_truth_table_header(self, postfix_tokens: list) -> list:
+        return self.get_operand_symbols(postfix_tokens) + ["result"]
+
+    def _iter_rows(self, postfix_tokens: list, start: int, stop: int):
+        num_operands = len(self.get_operand_symbols(postfix_tokens))
+        block_bits = min(num_operands, BLOCK_BITS)
+        num_high_operands = num_operands - block_bits
+        for offset, length, result in self.iter_result_bitmasks(
+            postfix_tokens, start, stop
+        ):
+            block = offset >> block_bits
+            high_values = [
+                (block >> (num_high_operands - index - 1)) & 1
+                for index in range(num_high_operands)
+            ]
+            low_offset = offset - (block << block_bits)
+            low_values = islice(
+                product((0, 1), repeat=block_bits), low_offset, low_offset + length
+            )
+            result_bits = format(result, f"0{length}b")[::-1]
+            for values, bit in zip(low_values, result_bits):
+                row = high_values + list(values)
+                row.append(int(bit))
+                yield row
+
+
+@lru_cache(maxsize=1024)
+def _compile_postfix(postfix_tokens: tuple, operands: tuple):
+    parameters = dict()
+    for index, operand in enumerate(operands):
+        if operand.isidentifier() and not iskeyword(operand) and operand[0] != "_":
+            parameters[operand] = operand
+        else:
+            parameters[operand] = f"_{index}"
+    # Emit straight-line code with one temporary per operator, so that deeply
+    # nested expressions do not hit the recursion limit of the Python compiler.
+    lines = [f"def function({', '.join(parameters.values())}):"]
+    stack = list()
+    for token in postfix_tokens:
+        if token in OPERATORS:
+            num_operands = OPERATORS[token].num_operands
+            expression = PYTHON_OPERATORS[token].format(*stack[-num_operands:])
+            del stack[-num_operands:]
+            stack.append(f"_t{len(lines)}")
+            lines.append(f"    {stack[-1]} = {expression}")
+        elif token in parameters:
+            stack.append(parameters[token])
+        elif token in TRUE_CONSTANTS:
+            stack.append("True")
+        else:
+            stack.append("False")
+    assert len(stack) == 1
+    lines.append(f"    return _bool({stack[0]})")
+    source = "\n".join(lines)
+    namespace = {"_bool": bool}
+    exec(source, namespace)
+    function = namespace["function"]
+    function.operands = operands
+    function.source = source
+    return function
+
+
+@lru_cache(maxsize=1024)
+def _compile_gray_code(postfix_tokens: tuple, operands: tuple) -> tuple:
+    """Compile the incremental evaluation of postfix_tokens.
+
+    Return a function initializing a list of the values of all operands and
+    subexpressions to the assignment of all zeros, and for each operand a
+    function negating it in such a list and updating the subexpressions that
+    contain it. Both return the value of the expression.
+    """
+    # Slot i < len(operands) holds operand i, and the following slots hold
+    # the operators in postfix order.
+    slots = {operand: index for index, operand in enumerate(operands)}
+    statements = list()  # the statement and the operand bitmask of each slot
+    stack = list()  # (expression, operand bitmask) of each operand
+    for token in postfix_tokens:
+        if token in OPERATORS:
+            num_operands = OPERATORS[token].num_operands
+            arguments = stack[-num_operands:]
+            del stack[-num_operands:]
+            expression = PYTHON_OPERATORS[token].format(
+                *(argument for argument, _ in arguments)
+            )
+            dependency = 0
+            for _, argument_dependency in arguments:
+                dependency |= argument_dependency
+            slot = len(operands) + len(statements)
+            statements.append((f"    v[{slot}] = {expression}", dependency))
+            stack.append((f"v[{slot}]", dependency))
+        elif token in slots:
+            stack.append((f"v[{slots[token]}]", 1 << slots[token]))
+        elif token in TRUE_CONSTANTS:
+            stack.append(("True", 0))
+        else:
+            stack.append(("False", 0))
+    assert len(stack) == 1
+    root = stack[0][0]
+    lines = ["def initialize(v):"]
+    lines.append(f"    v[:] = [False] * {len(operands) + len(statements)}")
+    lines.extend(statement for statement, _ in statements)
+    lines.append(f"    return _bool({root})")
+    for index in range(len(operands)):
+        lines.append(f"def update_{index}(v):")
+        lines.append(f"    v[{index}] = not v[{index}]")
+        lines.extend(
+            statement for statement, dependency in statements if dependency >> index & 1
+        )
+        lines.append(f"    return _bool({root})")
+    namespace = {"_bool": bool}
+    exec("\n".join(lines), namespace)
+    updates = [namespace[f"update_{index}"] for index in range(len(operands))]
+    return namespace["initialize"], updates
+
+
+def _to_postfix(expr) -> list:
+    if isinstance(expr, str):
+        converter = Converter()
+        return converter.infix_to_postfix(converter.tokenize(expr))
+    return expr
+
+
+def compile(expr):
+    """Compile an infix expression string or a list of postfix tokens into a function.
+
+    For example, compile("P & !Q") returns a function f(P, Q) -> bool.
+    """
+    return Evaluator().compile(_to_postfix(expr))
+
+
+def _iter_result_runs(
+    postfix_tokens: list, value: str, start: int = 0, stop: int = None
+):
+    """Yield (start, stop) for the maximal runs of rows whose result is value.
+
+    Only the rows in [start, stop) are evaluated.
+    """
+    run = None
+    for offset, length, result in Evaluator().iter_result_bitmasks(
+        postfix_tokens, start, stop
+    ):
+        result_bits = format(result, f"0{length}b")[::-1]
+        for match in re.finditer(f"{value}+", result_bits):
+            run_start, run_stop = offset + match.start(), offset + match.end()
+            if run is not None and run[1] == run_start:
+                run = (run[0], run_stop)
+                continue
+            if run is not None:
+                yield run
+            run = (run_start, run_stop)
+    if run is not None:
+        yield run
+
+
+def principal_disjunctive_normal_form(expr, ranges: bool = False) -> list:
+    """Return the minterm indices of expr without building its truth table.
+
+    expr is an infix expression string or a list of postfix tokens. If ranges
+    is true, return the indices as a list of half-open (start, stop) ranges.
+    """
+    runs = _iter_result_runs(_to_postfix(expr), "1")
+    if ranges:
+        return list(runs)
+    return [index for start, stop in runs for index in range(start, stop)]
+
+
+def principal_conjunctive_normal_form(expr, ranges: bool = False) -> list:
+    """Return the maxterm indices of expr without building its truth table.
+
+    The indices are the same as truth_table_to_principal_conjunctive_normal_form.
+    """
+    postfix_tokens = _to_postfix(expr)
+    num_rows = 1 << len(Evaluator().get_operand_symbols(postfix_tokens))
+    # row i of the truth table is maxterm num_rows - i - 1
+    result = [
+        (num_rows - stop, num_rows - start)
+        for start, stop in _iter_result_runs(postfix_tokens, "0")
+    ]
+    result.reverse()
+    if ranges:
+        return result
+    return [index for start, stop in result for index in range(start, stop)]
 
 
 def truth_table_to_principal_disjunctive_normal_form(truth_table: list) -> list:
@@ -67,6 +425,31 @@ def truth_table_to_principal_conjunctive_normal_form(truth_table: list) -> list:
     return result
 
 
+def print_truth_table(header: list, chunks, file=sys.stdout) -> None:
+    """Print a truth table given as an iterable of row chunks, one chunk at a time.
+
+    Every cell is a single digit, so all chunks are laid out with the same
+    column widths and can be printed as one table.
+    """
+    # prettytable is slow to import and only needed here.
+    from prettytable import PrettyTable
+
+    lines = None
+    for chunk in chunks:
+        pretty_table = PrettyTable(header)
+        pretty_table.add_rows(chunk)
+        # lines are the top border, the header, the header separator, the
+        # rows and the bottom border
+        if lines is None:
+            lines = pretty_table.get_string().splitlines()
+            print("\n".join(lines[:-1]), file=file)
+        else:
+            lines = pretty_table.get_string().splitlines()
+            print("\n".join(lines[3:-1]), file=file)
+    if lines is not None:
+        print(lines[-1], file=file)
+
+
 if __name__ == "__main__":
     infix_str = input("infix expression: ")
     try:
@@ -77,15 +460,21 @@ if __name__ == "__main__":
         print(e)
     else:
         evaluator = Evaluator()
-        operand_symbols, truth_table = evaluator.get_truth_table(postfix_tokens)
-        pretty_table = PrettyTable(operand_symbols)
-        pretty_table.add_rows(truth_table)
-        print(pretty_table)
-        print(
-            "principal disjunctive normal form:",
-            truth_table_to_principal_disjunctive_normal_form(truth_table),
-        )
-        print(
-            "principal conjunctive normal form:",
-            truth_table_to_principal_conjunctive_normal_form(truth_table),
+        print_truth_table(
+            evaluator.get_truth_table_header(postfix_tokens),
+            evaluator.iter_truth_table(postfix_tokens, chunk_size=4096),
         )
+        # Both normal forms come from one pass over the runs of true rows: the
+        # rows between two runs are false, and false row i is maxterm
+        # num_rows - i - 1. Ranges of terms are printed as they are found.
+        num_rows = 1 << len(evaluator.get_operand_symbols(postfix_tokens))
+        print("principal disjunctive (m) and conjunctive (M) normal forms:")
+        previous = 0
+        for start, stop in chain(
+            _iter_result_runs(postfix_tokens, "1"), [(num_rows, num_rows)]
+        ):
+            if previous < start:
+                print(f"M {num_rows - start}-{num_rows - previous - 1}")
+            if start < stop:
+                print(f"m {start}-{stop - 1}")
+            previous = stop
@@ -0,0 +1,182 @@
+"""Signatures of formulas for finding logically equivalent ones.
+
+The exact signature of a formula with at most EXACT_MAX_VARIABLES operands is
+its truth table bitmask over the operands it depends on, so two such formulas
+are equivalent if and only if their exact signatures are equal. The
+simulation signature evaluates a formula on SIMULATION_WIDTH fixed
+pseudo-random assignments, where each operand name always gets the same
+values, so equivalent formulas always have equal simulation signatures, and
+inequivalent ones rarely do.
+"""
+
+from evaluator import Evaluator, _to_postfix
+import random
+import sat
+
+EXACT_MAX_VARIABLES = 16
+SIMULATION_WIDTH = 256
+SIMULATION_SEED = 0
+
+
+def exact_signature(expr) -> tuple:
+    """Return the operands expr depends on and its truth table over them.
+
+    expr is an infix expression string or a list of postfix tokens. Operands
+    whose value never changes the result are left out, so that for example
+    "A | B & !B" and "A" have the same signature. Formulas with more than
+    EXACT_MAX_VARIABLES operands are accepted if they depend on at most that
+    many of them.
+    """
+    postfix_tokens = _to_postfix(expr)
+    operands = Evaluator().get_operand_symbols(postfix_tokens)
+    relevant = operands
+    if len(operands) > EXACT_MAX_VARIABLES:
+        relevant = _relevant_operands(postfix_tokens, operands)
+        if len(relevant) > EXACT_MAX_VARIABLES:
+            raise Exception(
+                f"Expect at most {EXACT_MAX_VARIABLES} operands but found "
+                f"{len(operands)} instead"
+            )
+    return _exact_signature(postfix_tokens, operands, relevant)
+
+
+def _exact_signature(postfix_tokens, operands: list, candidates: list) -> tuple:
+    """Return exact_signature of postfix_tokens, given that it depends on no
+    operands but candidates.
+    """
+    evaluator = Evaluator()
+    operand_vectors, mask = evaluator.get_operand_vectors(candidates)
+    for operand in operands:
+        operand_vectors.setdefault(operand, 0)
+    result = evaluator.evaluate_bitwise(postfix_tokens, operand_vectors, mask)
+    relevant = list()
+    for index, operand in enumerate(candidates):
+        # Compare the rows where the operand is 1 with the rows where it is 0.
+        period = 1 << (len(candidates) - index - 1)
+        vector = operand_vectors[operand]
+        if (result & vector) >> period != result & ~vector & mask:
+            relevant.append(operand)
+    if len(relevant) < len(candidates):
+        operand_vectors, mask = evaluator.get_operand_vectors(relevant)
+        for operand in operands:
+            operand_vectors.setdefault(operand, 0)
+        result = evaluator.evaluate_bitwise(postfix_tokens, operand_vectors, mask)
+    return tuple(relevant), result
+
+
+def _relevant_operands(postfix_tokens, operands: list) -> list:
+    """Return the operands whose value changes the result of postfix_tokens for
+    some assignment, or at least EXACT_MAX_VARIABLES + 1 of them.
+
+    Flipping an operand in the simulated assignments shows most of them; the
+    others are decided with the SAT solver, by comparing the formula with the
+    operand replaced by 0 and by 1.
+    """
+    evaluator = Evaluator()
+    operand_vectors = {operand: simulation_vector(operand) for operand in operands}
+    mask = (1 << SIMULATION_WIDTH) - 1
+    result = evaluator.evaluate_bitwise(postfix_tokens, operand_vectors, mask)
+    relevant = set()
+    for operand in operands:
+        operand_vectors[operand] ^= mask
+        if evaluator.evaluate_bitwise(postfix_tokens, operand_vectors, mask) != result:
+            relevant.add(operand)
+        operand_vectors[operand] ^= mask
+    for operand in operands:
+        if len(relevant) > EXACT_MAX_VARIABLES:
+            break
+        if operand not in relevant:
+            cofactors = [
+                [value if token == operand else token for token in postfix_tokens]
+                for value in ["0", "1"]
+            ]
+            if sat.is_satisfiable(cofactors[0] + cofactors[1] + ["~", "!"]):
+                relevant.add(operand)
+    return [operand for operand in operands if operand in relevant]
+
+
+def simulation_vector(name: str, seed: int = SIMULATION_SEED) -> int:
+    """Return the values of operand name in the simulated assignments."""
+    return random.Random(f"{seed}/{name}").getrandbits(SIMULATION_WIDTH)
+
+
+def simulation_signature(expr, seed: int = SIMULATION_SEED) -> int:
+    """Return the results of expr on the simulated assignments as a bitmask."""
+    postfix_tokens = _to_postfix(expr)
+    evaluator = Evaluator()
+    operand_vectors = {
+        operand: simulation_vector(operand, seed)
+        for operand in evaluator.get_operand_symbols(postfix_tokens)
+    }
+    mask = (1 << SIMULATION_WIDTH) - 1
+    return evaluator.evaluate_bitwise(postfix_tokens, operand_vectors, mask)
+
+
+def signature(expr) -> tuple:
+    """Return the exact signature of expr if it depends on few enough
+    operands, and its simulation signature otherwise, tagged with "exact" or
+    "simulation".
+    """
+    postfix_tokens = _to_postfix(expr)
+    operands = Evaluator().get_operand_symbols(postfix_tokens)
+    if len(operands) > EXACT_MAX_VARIABLES:
+        # Equivalent formulas may differ in operands they do not depend on.
+        relevant = _relevant_operands(postfix_tokens, operands)
+        if len(relevant) > EXACT_MAX_VARIABLES:
+            return ("simulation", simulation_signature(postfix_tokens))
+        return ("exact", *_exact_signature(postfix_tokens, operands, relevant))
+    return ("exact", *_exact_signature(postfix_tokens, operands, operands))
+
+
+def are_equivalent(expr1, expr2) -> bool:
+    """Decide the equivalence of two expressions with the SAT solver."""
+    postfix_tokens = list(_to_postfix(expr1)) + list(_to_postfix(expr2))
+    return not sat.is_satisfiable(postfix_tokens + ["~", "!"])
+
+
+class EquivalenceIndex(object):
+    """Hash index of formulas by simulation signature.
+
+    Formulas are stored under a key. find returns the keys of the stored
+    formulas equivalent to a formula: the formulas with the same simulation
+    signature are candidates, confirmed by comparing exact signatures when
+    both depend on few enough operands, and with the SAT solver otherwise.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buckets = dict()  # simulation signature -> list of entries
+        self.size = 0
+        self.collisions = 0  # candidates that turned out to be inequivalent
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _entry(self, key, expr) -> list:
+        """Return the [key, postfix tokens, exact signature or None] of expr."""
+        postfix_tokens = tuple(_to_postfix(expr))
+        kind, *rest = signature(list(postfix_tokens))
+        exact = tuple(rest) if kind == "exact" else None
+        return [key, postfix_tokens, exact]
+
+    def _matches(self, entry: list, candidate: list) -> bool:
+        if entry[2] is not None and candidate[2] is not None:
+            equivalent = entry[2] == candidate[2]
+        else:
+            equivalent = are_equivalent(list(entry[1]), list(candidate[1]))
+        if not equivalent:
+            self.collisions += 1
+        return equivalent
+
+    def add(self, key, expr) -> None:
+        """Store expr, an infix expression string or postfix tokens, under key."""
+        entry = self._entry(key, expr)
+        bucket = self.buckets.setdefault(simulation_signature(list(entry[1])), list())
+        bucket.append(entry)
+        self.size += 1
+
+    def find(self, expr) -> list:
+        """Return the keys of the stored formulas equivalent to expr."""
+        entry = self._entry(None, expr)
+        bucket = self.buckets.get(simulation_signature(list(entry[1])), list())
+        return [candidate[0] for candidate in bucket if self._matches(entry, candidate)]
@@ -0,0 +1,107 @@
+"""Seeded random formula generator for tests and benchmarks."""
+
+from naive_converter import OPERATORS
+import random
+
+DEFAULT_OPERATOR_WEIGHTS = {"&": 4, "|": 4, "^": 2, "~": 1}
+
+
+def random_postfix(
+    seed: int = 0,
+    num_operands: int = 100,
+    num_variables: int = 8,
+    max_depth: int = None,
+    operator_weights: dict = None,
+    negation_rate: float = 0.2,
+    constant_rate: float = 0.0,
+    skew: float = 0.0,
+) -> list:
+    """Return the postfix tokens of a random formula.
+
+    The formula has num_operands operand occurrences drawn from the variables
+    X0 .. X{num_variables - 1} (or constants 0 and 1 with probability
+    constant_rate), joined by binary operators drawn with operator_weights.
+    Every subexpression is negated with probability negation_rate. Binary
+    operators are nested at most max_depth deep; a max_depth below
+    log2(num_operands) is raised to it. With probability skew, a binary
+    operator gets as few operands on its left as the depth allows, so a skew
+    close to 1 gives deeply right-nested formulas.
+    """
+    rng = random.Random(seed)
+    operator_weights = operator_weights or DEFAULT_OPERATOR_WEIGHTS
+    operators = list(operator_weights.keys())
+    weights = list(operator_weights.values())
+    min_depth = (num_operands - 1).bit_length()
+    max_depth = num_operands if max_depth is None else max(max_depth, min_depth)
+    tokens = list()
+    # Split the operands of every subexpression at random between its two
+    # operands, so that each side fits within the remaining depth. The
+    # stack holds (number of operands, depth budget) pairs of subexpressions
+    # still to be emitted, and the operator tokens that follow them.
+    stack = [(num_operands, max_depth)]
+    while len(stack) > 0:
+        item = stack.pop()
+        if isinstance(item, str):
+            tokens.append(item)
+        else:
+            size, budget = item
+            if size == 1:
+                if rng.random() < constant_rate:
+                    tokens.append(rng.choice("01"))
+                else:
+                    tokens.append(f"X{rng.randrange(num_variables)}")
+            else:
+                capacity = size if budget > size.bit_length() else 1 << (budget - 1)
+                if rng.random() < skew:
+                    left_size = max(1, size - capacity)
+                else:
+                    left_size = rng.randint(
+                        max(1, size - capacity), min(size - 1, capacity)
+                    )
+                stack.append(rng.choices(operators, weights)[0])
+                stack.append((size - left_size, budget - 1))
+                stack.append((left_size, budget - 1))
+                continue
+        if rng.random() < negation_rate:
+            tokens.append("!")
+    return tokens
+
+
+def postfix_to_infix(postfix_tokens: list) -> str:
+    """Render postfix tokens as a fully parenthesized infix expression."""
+    # starts[i] is the index of the first token of the subexpression ending
+    # with postfix_tokens[i], as in Converter.iter_postfix_to_prefix.
+    starts = list()
+    stack = list()
+    for index, token in enumerate(postfix_tokens):
+        if token in OPERATORS:
+            num_operands = OPERATORS[token].num_operands
+            start = stack[-num_operands]
+            del stack[-num_operands:]
+        else:
+            start = index
+        starts.append(start)
+        stack.append(start)
+    # Emit iteratively; pending holds subexpression ends and literal strings.
+    parts = list()
+    pending = [len(postfix_tokens) - 1]
+    while len(pending) > 0:
+        item = pending.pop()
+        if isinstance(item, str):
+            parts.append(item)
+            continue
+        token = postfix_tokens[item]
+        if token not in OPERATORS:
+            parts.append(token)
+        elif OPERATORS[token].num_operands == 1:
+            parts.append(token)
+            pending.append(item - 1)
+        else:
+            left_end = starts[item - 1] - 1
+            pending.extend([")", item - 1, f" {token} ", left_end, "("])
+    return "".join(parts)
+
+
+def random_formula(seed: int = 0, **kwargs) -> str:
+    """Return a random infix formula; see random_postfix for the parameters."""
+    return postfix_to_infix(random_postfix(seed, **kwargs))
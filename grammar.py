@@ -1,8 +1,9 @@
 from collections import namedtuple
+from syntax_tree import Node
 
 
 tokens = {
-    "ignore": r"\s",
+    "ignore": r"\s+",
     "X": r"0|1|([a-zA-Z_][a-zA-Z0-9_]*)",
     "(": r"\(",
     ")": r"\)",
@@ -21,7 +22,7 @@ Rule = namedtuple(
 
 def p_variable(p: list) -> None:
     """E : X"""
-    p[0] = [p[1]]
+    p[0] = Node(p[1])
 
 
 def p_parens(p: list) -> None:
@@ -31,7 +32,7 @@ def p_parens(p: list) -> None:
 
 def p_negation(p: list) -> None:
     """E : '!' E"""
-    p[0] = p[2] + ["!"]
+    p[0] = Node(p[1], (p[2],))
 
 
 def p_binary_operation(p: list) -> None:
@@ -41,7 +42,7 @@ def p_binary_operation(p: list) -> None:
       | E '^' E
       | E '~' E
     """
-    p[0] = p[1] + p[3] + [p[2]]
+    p[0] = Node(p[2], (p[1], p[3]))
 
 
 rules = {
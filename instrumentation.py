@@ -0,0 +1,189 @@
+"""Parser metrics, pipeline phase timings and sampled parse traces."""
+
+from contextlib import contextmanager
+from collections import deque
+from converter import Converter
+from evaluator import Evaluator
+from parser import ParseObserver
+import grammar
+import heapq
+import json
+import random
+import time
+
+
+class Metrics(ParseObserver):
+    """Collect counters of the parses it observes.
+
+    Pass a Metrics as the observer of Parser.parse or Parser.parse_tree. It
+    counts parses, errors, tokens, shifts, reduces and the reductions of each
+    rule, and records the maximum stack depth. The max_slowest slowest parses
+    are kept with their expression and own counters, and a fraction
+    trace_rate of the parses is traced event by event, keeping the last
+    max_traces traces. phase() times named phases of a pipeline.
+    """
+
+    def __init__(
+        self,
+        trace_rate: float = 0.0,
+        max_traces: int = 16,
+        max_slowest: int = 10,
+        seed: int = None,
+    ) -> None:
+        super().__init__()
+        self.parses = 0
+        self.errors = 0
+        self.tokens = 0
+        self.shifts = 0
+        self.reduces = 0
+        self.reductions = [0] * len(grammar.rules)
+        self.max_stack_depth = 0
+        self.phases = dict()  # phase name -> [count, seconds]
+        self.trace_rate = trace_rate
+        self.random = random.Random(seed)
+        self.traces = deque(maxlen=max_traces)
+        self.max_slowest = max_slowest
+        self.slowest = list()  # min-heap of (seconds, parse number, record)
+        # State of the current parse.
+        self._tokens = None
+        self._trace = None
+        self._start = 0.0
+        self._shifts = 0
+        self._reduces = 0
+        self._depth = 0
+
+    def begin(self, tokens: list) -> None:
+        self.parses += 1
+        self.tokens += len(tokens) - 1
+        self._tokens = tokens
+        self._shifts = self.shifts
+        self._reduces = self.reduces
+        self._depth = 0
+        if self.trace_rate > 0 and self.random.random() < self.trace_rate:
+            self._trace = list()
+        else:
+            self._trace = None
+        self._start = time.perf_counter()
+
+    def shift(self, rows: list, values: list) -> None:
+        self.shifts += 1
+        # The stack only grows on shifts; its bottom is the initial state.
+        if len(rows) > self._depth:
+            self._depth = len(rows)
+        if self._trace is not None:
+            self._trace.append(("shift", values[-1]))
+
+    def reduce(self, rule_number: int, p: list) -> None:
+        self.reduces += 1
+        self.reductions[rule_number] += 1
+        if self._trace is not None:
+            self._trace.append(("reduce", rule_to_str(rule_number)))
+
+    def accept(self, root) -> None:
+        self._end("accept")
+
+    def error(self, error) -> None:
+        self.errors += 1
+        self._end(str(error))
+
+    def _end(self, outcome: str) -> None:
+        seconds = time.perf_counter() - self._start
+        depth = self._depth - 1
+        if depth > self.max_stack_depth:
+            self.max_stack_depth = depth
+        if self._trace is not None:
+            self._trace.append(("end", outcome))
+            self.traces.append(
+                {"expression": tokens_to_str(self._tokens), "events": self._trace}
+            )
+            self._trace = None
+        if len(self.slowest) < self.max_slowest or seconds > self.slowest[0][0]:
+            # The expression is only built when it is exported.
+            record = {
+                "tokens": self._tokens,
+                "outcome": outcome,
+                "seconds": seconds,
+                "shifts": self.shifts - self._shifts,
+                "reduces": self.reduces - self._reduces,
+                "max_stack_depth": depth,
+            }
+            item = (seconds, self.parses, record)
+            if len(self.slowest) < self.max_slowest:
+                heapq.heappush(self.slowest, item)
+            else:
+                heapq.heapreplace(self.slowest, item)
+        self._tokens = None
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the time spent in the with block to phase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            entry = self.phases.setdefault(name, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def as_dict(self) -> dict:
+        slowest = list()
+        for _, _, record in sorted(self.slowest, reverse=True):
+            record = dict(record)
+            record["expression"] = tokens_to_str(record.pop("tokens"))
+            slowest.append(record)
+        return {
+            "parses": self.parses,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "shifts": self.shifts,
+            "reduces": self.reduces,
+            "reductions": {
+                rule_to_str(number): count
+                for number, count in enumerate(self.reductions)
+                if count > 0
+            },
+            "max_stack_depth": self.max_stack_depth,
+            "phases": {
+                name: {"count": count, "seconds": seconds}
+                for name, (count, seconds) in self.phases.items()
+            },
+            "slowest": slowest,
+            "traces": list(self.traces),
+        }
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.as_dict(), **kwargs)
+
+
+def rule_to_str(rule_number: int) -> str:
+    rule = grammar.rules[rule_number]
+    return f"{rule.head} -> {' '.join(rule.body)}"
+
+
+def tokens_to_str(tokens: list) -> str:
+    return " ".join(token.value for token in tokens if token.symbol != "$")
+
+
+def profile(
+    expression: str,
+    metrics: Metrics,
+    converter: Converter = None,
+    evaluator: Evaluator = None,
+) -> Metrics:
+    """Run expression through the pipeline, timing each phase in metrics.
+
+    The phases are tokenize, parse, convert (postfix to prefix) and evaluate
+    (the bit-sliced truth table, which is exponential in the operand count).
+    """
+    converter = converter or Converter()
+    evaluator = evaluator or Evaluator()
+    with metrics.phase("tokenize"):
+        tokens = converter.tokenize(expression)
+    with metrics.phase("parse"):
+        postfix_tokens = converter.parser.parse(tokens, observer=metrics)
+    with metrics.phase("convert"):
+        converter.postfix_to_prefix(postfix_tokens)
+    with metrics.phase("evaluate"):
+        evaluator.get_result_bitmask(postfix_tokens)
+    return metrics
@@ -0,0 +1,343 @@
+"""Two-level minimisation of principal normal forms.
+
+A cube is a product of literals, stored as the row index bits of its fixed
+operands (value) and the bits of the operands it does not depend on (mask),
+where operand k of n is bit n - k - 1 of a row index as in the truth table.
+Cubes are merged and compared with integer operations on these bits.
+
+minimise_sop covers the minterms of principal_disjunctive_normal_form with as
+few cubes (then literals) as it can find, either exactly (bit-sliced
+Quine-McCluskey prime implicants and a bounded branch and bound cover) or
+heuristically (an Espresso-style expand and irredundant pass over bit-sliced
+row sets) for inputs too large for the former. minimise_pos does the same for
+the maxterms of principal_conjunctive_normal_form, and the results are
+rendered in infix syntax by sop_to_str and pos_to_str.
+"""
+
+from collections import namedtuple
+from evaluator import (
+    Evaluator,
+    _to_postfix,
+    principal_conjunctive_normal_form,
+    principal_disjunctive_normal_form,
+)
+
+Cube = namedtuple(typename="Cube", field_names=["value", "mask"])
+
+# Inputs with more rows (including don't cares) are minimised heuristically by
+# default.
+EXACT_MAX_ROWS = 1 << 10
+
+# Number of branches explored by the exact cover before settling for the best
+# cover found.
+EXACT_MAX_BRANCHES = 1 << 10
+
+# Prime implicants of functions of more operands are merged as sets of row
+# indices instead of bit-sliced rows, whose bitsets have 2 ** num_operands bits.
+BIT_SLICED_MAX_OPERANDS = 20
+
+
+def cube_rows(cube: Cube):
+    """Yield the row indices covered by cube."""
+    subset = cube.mask
+    while True:
+        yield cube.value | subset
+        if subset == 0:
+            break
+        subset = (subset - 1) & cube.mask
+
+
+def cube_cost(cube: Cube, num_operands: int) -> int:
+    """Return the number of literals of cube."""
+    return num_operands - cube.mask.bit_count()
+
+
+def prime_implicants(rows, num_operands: int) -> list:
+    """Return the prime implicants of the function true on rows.
+
+    Cubes of the same mask are merged in pairs differing in one fixed bit,
+    level by level, and the cubes never merged are the prime implicants. The
+    cubes of a mask are a bitset over all rows, bit v standing for the cube
+    of that mask with value v, so that they are merged on one operand at once
+    by shifting the bitset by the weight of the operand.
+    """
+    if num_operands > BIT_SLICED_MAX_OPERANDS:
+        return _prime_implicants_sets(rows, num_operands)
+    num_rows = 1 << num_operands
+    # clear[index] has the bits of the rows where operand bit index is 0
+    clear = list()
+    for index in range(num_operands):
+        bit = 1 << index
+        pattern, width = (1 << bit) - 1, 2 * bit
+        while width < num_rows:
+            pattern |= pattern << width
+            width *= 2
+        clear.append(pattern)
+    primes = list()
+    level = {0: rows_to_bits(rows)}
+    while len(level) > 0:
+        next_level = dict()
+        for mask, values in level.items():
+            merged = 0
+            for index in range(num_operands):
+                bit = 1 << index
+                if mask & bit:
+                    continue
+                pairs = values & (values >> bit) & clear[index]
+                if pairs != 0:
+                    next_level[mask | bit] = next_level.get(mask | bit, 0) | pairs
+                    merged |= pairs | (pairs << bit)
+            unmerged = values & ~merged
+            while unmerged != 0:
+                value = (unmerged & -unmerged).bit_length() - 1
+                unmerged &= unmerged - 1
+                primes.append(Cube(value, mask))
+        level = next_level
+    return primes
+
+
+def _prime_implicants_sets(rows, num_operands: int) -> list:
+    """Same as prime_implicants, merging sets of row indices."""
+    primes = list()
+    level = {0: set(rows)}
+    while len(level) > 0:
+        next_level = dict()
+        for mask, values in level.items():
+            merged = set()
+            for value in values:
+                for index in range(num_operands):
+                    bit = 1 << index
+                    if (mask | value) & bit == 0 and value | bit in values:
+                        next_level.setdefault(mask | bit, set()).add(value)
+                        merged.add(value)
+                        merged.add(value | bit)
+            primes.extend(Cube(value, mask) for value in values - merged)
+        level = next_level
+    return primes
+
+
+def exact_cover(
+    primes: list, minterms: list, num_operands: int, max_branches: int = None
+) -> list:
+    """Return a cover of minterms by primes with the fewest cubes.
+
+    Ties are broken by the fewest literals. Essential primes are taken
+    first, then the cover is searched by branch and bound on the minterm
+    covered by the fewest primes. After max_branches branches, the best cover
+    found so far is returned.
+    """
+    max_branches = EXACT_MAX_BRANCHES if max_branches is None else max_branches
+    positions = {minterm: position for position, minterm in enumerate(minterms)}
+    # covers[i] has bit j set if primes[i] covers minterms[j]
+    covers = list()
+    for prime in primes:
+        cover = 0
+        for row in cube_rows(prime):
+            if row in positions:
+                cover |= 1 << positions[row]
+        covers.append(cover)
+    costs = [cube_cost(prime, num_operands) for prime in primes]
+    # coverers[j] are the primes covering minterms[j]
+    coverers = [list() for _ in minterms]
+    for i, cover in enumerate(covers):
+        while cover != 0:
+            coverers[(cover & -cover).bit_length() - 1].append(i)
+            cover &= cover - 1
+    all_minterms = (1 << len(minterms)) - 1
+    # Any further prime adds one cube and at least min_cost literals.
+    min_cost = min(costs, default=0)
+    best = [None, (len(primes) + 1, 0)]  # the best cover and its cost
+    branches = 0
+    # Each stack entry is the chosen primes, their cost and the uncovered
+    # minterms.
+    stack = [([], (0, 0), all_minterms)]
+    while len(stack) > 0:
+        chosen, cost, uncovered = stack.pop()
+        if uncovered == 0:
+            if cost < best[1]:
+                best = [chosen, cost]
+            continue
+        if (cost[0] + 1, cost[1] + min_cost) >= best[1] and best[0] is not None:
+            continue
+        if branches >= max_branches and best[0] is not None:
+            break
+        branches += 1
+        # Branch on the uncovered minterm covered by the fewest primes.
+        candidates = None
+        remaining = uncovered
+        while remaining != 0:
+            position = (remaining & -remaining).bit_length() - 1
+            remaining &= remaining - 1
+            if candidates is None or len(coverers[position]) < len(candidates):
+                candidates = list(coverers[position])
+                if len(candidates) == 1:  # an essential prime
+                    break
+        # Push the candidates covering the most minterms last, so that they
+        # are explored first.
+        candidates.sort(key=lambda i: ((covers[i] & uncovered).bit_count(), -costs[i]))
+        for i in candidates:
+            stack.append(
+                (
+                    chosen + [i],
+                    (cost[0] + 1, cost[1] + costs[i]),
+                    uncovered & ~covers[i],
+                )
+            )
+    return [primes[i] for i in sorted(best[0], key=lambda i: primes[i])]
+
+
+def rows_to_bits(rows) -> int:
+    """Return the rows packed into an int, bit i being set for row i."""
+    bits = bytearray()
+    for row in rows:
+        if len(bits) <= row >> 3:
+            bits.extend(bytes((row >> 3) + 1 - len(bits)))
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, "little")
+
+
+def heuristic_cover(minterms: list, num_operands: int, dont_cares=()) -> list:
+    """Return an irredundant cover of minterms by prime implicants.
+
+    Every cube is a bit-vector over all rows. Starting from the lowest
+    uncovered minterm, each literal is dropped if the expanded cube still
+    avoids the rows that are neither minterms nor don't cares (the off-set).
+    Then cubes whose minterms are all covered by other cubes are removed,
+    smallest first.
+    """
+    on_set = rows_to_bits(minterms)
+    all_rows = (1 << (1 << num_operands)) - 1
+    off_set = all_rows & ~(on_set | rows_to_bits(dont_cares))
+    cubes = list()
+    uncovered = on_set
+    while uncovered != 0:
+        row = (uncovered & -uncovered).bit_length() - 1
+        value, mask, rows = row, 0, 1 << row
+        for index in range(num_operands):
+            bit = 1 << index
+            if value & bit:
+                expanded = rows | (rows >> bit)
+            else:
+                expanded = rows | (rows << bit)
+            if expanded & off_set == 0:
+                value, mask, rows = value & ~bit, mask | bit, expanded
+        cubes.append(Cube(value, mask))
+        uncovered &= ~rows
+    is_minterm = bytearray(1 << num_operands)
+    for row in minterms:
+        is_minterm[row] = 1
+    # counts[row] is the number of cubes covering minterm row, saturated so
+    # that a cube is only removed if its minterms are surely covered twice.
+    counts = bytearray(1 << num_operands)
+    for cube in cubes:
+        for row in cube_rows(cube):
+            counts[row] = min(counts[row] + 1, 255)
+    irredundant = list()
+    for cube in sorted(cubes, key=lambda cube: cube.mask.bit_count()):
+        cube_minterms = [row for row in cube_rows(cube) if is_minterm[row]]
+        if all(counts[row] >= 2 for row in cube_minterms):
+            for row in cube_minterms:
+                counts[row] -= 1
+        else:
+            irredundant.append(cube)
+    return sorted(irredundant)
+
+
+def minimise_sop(
+    minterms: list, num_operands: int, dont_cares=(), method: str = "auto"
+) -> list:
+    """Return the cubes of a minimal or near-minimal sum of products.
+
+    minterms are the indices returned by principal_disjunctive_normal_form.
+    method is "exact", "heuristic" or "auto", which is exact for at most
+    EXACT_MAX_ROWS rows.
+    """
+    if method == "auto":
+        num_rows = len(minterms) + len(dont_cares)
+        method = "exact" if num_rows <= EXACT_MAX_ROWS else "heuristic"
+    if method == "exact":
+        primes = prime_implicants(list(minterms) + list(dont_cares), num_operands)
+        return exact_cover(primes, list(minterms), num_operands)
+    elif method == "heuristic":
+        return heuristic_cover(minterms, num_operands, dont_cares)
+    raise Exception(f"Unknown minimisation method {method}")
+
+
+def minimise_pos(
+    maxterms: list, num_operands: int, dont_cares=(), method: str = "auto"
+) -> list:
+    """Return the cubes of the false rows of a minimal or near-minimal product
+    of sums; pos_to_str renders each cube as a negated sum.
+
+    maxterms are the indices returned by principal_conjunctive_normal_form, and
+    dont_cares are row indices.
+    """
+    num_rows = 1 << num_operands
+    # maxterm j is row num_rows - j - 1 of the truth table
+    false_rows = [num_rows - maxterm - 1 for maxterm in reversed(maxterms)]
+    return minimise_sop(false_rows, num_operands, dont_cares, method)
+
+
+def _literal(operands: list, index: int, positive: bool) -> str:
+    return operands[index] if positive else f"!{operands[index]}"
+
+
+def sop_to_str(cubes: list, operands: list) -> str:
+    """Render the cubes of a sum of products as an infix expression."""
+    if len(cubes) == 0:
+        return "0"
+    products = list()
+    for cube in cubes:
+        literals = [
+            _literal(operands, index, cube.value >> (len(operands) - index - 1) & 1)
+            for index in range(len(operands))
+            if not cube.mask >> (len(operands) - index - 1) & 1
+        ]
+        products.append(" & ".join(literals) if len(literals) > 0 else "1")
+    return " | ".join(products)
+
+
+def pos_to_str(cubes: list, operands: list) -> str:
+    """Render the false row cubes of a product of sums as an infix expression."""
+    if len(cubes) == 0:
+        return "1"
+    sums = list()
+    for cube in cubes:
+        literals = [
+            _literal(operands, index, not cube.value >> (len(operands) - index - 1) & 1)
+            for index in range(len(operands))
+            if not cube.mask >> (len(operands) - index - 1) & 1
+        ]
+        if len(literals) == 0:
+            sums.append("0")
+        elif len(literals) == 1 or len(cubes) == 1:
+            sums.append(" | ".join(literals))
+        else:
+            sums.append(f"({' | '.join(literals)})")
+    return " & ".join(sums)
+
+
+def minimise(expr, form: str = "sop", method: str = "auto") -> str:
+    """Return a minimised infix expression equivalent to expr.
+
+    expr is an infix expression string or a list of postfix tokens, and form is
+    "sop" for a sum of products or "pos" for a product of sums.
+    """
+    postfix_tokens = _to_postfix(expr)
+    operands = Evaluator().get_operand_symbols(postfix_tokens)
+    if form == "sop":
+        minterms = principal_disjunctive_normal_form(postfix_tokens)
+        return sop_to_str(minimise_sop(minterms, len(operands), (), method), operands)
+    elif form == "pos":
+        maxterms = principal_conjunctive_normal_form(postfix_tokens)
+        return pos_to_str(minimise_pos(maxterms, len(operands), (), method), operands)
+    raise Exception(f"Unknown normal form {form}")
+
+
+if __name__ == "__main__":
+    infix_str = input("infix expression: ")
+    try:
+        print("minimal sum of products:", minimise(infix_str, "sop"))
+        print("minimal product of sums:", minimise(infix_str, "pos"))
+    except Exception as e:
+        print(e)
@@ -0,0 +1,118 @@
+"""Model counting and lazy model enumeration by partial evaluation.
+
+The expression is kept as a simplified syntax_tree.Node DAG (see the
+simplify module). Assigning an operand replaces it with a constant and folds
+the constants up the DAG: an `&` with a false operand or an `|` with a true
+one becomes a constant without looking at its other operand. Once the
+expression folds to a constant, every completion of the partial assignment
+is a model (True) or none is (False), so such subtrees of the search are
+never explored.
+"""
+
+from evaluator import Evaluator, _to_postfix
+from simplify import build, fold
+
+
+def restrict(root, name: str, value: bool):
+    """Return root with operand name replaced by value, folded."""
+    if root is True or root is False:
+        return root
+    results = dict()  # node -> restricted node, True or False
+    stack = [root]
+    while len(stack) > 0:
+        node = stack[-1]
+        if node in results:
+            stack.pop()
+        elif len(node.children) == 0:
+            results[node] = value if node.symbol == name else node
+            stack.pop()
+        else:
+            pending = [child for child in node.children if child not in results]
+            if len(pending) > 0:
+                stack.extend(pending)
+            else:
+                results[node] = fold(
+                    node.symbol, *(results[child] for child in node.children)
+                )
+                stack.pop()
+    return results[root]
+
+
+def count_models(expr) -> int:
+    """Return the number of satisfying assignments of the operands of expr.
+
+    expr is an infix expression string or a list of postfix tokens. Counts of
+    identical restricted subproblems are shared. Operands are assigned in
+    order of first appearance, which keeps related operands together.
+    """
+    postfix_tokens = _to_postfix(expr)
+    symbols = set(Evaluator().get_operand_symbols(postfix_tokens))
+    operands = list(
+        dict.fromkeys(token for token in postfix_tokens if token in symbols)
+    )
+    num_operands = len(operands)
+    counts = dict()  # (node, index of the next operand) -> number of models
+    cofactors = dict()
+    root = (build(postfix_tokens), 0)
+    stack = [root]
+    while len(stack) > 0:
+        key = stack[-1]
+        node, index = key
+        if key in counts:
+            stack.pop()
+            continue
+        if node is True or node is False:
+            counts[key] = (1 << (num_operands - index)) if node else 0
+            stack.pop()
+            continue
+        if key not in cofactors:
+            cofactors[key] = [
+                (restrict(node, operands[index], value), index + 1)
+                for value in (False, True)
+            ]
+        pending = [cofactor for cofactor in cofactors[key] if cofactor not in counts]
+        if len(pending) > 0:
+            stack.extend(pending)
+        else:
+            counts[key] = sum(counts[cofactor] for cofactor in cofactors.pop(key))
+            stack.pop()
+    return counts[root]
+
+
+def iter_model_indices(expr):
+    """Lazily yield the truth table row indices of the models of expr.
+
+    The indices are in increasing order, as principal_disjunctive_normal_form.
+    """
+    postfix_tokens = _to_postfix(expr)
+    operands = Evaluator().get_operand_symbols(postfix_tokens)
+    num_operands = len(operands)
+    # Each entry is a restricted expression, the number of assigned operands
+    # and their values as the high bits of the row index.
+    stack = [(build(postfix_tokens), 0, 0)]
+    while len(stack) > 0:
+        node, index, prefix = stack.pop()
+        if node is False:
+            continue
+        if node is True:
+            free = num_operands - index
+            yield from range(prefix << free, (prefix + 1) << free)
+            continue
+        name = operands[index]
+        # The false branch is popped, and yielded, first.
+        stack.append((restrict(node, name, True), index + 1, (prefix << 1) | 1))
+        stack.append((restrict(node, name, False), index + 1, prefix << 1))
+
+
+def iter_models(expr):
+    """Lazily yield the models of expr as dicts of operand symbols to bools.
+
+    Use itertools.islice to take the first k models.
+    """
+    postfix_tokens = _to_postfix(expr)
+    operands = Evaluator().get_operand_symbols(postfix_tokens)
+    for row in iter_model_indices(postfix_tokens):
+        yield {
+            name: bool(row >> (len(operands) - index - 1) & 1)
+            for index, name in enumerate(operands)
+        }
@@ -0,0 +1,388 @@
+"""Evaluate an expression over recorded observations, one column per operand.
+
+Row i of every column holds the value of its operand in observation i, and
+row i of the result is the value of the expression in that observation. A
+column is one of:
+
+- a NumPy bool array, one element per row,
+- a packed bitset, as a NumPy unsigned integer array or a Python int, where
+  bit i (least significant first, as in packed_table) is row i.
+
+The expression is evaluated once per operator over whole columns with the
+bit-sliced operators of the evaluator. NumPy is optional and only imported
+when it is used; without it, files are read into Python int bitsets.
+
+Files are read in chunks of rows. CSV files have a header of operand names
+and a 0 or 1 (or any constant of the evaluator) in every field; files whose
+fields are all single characters are sliced without parsing their rows.
+Binary observation files are little-endian:
+
+    offset  size  field
+    0       4     magic b"PCOB"
+    4       2     format version, 1
+    6       2     reserved, 0
+    8       4     number of columns k
+    12      4     length m of the column names
+    16      m     column names, UTF-8, separated by "\\n"
+    ...     ...   zero padding to a multiple of 8 bytes
+
+followed by chunks of an 8-byte row count r and k packed columns of
+ceil(r / 64) * 8 bytes each, with unused bits 0.
+
+Run `python observations.py expression file` to print the number of rows and
+true rows of expression over the observations in file, and
+`python observations.py -c file.csv file.pcob` to convert a CSV file to a
+binary observation file.
+"""
+
+from evaluator import FALSE_CONSTANTS, TRUE_CONSTANTS, Evaluator, _to_postfix
+from functools import lru_cache
+from packed_table import HEADER
+import argparse
+import csv
+import struct
+
+MAGIC = b"PCOB"
+VERSION = 1
+CHUNK_HEADER = struct.Struct("<Q")
+
+# Number of rows read from a CSV file at a time.
+CHUNK_ROWS = 1 << 20
+
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """Return the numpy module, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _use_numpy(use_numpy: bool = None):
+    numpy = _numpy()
+    if use_numpy and numpy is None:
+        raise Exception("NumPy is not installed")
+    return numpy if use_numpy is not False else None
+
+
+def evaluate_columns(expr, columns: dict, num_rows: int = None):
+    """Evaluate expr over columns of observations and return the result column.
+
+    expr is an infix expression string or a list of postfix tokens, and
+    columns maps every operand symbol of expr (see
+    Evaluator.get_operand_symbols) to a column; other columns are ignored.
+    The result is a new column of the same kind as the columns, or a Python
+    int if there are none. num_rows is required for Python ints and counts
+    the rows of packed NumPy arrays that are not full; bits past it are 0 in
+    the result, whatever they are in the columns.
+    """
+    postfix_tokens = _to_postfix(expr)
+    evaluator = Evaluator()
+    operands = evaluator.get_operand_symbols(postfix_tokens)
+    missing = [name for name in operands if name not in columns]
+    if len(missing) > 0:
+        raise Exception(f"No column for operands {missing}")
+    vectors = {name: columns[name] for name in operands}
+    # The kind of the result is that of the columns, even if expr has no
+    # operands.
+    sample = next(iter(vectors.values()), next(iter(columns.values()), None))
+    if sample is None or isinstance(sample, int):
+        if num_rows is None:
+            raise Exception("num_rows is required for Python int columns")
+        mask = (1 << num_rows) - 1
+        return evaluator.evaluate_bitwise(postfix_tokens, vectors, mask) & mask
+    numpy = _numpy()
+    if sample.dtype == numpy.bool_:
+        result = evaluator.evaluate_bitwise(
+            postfix_tokens, vectors, numpy.True_, numpy.False_
+        )
+        if numpy.ndim(result) == 0:  # a constant
+            return numpy.full(sample.shape, bool(result))
+        if any(result is column for column in vectors.values()):  # an operand
+            return result.copy()
+        return result
+    mask = numpy.full_like(sample, numpy.iinfo(sample.dtype).max)
+    word_bits = 8 * sample.dtype.itemsize
+    if num_rows is not None and num_rows < len(sample) * word_bits:
+        mask[num_rows // word_bits :] = 0
+        if num_rows % word_bits > 0:
+            mask[num_rows // word_bits] = (1 << (num_rows % word_bits)) - 1
+    result = evaluator.evaluate_bitwise(
+        postfix_tokens, vectors, mask, numpy.zeros_like(mask)
+    )
+    return result & mask
+
+
+def count_true(column) -> int:
+    """Return the number of true rows of a column."""
+    if isinstance(column, int):
+        return column.bit_count()
+    numpy = _numpy()
+    if column.dtype == numpy.bool_:
+        return int(numpy.count_nonzero(column))
+    return int(numpy.unpackbits(column.view(numpy.uint8)).sum(dtype=numpy.int64))
+
+
+def _bits_to_int(bits: bytes) -> int:
+    """Return the bitset of a string of b"0" and b"1" characters, one per row."""
+    return int(bits[::-1], 2) if len(bits) > 0 else 0
+
+
+def _parse_rows(lines: list, header: list, names: list, numpy) -> tuple:
+    """Parse CSV lines of any format into the columns of names.
+
+    Return the columns and the number of rows; blank lines are skipped.
+    """
+    indices = [header.index(name) for name in names]
+    bits = [bytearray() for _ in names]
+    num_rows = 0
+    for row in csv.reader(line.decode() for line in lines):
+        if len(row) == 0:
+            continue
+        num_rows += 1
+        if len(row) != len(header):
+            raise Exception(f"Expect {len(header)} fields but found {len(row)}")
+        for column, index in zip(bits, indices):
+            value = row[index].strip()
+            if value in TRUE_CONSTANTS:
+                column.append(ord("1"))
+            elif value in FALSE_CONSTANTS:
+                column.append(ord("0"))
+            else:
+                raise Exception(f"Invalid value {value!r} of column {header[index]}")
+    if numpy is not None:
+        columns = {
+            name: numpy.frombuffer(column, numpy.uint8) == ord("1")
+            for name, column in zip(names, bits)
+        }
+    else:
+        columns = {name: _bits_to_int(column) for name, column in zip(names, bits)}
+    return columns, num_rows
+
+
+def _slice_rows(block: bytes, header: list, names: list, numpy) -> dict:
+    """Slice lines of single-character fields, such as 0,1,1\\n, into columns.
+
+    Return None if block is not in that format.
+    """
+    width = 2 * len(header)
+    num_rows = len(block) // width
+    if len(block) != num_rows * width:
+        return None
+    if numpy is not None:
+        matrix = numpy.frombuffer(block, numpy.uint8).reshape(num_rows, width)
+        separators = numpy.frombuffer(b"," * (len(header) - 1) + b"\n", numpy.uint8)
+        if not (matrix[:, 1::2] == separators).all():
+            return None
+        values = matrix[:, 0::2]
+        if not ((values | 1) == ord("1")).all():
+            return None
+        return {name: values[:, header.index(name)] == ord("1") for name in names}
+    for index in range(1, width, 2):
+        separator = b"\n" if index == width - 1 else b","
+        if block[index::width] != separator * num_rows:
+            return None
+    columns = dict()
+    for name in names:
+        bits = block[2 * header.index(name) :: width]
+        if len(bits.translate(None, b"01")) > 0:
+            return None
+        columns[name] = _bits_to_int(bits)
+    return columns
+
+
+def _parse_header(line: bytes) -> list:
+    return [name.strip() for name in next(csv.reader([line.decode()]), [])]
+
+
+def read_csv_chunks(
+    file,
+    names: list = None,
+    chunk_rows: int = CHUNK_ROWS,
+    use_numpy: bool = None,
+    header: list = None,
+):
+    """Yield (columns, num_rows) for consecutive chunks of a binary CSV file.
+
+    columns maps the names (by default all columns of the header) to NumPy
+    bool arrays, or Python int bitsets if use_numpy is false or NumPy is not
+    installed. header is read from the first line unless it is given.
+    """
+    if chunk_rows < 1:
+        raise Exception("chunk_rows must be a positive integer")
+    numpy = _use_numpy(use_numpy)
+    if header is None:
+        header = _parse_header(file.readline())
+    names = header if names is None else names
+    missing = [name for name in names if name not in header]
+    if len(missing) > 0:
+        raise Exception(f"No column for operands {missing}")
+    # chunk_rows rows of single-character fields, and the rest of the line.
+    block_size = 2 * len(header) * chunk_rows
+    while True:
+        block = file.read(block_size)
+        if len(block) == 0:
+            break
+        if not block.endswith(b"\n"):
+            block += file.readline()
+            if not block.endswith(b"\n"):
+                block += b"\n"
+        columns = _slice_rows(block, header, names, numpy)
+        if columns is not None:
+            yield columns, len(block) // (2 * len(header))
+        else:
+            yield _parse_rows(block.splitlines(), header, names, numpy)
+
+
+def write_binary_header(file, names: list) -> None:
+    encoded_names = "\n".join(names).encode()
+    header = HEADER.pack(MAGIC, VERSION, 0, len(names), len(encoded_names))
+    header += encoded_names
+    file.write(header + bytes(-len(header) % 8))
+
+
+def write_binary_chunk(file, columns: list, num_rows: int) -> None:
+    """Write a chunk of bool NumPy arrays or int bitsets, in header order."""
+    num_bytes = (num_rows + 63) // 64 * 8
+    file.write(CHUNK_HEADER.pack(num_rows))
+    for column in columns:
+        if isinstance(column, int):
+            file.write(column.to_bytes(num_bytes, "little"))
+        else:
+            packed = _numpy().packbits(column, bitorder="little").tobytes()
+            file.write(packed + bytes(num_bytes - len(packed)))
+
+
+def read_binary_chunks(file, names: list = None, use_numpy: bool = None):
+    """Yield (columns, num_rows) for the chunks of a binary observation file.
+
+    columns maps the names (by default all columns) to packed NumPy uint64
+    arrays, or Python int bitsets if use_numpy is false or NumPy is not
+    installed.
+    """
+    numpy = _use_numpy(use_numpy)
+    fields = file.read(HEADER.size)
+    if len(fields) != HEADER.size or fields[: len(MAGIC)] != MAGIC:
+        raise Exception("Not a binary observation file")
+    magic, version, _, num_columns, names_length = HEADER.unpack(fields)
+    if version != VERSION:
+        raise Exception(f"Unsupported observation format version {version}")
+    encoded_names = file.read(names_length)
+    padding_length = -(HEADER.size + names_length) % 8
+    if len(encoded_names) + len(file.read(padding_length)) != (
+        names_length + padding_length
+    ):
+        raise Exception("Truncated observation file")
+    header = encoded_names.decode().split("\n") if num_columns > 0 else []
+    names = header if names is None else names
+    missing = [name for name in names if name not in header]
+    if len(missing) > 0:
+        raise Exception(f"No column for operands {missing}")
+    while True:
+        chunk_header = file.read(CHUNK_HEADER.size)
+        if len(chunk_header) == 0:
+            break
+        if len(chunk_header) != CHUNK_HEADER.size:
+            raise Exception("Truncated observation file")
+        (num_rows,) = CHUNK_HEADER.unpack(chunk_header)
+        num_words = (num_rows + 63) // 64
+        columns = dict()
+        for name in header:
+            data = file.read(8 * num_words)
+            if len(data) != 8 * num_words:
+                raise Exception("Truncated observation file")
+            if numpy is not None:
+                column = numpy.frombuffer(data, "<u8")
+            else:
+                column = int.from_bytes(data, "little")
+            if name in names:
+                columns[name] = column
+        yield columns, num_rows
+
+
+def read_chunks(
+    file, names: list = None, chunk_rows: int = CHUNK_ROWS, use_numpy: bool = None
+):
+    """Yield (columns, num_rows) for a binary observation or CSV file object.
+
+    The format is detected from the first bytes, so file must support either
+    peek, as buffered files do, or seek.
+    """
+    if hasattr(file, "peek"):
+        magic = file.peek(len(MAGIC))[: len(MAGIC)]
+    else:
+        position = file.tell()
+        magic = file.read(len(MAGIC))
+        file.seek(position)
+    if magic == MAGIC:
+        return read_binary_chunks(file, names, use_numpy)
+    return read_csv_chunks(file, names, chunk_rows, use_numpy)
+
+
+def convert_csv(
+    input, output, chunk_rows: int = CHUNK_ROWS, use_numpy: bool = None
+) -> None:
+    """Convert a binary CSV file object to a binary observation file object."""
+    if chunk_rows < 1:
+        raise Exception("chunk_rows must be a positive integer")
+    header = _parse_header(input.readline())
+    write_binary_header(output, header)
+    for columns, num_rows in read_csv_chunks(
+        input, header, chunk_rows, use_numpy, header
+    ):
+        write_binary_chunk(output, [columns[name] for name in header], num_rows)
+
+
+def evaluate_file(expr, file, chunk_rows: int = CHUNK_ROWS, use_numpy: bool = None):
+    """Yield (result column, num_rows) for each chunk of observations in file.
+
+    file is a binary file object of a CSV or binary observation file.
+    """
+    postfix_tokens = _to_postfix(expr)
+    names = Evaluator().get_operand_symbols(postfix_tokens)
+    for columns, num_rows in read_chunks(file, names, chunk_rows, use_numpy):
+        yield evaluate_columns(postfix_tokens, columns, num_rows), num_rows
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    argument_parser.add_argument(
+        "arguments", nargs=2, metavar="expression|file.csv file", help=argparse.SUPPRESS
+    )
+    argument_parser.add_argument(
+        "-c", "--convert", action="store_true", help="convert a CSV file to binary"
+    )
+    argument_parser.add_argument(
+        "-n",
+        "--chunk-rows",
+        type=int,
+        default=CHUNK_ROWS,
+        help=f"number of rows read at a time (default: {CHUNK_ROWS})",
+    )
+    argument_parser.add_argument(
+        "--no-numpy", action="store_true", help="use Python int bitsets"
+    )
+    args = argument_parser.parse_args()
+    if args.chunk_rows < 1:
+        argument_parser.error("--chunk-rows must be a positive integer")
+    use_numpy = False if args.no_numpy else None
+    if args.convert:
+        with open(args.arguments[0], "rb") as input:
+            with open(args.arguments[1], "wb") as output:
+                convert_csv(input, output, args.chunk_rows, use_numpy)
+    else:
+        expression, path = args.arguments
+        total_rows = 0
+        total_true = 0
+        with open(path, "rb") as file:
+            for result, num_rows in evaluate_file(
+                expression, file, args.chunk_rows, use_numpy
+            ):
+                total_rows += num_rows
+                total_true += count_true(result)
+        print(f"rows: {total_rows}")
+        print(f"true rows: {total_true}")
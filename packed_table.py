@@ -0,0 +1,191 @@
+"""Compact truth tables: packed result bits, with operand columns computed on demand.
+
+Row i of a truth table over n operands assigns to operand k the bit
+n - k - 1 of i (the first operand is the most significant bit), so only the
+result column is stored, one bit per row.
+
+File format, all integers little-endian:
+
+    offset  size  field
+    0       4     magic b"PCTT"
+    4       2     format version, 1
+    6       2     reserved, 0
+    8       4     number of operands n
+    12      4     length m of the operand names
+    16      m     operand names, UTF-8, separated by "\\n"
+    ...     ...   zero padding to a multiple of 8 bytes
+    d       r     result bits, r = ceil(2 ** n / 8) bytes
+
+Bit i % 8 (least significant first) of byte d + i // 8 is the result of row
+i, and unused bits of the last byte are 0. The header only depends on the
+operands, so the result bits can be appended as they are computed.
+
+Run `python packed_table.py expression file` to write the truth table of
+expression, and `python packed_table.py file [-r i ...]` to print the number
+of true rows and the given rows of a table file.
+"""
+
+from evaluator import Evaluator, _to_postfix
+import argparse
+import mmap
+import struct
+
+MAGIC = b"PCTT"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+
+
+class PackedTruthTable(object):
+    """A truth table held as its operands and packed result bits.
+
+    bits is a bytes-like object such as a bytearray, or a memoryview of a
+    memory-mapped table file as returned by open_truth_table.
+    """
+
+    def __init__(self, operands: list, bits) -> None:
+        super().__init__()
+        self.operands = list(operands)
+        self.num_rows = 1 << len(self.operands)
+        self.bits = memoryview(bits)
+        if len(self.bits) != (self.num_rows + 7) >> 3:
+            raise Exception(
+                f"Expect {(self.num_rows + 7) >> 3} bytes of results "
+                f"but found {len(self.bits)} instead"
+            )
+        self._mmap = None
+
+    @classmethod
+    def from_expression(cls, expr) -> "PackedTruthTable":
+        """Evaluate an infix expression string or a list of postfix tokens."""
+        postfix_tokens = _to_postfix(expr)
+        evaluator = Evaluator()
+        operands = evaluator.get_operand_symbols(postfix_tokens)
+        bits = bytearray()
+        for offset, length, result in evaluator.iter_result_bitmasks(postfix_tokens):
+            bits += result.to_bytes((length + 7) >> 3, "little")
+        return cls(operands, bits)
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    def __enter__(self) -> "PackedTruthTable":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Unmap the file of a table returned by open_truth_table."""
+        self.bits.release()
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def result(self, index: int) -> int:
+        if not 0 <= index < self.num_rows:
+            raise IndexError(f"row {index} out of range")
+        return (self.bits[index >> 3] >> (index & 7)) & 1
+
+    def value(self, index: int, operand: int) -> int:
+        """Return the value of the operand-th operand in row index."""
+        return (index >> (len(self.operands) - operand - 1)) & 1
+
+    def row(self, index: int) -> list:
+        """Return row index as in Evaluator.get_truth_table."""
+        row = [self.value(index, operand) for operand in range(len(self.operands))]
+        row.append(self.result(index))
+        return row
+
+    def __iter__(self):
+        for index in range(self.num_rows):
+            yield self.row(index)
+
+    def count_true(self, chunk_size: int = 1 << 20) -> int:
+        """Return the number of true rows, reading chunk_size bytes at a time."""
+        count = 0
+        for start in range(0, len(self.bits), chunk_size):
+            chunk = self.bits[start : start + chunk_size]
+            count += int.from_bytes(chunk, "little").bit_count()
+        return count
+
+    def write(self, file) -> None:
+        """Write the table to a binary file object."""
+        write_header(file, self.operands)
+        file.write(self.bits)
+
+
+def write_header(file, operands: list) -> None:
+    names = "\n".join(operands).encode()
+    header = HEADER.pack(MAGIC, VERSION, 0, len(operands), len(names)) + names
+    file.write(header + bytes(-len(header) % 8))
+
+
+def write_truth_table(expr, file) -> int:
+    """Write the truth table of expr to a binary file object, block by block.
+
+    expr is an infix expression string or a list of postfix tokens. Memory does
+    not depend on the number of operands. Return the number of true rows.
+    """
+    postfix_tokens = _to_postfix(expr)
+    evaluator = Evaluator()
+    write_header(file, evaluator.get_operand_symbols(postfix_tokens))
+    count = 0
+    for offset, length, result in evaluator.iter_result_bitmasks(postfix_tokens):
+        # Blocks other than the last one are a multiple of 8 rows long.
+        file.write(result.to_bytes((length + 7) >> 3, "little"))
+        count += result.bit_count()
+    return count
+
+
+def open_truth_table(path: str) -> PackedTruthTable:
+    """Memory-map a table file without reading its result bits.
+
+    Close the table when done, or use it as a context manager.
+    """
+    with open(path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        if len(mapping) < HEADER.size:
+            raise Exception(f"{path} is not a truth table file")
+        magic, version, _, num_operands, names_length = HEADER.unpack_from(mapping)
+        if magic != MAGIC:
+            raise Exception(f"{path} is not a truth table file")
+        if version != VERSION:
+            raise Exception(f"Unsupported truth table format version {version}")
+        names = bytes(mapping[HEADER.size : HEADER.size + names_length]).decode()
+        operands = names.split("\n") if num_operands > 0 else list()
+        data_offset = HEADER.size + names_length
+        data_offset += -data_offset % 8
+        num_bytes = ((1 << num_operands) + 7) >> 3
+        view = memoryview(mapping)[data_offset : data_offset + num_bytes]
+        table = PackedTruthTable(operands, view)
+        view.release()
+    except BaseException:
+        mapping.close()
+        raise
+    table._mmap = mapping
+    return table
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    argument_parser.add_argument(
+        "arguments", nargs="+", metavar="[expression] file", help=argparse.SUPPRESS
+    )
+    argument_parser.add_argument(
+        "-r", "--row", type=int, action="append", default=list(), help="row to print"
+    )
+    args = argument_parser.parse_args()
+    if len(args.arguments) == 2:
+        expression, path = args.arguments
+        with open(path, "wb") as file:
+            count = write_truth_table(expression, file)
+        print(f"true rows: {count}")
+    else:
+        with open_truth_table(args.arguments[0]) as table:
+            print(f"operands: {' '.join(table.operands)}")
+            print(f"true rows: {table.count_true()} of {table.num_rows}")
+            for index in args.row:
+                print(f"row {index}: {table.row(index)}")
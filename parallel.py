@@ -0,0 +1,205 @@
+"""Sharded, multi-process computation of principal normal forms.
+
+The rows of the truth table are split into shards of consecutive indices. Each
+shard is evaluated on its own, in a process of a ProcessPoolExecutor or on
+another machine, and returns its minterms compressed into half-open runs of
+consecutive true rows. Merging the runs of all shards gives the same indices
+as the serial functions of the evaluator module.
+
+Run `python parallel.py [-w workers] expression` to compute the normal forms
+on this machine, `python parallel.py --shard i/N expression > shard_i.json` to
+compute shard i (counted from 0) of N, and `python parallel.py --merge
+shard_*.json` to merge the shards written by the latter.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from evaluator import BLOCK_BITS, Evaluator, _iter_result_runs, _to_postfix
+from itertools import repeat
+import argparse
+import json
+import os
+import sys
+
+
+def parse_shard(spec: str) -> tuple:
+    """Return the (index, count) of a shard spec "i/N", where 0 <= i < N."""
+    try:
+        index, count = map(int, spec.split("/"))
+    except ValueError:
+        raise Exception(f"Invalid shard {spec}, expect i/N") from None
+    if not 0 <= index < count:
+        raise Exception(f"Invalid shard {spec}, expect 0 <= i < N")
+    return index, count
+
+
+def shard_range(num_operands: int, index: int, count: int) -> tuple:
+    """Return the rows [start, stop) of shard index of count.
+
+    Shards are made of whole blocks of the bit-sliced evaluator, and differ by
+    at most one block in size.
+    """
+    block_bits = min(num_operands, BLOCK_BITS)
+    num_blocks = 1 << (num_operands - block_bits)
+    start = (num_blocks * index // count) << block_bits
+    stop = (num_blocks * (index + 1) // count) << block_bits
+    return start, stop
+
+
+def evaluate_shard(postfix_tokens: list, index: int, count: int) -> dict:
+    """Return the runs of true rows of shard index of count.
+
+    The result is JSON serializable, with the operands, the row range of the
+    shard and its (start, stop) runs.
+    """
+    operands = Evaluator().get_operand_symbols(postfix_tokens)
+    start, stop = shard_range(len(operands), index, count)
+    return {
+        "operands": operands,
+        "shard": [index, count],
+        "start": start,
+        "stop": stop,
+        "runs": list(_iter_result_runs(postfix_tokens, "1", start, stop)),
+    }
+
+
+def merge_shards(shards: list) -> tuple:
+    """Merge the results of evaluate_shard covering all rows.
+
+    Return the operands and the runs of true rows of the whole truth table.
+    """
+    shards = sorted(shards, key=lambda shard: (shard["start"], shard["stop"]))
+    operands = shards[0]["operands"] if len(shards) > 0 else None
+    num_rows = 1 << len(operands) if operands is not None else 0
+    runs = list()
+    position = 0
+    for shard in shards:
+        if shard["operands"] != operands:
+            raise Exception("Shards of different expressions")
+        if shard["start"] != position:
+            raise Exception(f"Missing rows [{position}, {shard['start']})")
+        position = shard["stop"]
+        for start, stop in shard["runs"]:
+            # Runs that cross a shard boundary are split by the shards.
+            if len(runs) > 0 and runs[-1][1] == start:
+                runs[-1] = (runs[-1][0], stop)
+            else:
+                runs.append((start, stop))
+    if position != num_rows:
+        raise Exception(f"Missing rows [{position}, {num_rows})")
+    return operands, runs
+
+
+def get_true_runs(expr, workers: int = None, num_shards: int = None) -> tuple:
+    """Return the operands and the runs of true rows of expr.
+
+    expr is an infix expression string or a list of postfix tokens. The rows
+    are split into num_shards shards (by default 4 per worker, to balance the
+    load) evaluated by workers processes, or in this process if workers == 0.
+    """
+    postfix_tokens = _to_postfix(expr)
+    if workers == 0:
+        return merge_shards([evaluate_shard(postfix_tokens, 0, 1)])
+    workers = workers or os.cpu_count()
+    num_shards = num_shards or 4 * workers
+    with ProcessPoolExecutor(workers) as executor:
+        shards = executor.map(
+            evaluate_shard,
+            repeat(postfix_tokens),
+            range(num_shards),
+            repeat(num_shards),
+        )
+        return merge_shards(list(shards))
+
+
+def runs_to_normal_forms(operands: list, runs: list, ranges: bool = False) -> tuple:
+    """Return the PDNF and PCNF indices of the runs of true rows.
+
+    The indices are the same as principal_disjunctive_normal_form and
+    principal_conjunctive_normal_form of the evaluator module.
+    """
+    num_rows = 1 << len(operands)
+    false_runs = list()
+    position = 0
+    for start, stop in runs + [(num_rows, num_rows)]:
+        if position < start:
+            false_runs.append((position, start))
+        position = stop
+    # row i of the truth table is maxterm num_rows - i - 1
+    maxterm_runs = [(num_rows - stop, num_rows - start) for start, stop in false_runs]
+    maxterm_runs.reverse()
+    if ranges:
+        return runs, maxterm_runs
+    return (
+        [index for start, stop in runs for index in range(start, stop)],
+        [index for start, stop in maxterm_runs for index in range(start, stop)],
+    )
+
+
+def principal_disjunctive_normal_form(
+    expr, ranges: bool = False, workers: int = None, num_shards: int = None
+) -> list:
+    """Parallel evaluator.principal_disjunctive_normal_form."""
+    operands, runs = get_true_runs(expr, workers, num_shards)
+    return runs_to_normal_forms(operands, runs, ranges)[0]
+
+
+def principal_conjunctive_normal_form(
+    expr, ranges: bool = False, workers: int = None, num_shards: int = None
+) -> list:
+    """Parallel evaluator.principal_conjunctive_normal_form."""
+    operands, runs = get_true_runs(expr, workers, num_shards)
+    return runs_to_normal_forms(operands, runs, ranges)[1]
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__)
+    argument_parser.add_argument("expression", nargs="?", help="infix expression")
+    argument_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes, 0 to run in this process "
+        "(default: CPU count)",
+    )
+    argument_parser.add_argument(
+        "-n",
+        "--num-shards",
+        type=int,
+        default=None,
+        help="number of shards (default: 4 per worker)",
+    )
+    argument_parser.add_argument(
+        "-s", "--shard", help="only evaluate shard i/N and write it as JSON"
+    )
+    argument_parser.add_argument(
+        "-m",
+        "--merge",
+        nargs="+",
+        metavar="FILE",
+        help="merge the shards written by --shard",
+    )
+    argument_parser.add_argument(
+        "-r", "--ranges", action="store_true", help="print the indices as ranges"
+    )
+    args = argument_parser.parse_args()
+    if args.expression is None and (args.merge is None or args.shard is not None):
+        argument_parser.error("an expression is required, unless --merge is given")
+    if args.shard is not None:
+        index, count = parse_shard(args.shard)
+        json.dump(
+            evaluate_shard(_to_postfix(args.expression), index, count), sys.stdout
+        )
+        sys.exit()
+    if args.merge is not None:
+        shards = list()
+        for path in args.merge:
+            with open(path) as file:
+                shards.append(json.load(file))
+        operands, runs = merge_shards(shards)
+    else:
+        operands, runs = get_true_runs(args.expression, args.workers, args.num_shards)
+    pdnf, pcnf = runs_to_normal_forms(operands, runs, args.ranges)
+    print(f"operands: {' '.join(operands)}")
+    print(f"principal disjunctive normal form: {pdnf}")
+    print(f"principal conjunctive normal form: {pcnf}")
@@ -1,88 +1,457 @@
+from array import array
 from collections import namedtuple
+from functools import lru_cache
+from itertools import repeat
+from operator import attrgetter
+import codecs
+import marshal
+import os
 import re
 import sys
 import grammar
 
 Token = namedtuple(
-    typename="Token", field_names=["symbol", "value"], defaults=[None, None]
+    typename="Token",
+    field_names=["symbol", "value", "pos"],
+    defaults=[None, None, None],
 )
 
 Step = namedtuple(
     typename="Step", field_names=["state", "token"], defaults=[None, None]
 )
 
+EOF = Token(symbol="$", value="EOF")
+
+
+class ParseError(Exception):
+    """An illegal character or a syntax error at position pos of the input."""
+
+    def __init__(self, message: str, pos: int = None) -> None:
+        super().__init__(message)
+        self.pos = pos
+
+
+Tables = namedtuple(
+    typename="Tables",
+    field_names=["symbol_ids", "width", "actions", "reductions", "expectations"],
+)
+
+
+def pack_tables(transition_table: dict, rules: dict) -> Tables:
+    """Pack the LR tables into a flat integer array.
+
+    Symbols are numbered in symbol_ids, and the row of state s starts at
+    s * width. The action of symbol in the state whose row starts at row is
+    actions[row + symbol_ids[symbol]], encoded as:
+
+    - row + 1 to shift and go to the state whose row starts at row,
+    - -(r + 1) to reduce using rule r, where -1 (rule 0) means terminate,
+    - 0 for a syntax error.
+
+    Shifting a nonterminal is the goto. reductions[r] is the number of symbols
+    of the body and the id of the head of rule r.
+    """
+    symbol_ids = dict()
+    for expectation in transition_table.values():
+        for symbol in expectation:
+            symbol_ids.setdefault(symbol, len(symbol_ids))
+    for rule in rules.values():
+        symbol_ids.setdefault(rule.head, len(symbol_ids))
+    # Unknown symbols are mapped to "error", whose column is all errors.
+    symbol_ids.setdefault("error", len(symbol_ids))
+    width = len(symbol_ids)
+    actions = array("i", bytes(4 * len(transition_table) * width))
+    expectations = list()
+    for state, expectation in sorted(transition_table.items()):
+        for symbol, action in expectation.items():
+            if action[0] == "s":
+                code = action[1] * width + 1
+            elif action[0] == "r":
+                code = -(action[1] + 1)
+            else:  # action[0] == "t"
+                code = -1
+            actions[state * width + symbol_ids[symbol]] = code
+        expectations.append(list(expectation.keys()))
+    reductions = [
+        (len(rules[number].body), symbol_ids[rules[number].head])
+        for number in range(len(rules))
+    ]
+    return Tables(symbol_ids, width, actions, reductions, expectations)
+
+
+# Changed whenever the cached fields of Tables change.
+TABLES_CACHE_VERSION = 1
+
+
+def load_tables(cache_path: str = None) -> Tables:
+    """Return the packed tables of the grammar, using a cache file if given.
+
+    The cache is a marshal file, written if it is missing or was written for
+    another version of grammar.py, and reused otherwise.
+    """
+    if cache_path is None:
+        return pack_tables(grammar.transition_table, grammar.rules)
+    grammar_stat = os.stat(grammar.__file__)
+    key = (TABLES_CACHE_VERSION, grammar_stat.st_mtime_ns, grammar_stat.st_size)
+    try:
+        with open(cache_path, "rb") as file:
+            cached_key, fields = marshal.load(file)
+        if cached_key == key:
+            symbol_ids, width, actions, reductions, expectations = fields
+            return Tables(
+                symbol_ids, width, array("i", actions), reductions, expectations
+            )
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    tables = pack_tables(grammar.transition_table, grammar.rules)
+    fields = (
+        tables.symbol_ids,
+        tables.width,
+        tables.actions.tobytes(),
+        tables.reductions,
+        tables.expectations,
+    )
+    # Write to a temporary file first, so that concurrent processes never
+    # read a truncated cache.
+    temporary_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary_path, "wb") as file:
+            marshal.dump((key, fields), file)
+        os.replace(temporary_path, cache_path)
+    except OSError:
+        pass
+    return tables
+
+
+# The tables are cached in the file named by this environment variable, if set.
+TABLES = load_tables(os.environ.get("PROPOSITIONAL_CALCULUS_TABLES_CACHE"))
+
+Lexer = namedtuple(
+    typename="Lexer", field_names=["symbols", "master_pattern", "group_kinds"]
+)
+
+
+def build_lexer(tokens: dict) -> Lexer:
+    """Combine the token patterns into one master pattern.
+
+    The patterns are tried in the same order as tokens. Ignored characters
+    are consumed as a prefix of the next token, and the last alternatives
+    report any other character as illegal and match the end of input.
+    """
+    symbols = tuple(tokens.keys())  # token kind -> symbol
+    master_pattern = re.compile(
+        f"(?:{tokens['ignore']})?(?:"
+        + "|".join(
+            f"(?P<T{kind}>{pattern})"
+            for kind, pattern in enumerate(tokens.values())
+            if symbols[kind] != "ignore"
+        )
+        + "|(?P<error>.)|\\Z)",
+        re.DOTALL,
+    )
+    group_kinds = [None] * (master_pattern.groups + 1)
+    for name, index in master_pattern.groupindex.items():
+        group_kinds[index] = -1 if name == "error" else int(name[1:])
+    return Lexer(symbols, master_pattern, tuple(group_kinds))
+
+
+# Shared by all parsers, so that creating a Parser compiles nothing.
+LEXER = build_lexer(grammar.tokens)
+
+
+@lru_cache(maxsize=None)
+def _token_patterns() -> dict:
+    return {key: re.compile(value) for key, value in grammar.tokens.items()}
+
 
 class Parser:
     def __init__(self) -> None:
-        self.tokens = dict()
         self.rules = grammar.rules
-        for key, value in grammar.tokens.items():
-            self.tokens[key] = re.compile(value)
         self.transition_table = grammar.transition_table
+        self.tables = TABLES
+        self.lexer = LEXER
+        self.symbols = LEXER.symbols
+        self.master_pattern = LEXER.master_pattern
+        self.group_kinds = LEXER.group_kinds
+
+    @property
+    def tokens(self) -> dict:
+        """The compiled pattern of each token, compiled on first use."""
+        return _token_patterns()
+
+    def scan(self, input: str) -> array:
+        """Return the tokens of input as flat (kind, start, end) triples.
+
+        kind indexes self.symbols and the lexeme of a token is input[start:end].
+        Ignored characters are skipped.
+        """
+        spans = array("q")
+        group_kinds = self.group_kinds
+        for match in self.master_pattern.finditer(input):
+            index = match.lastindex
+            if index is None:  # end of input
+                break
+            kind = group_kinds[index]
+            if kind < 0:
+                raise ParseError(
+                    f"Illegal character {match.group(index)}", match.start(index)
+                )
+            spans.extend((kind, match.start(index), match.end(index)))
+        return spans
 
     def tokenize(self, input: str) -> list:
-        pos = 0
-        tokens = []
-        while pos < len(input):
-            for key, value in self.tokens.items():
-                match = value.match(input, pos)
-                if match is not None:
-                    pos = match.end()
-                    if key != "ignore":
-                        tokens.append(Token(symbol=key, value=match.group()))
-                    break
-            else:
-                raise Exception(f"Illegal character {input[pos]}")
-        tokens.append(Token(symbol="$", value="EOF"))
+        spans = self.scan(input)
+        starts = spans[1::3]
+        values = map(input.__getitem__, map(slice, starts, spans[2::3]))
+        symbols = map(self.symbols.__getitem__, spans[0::3])
+        tokens = list(map(Token, symbols, values, starts))
+        tokens.append(Token(symbol="$", value="EOF", pos=len(input)))
         return tokens
 
-    def parse(self, tokens: list, debug: bool = False, debug_file=sys.stderr):
-        tokens.reverse()
-        stack = [Step(state=0)]
-        while len(tokens) > 0:
-            token = tokens[-1]
-            state = stack[-1].state
-            expectation = self.transition_table[state]
-            if debug:
-                print(f"State  : {state}", file=debug_file)
-                print(f"Stack  : {stack} . {token}", file=debug_file)
-            if token.symbol in expectation:
-                action = expectation[token.symbol]
-                if action[0] == "s":  # shift and go to state action[1]
-                    tokens.pop()
-                    stack.append(Step(state=action[1], token=token))
-                    state = action[1]
-                    if debug:
-                        print(
-                            f"Action : Shift and goto state {action[1]}",
-                            file=debug_file,
-                        )
-                elif action[0] == "r":  # reduce using rule action[1]
-                    rule = self.rules[action[1]]
-                    p = [None]
-                    for i in range(-len(rule.body), 0):
-                        p.append(stack[i].token.value)
-                    del stack[-len(rule.body) :]
-                    state = stack[-1].state
-                    if rule.method is not None:
-                        rule.method(p)
-                    tokens.append(Token(symbol=rule.head, value=p[0]))
-                    if debug:
-                        print(
-                            f"Action : Reduce rule [{rule.head} -> {' '.join(rule.body)}] with {p[1:]}",
-                            file=debug_file,
-                        )
-                elif action[0] == "t":  # terminate
-                    assert len(tokens) == 1
-                    assert tokens[0].symbol == "$"
-                    assert len(stack) == 2
-                    return stack[1].token.value
-                else:
-                    assert False
-            else:
-                raise Exception(
-                    f"Expect {list(expectation.keys())} but found {token.value} instead"
+    def parse(
+        self,
+        tokens: list,
+        debug: bool = False,
+        debug_file=sys.stderr,
+        observer: "ParseObserver" = None,
+    ) -> list:
+        """Parse infix tokens and return the postfix tokens."""
+        return list(self.parse_tree(tokens, debug, debug_file, observer).postfix())
+
+    def parse_tree(
+        self,
+        tokens: list,
+        debug: bool = False,
+        debug_file=sys.stderr,
+        observer: "ParseObserver" = None,
+    ):
+        """Parse infix tokens and return the root syntax_tree.Node of the expression.
+
+        tokens is not modified. The events of the parse are sent to observer;
+        debug=True is a shorthand for a DebugObserver printing to debug_file
+        if no observer is given.
+        """
+        tables = self.tables
+        rules = self.rules
+        if len(tokens) == 0 or tokens[-1].symbol != "$":
+            tokens = tokens + [EOF]
+        if debug and observer is None:
+            observer = DebugObserver(debug_file)
+        if observer is not None:
+            observer.begin(tokens)
+        error = tables.symbol_ids["error"]
+        symbols = list(
+            map(tables.symbol_ids.get, map(attrgetter("symbol"), tokens), repeat(error))
+        )
+        rows = [0]  # row offsets of the states on the stack
+        values = [None]
+        for symbol, token in zip(symbols, tokens):
+            root = _push_token(tables, rules, rows, values, symbol, token, observer)
+            if root is not None:
+                return root
+
+
+def _push_token(
+    tables: Tables,
+    rules: dict,
+    rows: list,
+    values: list,
+    symbol: int,
+    token: Token,
+    observer: "ParseObserver" = None,
+):
+    """Run the LR actions on token until it is shifted or the input accepted.
+
+    rows and values are the parse stack, updated in place, and symbol is the
+    id of token.symbol in tables. Return the root value once the input is
+    accepted, else None.
+    """
+    actions = tables.actions
+    while True:
+        action = actions[rows[-1] + symbol]
+        if observer is not None:
+            observer.step(rows, values, token)
+        if action > 0:  # shift and go to the state whose row is action - 1
+            rows.append(action - 1)
+            values.append(token.value)
+            if observer is not None:
+                observer.shift(rows, values)
+            return None
+        elif action < -1:  # reduce using rule -action - 1
+            num_symbols, head = tables.reductions[-action - 1]
+            p = [None, *values[-num_symbols:]]
+            del rows[-num_symbols:]
+            del values[-num_symbols:]
+            rule = rules[-action - 1]
+            if rule.method is not None:
+                rule.method(p)
+            rows.append(actions[rows[-1] + head] - 1)
+            values.append(p[0])
+            if observer is not None:
+                observer.reduce(-action - 1, p)
+        elif action == -1:  # terminate, i.e. reduce using rule 0
+            assert token.symbol == "$"
+            assert len(rows) == 2
+            if observer is not None:
+                observer.accept(values[1])
+            return values[1]
+        else:
+            expectation = tables.expectations[rows[-1] // tables.width]
+            e = ParseError(
+                f"Expect {expectation} but found {token.value} instead", token.pos
+            )
+            if observer is not None:
+                observer.error(e)
+            raise e
+
+
+class IncrementalParser(object):
+    """Push parser of an expression given in chunks.
+
+    feed() lexes each chunk and drives the LR automaton with its tokens as
+    they arrive, and close() returns the root syntax_tree.Node of the
+    expression, so neither the whole input nor its token list is kept in
+    memory. Chunks are str, or bytes-like objects decoded with encoding. A
+    token that reaches the end of a chunk may continue in the next one, so it
+    is kept back until more input or close() arrives. Errors are raised as
+    ParseError with the same messages and positions as Parser.
+    """
+
+    def __init__(self, encoding: str = "utf-8") -> None:
+        super().__init__()
+        self.rules = grammar.rules
+        self.tables = TABLES
+        self.lexer = LEXER
+        self.decoder = codecs.getincrementaldecoder(encoding)()
+        self.pending = ""  # input not lexed yet
+        self.offset = 0  # position of pending in the whole input
+        self.rows = [0]  # row offsets of the states on the stack
+        self.values = [None]
+        self.root = None
+
+    def feed(self, chunk) -> None:
+        if not isinstance(chunk, str):
+            chunk = self.decoder.decode(chunk)
+        self._lex(self.pending + chunk, False)
+
+    def close(self):
+        """Parse the rest of the input and return the root Node."""
+        self._lex(self.pending + self.decoder.decode(b"", True), True)
+        self._push(Token(symbol="$", value="EOF", pos=self.offset))
+        return self.root
+
+    def _lex(self, buffer: str, final: bool) -> None:
+        symbols = self.lexer.symbols
+        group_kinds = self.lexer.group_kinds
+        end = len(buffer)
+        consumed = end
+        for match in self.lexer.master_pattern.finditer(buffer):
+            index = match.lastindex
+            if index is None:  # end of input, after any ignored characters
+                break
+            if match.end() == end and not final:
+                consumed = match.start()
+                break
+            kind = group_kinds[index]
+            if kind < 0:
+                raise ParseError(
+                    f"Illegal character {match.group(index)}",
+                    self.offset + match.start(index),
                 )
+            self._push(
+                Token(
+                    symbols[kind], match.group(index), self.offset + match.start(index)
+                )
+            )
+        self.pending = buffer[consumed:]
+        self.offset += consumed
+
+    def _push(self, token: Token) -> None:
+        tables = self.tables
+        symbol = tables.symbol_ids.get(token.symbol, tables.symbol_ids["error"])
+        root = _push_token(tables, self.rules, self.rows, self.values, symbol, token)
+        if root is not None:
+            self.root = root
+
+
+def parse_stream(source, chunk_size: int = 1 << 16, encoding: str = "utf-8"):
+    """Parse an expression read in chunks and return its root Node.
+
+    source is a text or binary file object (anything with a read method, such
+    as an mmap.mmap), a str, or a bytes-like buffer, which is sliced without
+    copying.
+    """
+    parser = IncrementalParser(encoding)
+    if hasattr(source, "read"):
+        while True:
+            chunk = source.read(chunk_size)
+            if len(chunk) == 0:
+                break
+            parser.feed(chunk)
+    elif isinstance(source, str):
+        for start in range(0, len(source), chunk_size):
+            parser.feed(source[start : start + chunk_size])
+    else:
+        with memoryview(source) as buffer:
+            for start in range(0, len(buffer), chunk_size):
+                parser.feed(buffer[start : start + chunk_size])
+    return parser.close()
+
+
+class ParseObserver(object):
+    """Receiver of the events of Parser.parse_tree.
+
+    Every event does nothing; subclasses override the ones they need. Events
+    are only sent when an observer is given, so parsing without one is not
+    slowed down. rows are the row offsets of the states on the stack (the
+    state is row // TABLES.width) and values are their symbol values.
+    """
+
+    def begin(self, tokens: list) -> None:
+        """Called before parsing tokens, which end with the EOF token."""
+
+    def step(self, rows: list, values: list, token: Token) -> None:
+        """Called before the action on the lookahead token."""
+
+    def shift(self, rows: list, values: list) -> None:
+        """Called after shifting a token onto the stack."""
+
+    def reduce(self, rule_number: int, p: list) -> None:
+        """Called after reducing using a rule, where p[0] is the head value."""
+
+    def accept(self, root) -> None:
+        """Called with the root node of a successful parse."""
+
+    def error(self, error: ParseError) -> None:
+        """Called with the syntax error before it is raised."""
+
+
+class DebugObserver(ParseObserver):
+    """Print every state, stack and action of a parse to file."""
+
+    def __init__(self, file=sys.stderr) -> None:
+        super().__init__()
+        self.file = file
+
+    def step(self, rows: list, values: list, token: Token) -> None:
+        stack = [
+            Step(state=row // TABLES.width, token=value)
+            for row, value in zip(rows, values)
+        ]
+        print(f"State  : {rows[-1] // TABLES.width}", file=self.file)
+        print(f"Stack  : {stack} . {token}", file=self.file)
+
+    def shift(self, rows: list, values: list) -> None:
+        print(
+            f"Action : Shift and goto state {rows[-1] // TABLES.width}", file=self.file
+        )
+
+    def reduce(self, rule_number: int, p: list) -> None:
+        rule = grammar.rules[rule_number]
+        print(
+            f"Action : Reduce rule [{rule.head} -> {' '.join(rule.body)}] with {p[1:]}",
+            file=self.file,
+        )
 
 
 if __name__ == "__main__":
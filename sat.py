@@ -0,0 +1,510 @@
+"""Satisfiability of expressions with a CDCL SAT solver.
+
+find_model, is_satisfiable and is_tautology encode an expression into CNF with
+TseitinEncoder and run Solver, a conflict-driven clause learning solver with
+two watched literals, first-UIP learning with recursive minimisation, VSIDS
+decisions with phase saving, Luby restarts and deletion of the learnt clauses
+spanning the most decision levels. read_dimacs and write_dimacs exchange
+clauses with other solvers.
+
+Solver is pure Python and does about 300,000 propagations or 3,000 conflicts
+per second, so it is limited by the number of conflicts rather than by the
+size of the input. Random expressions of 20,000 operands are solved in about
+a second. Random 3-SAT with 1,000 variables and 3,500 clauses takes from one
+to tens of seconds depending on the instance, and a few thousand variables at
+that ratio are out of reach; write such instances with write_dimacs for a
+native solver instead.
+"""
+
+from evaluator import FALSE_CONSTANTS, TRUE_CONSTANTS, _to_postfix
+from naive_converter import OPERATORS
+import heapq
+
+# Variables and literals are numbered as in DIMACS: variables are positive
+# integers and the literal -v is the negation of v. Inside Solver, literal l of
+# variable v is 2 * (v - 1) + (l < 0), so that negation is `lit ^ 1`.
+
+UNASSIGNED = -1
+
+
+def luby(i: int) -> int:
+    """Return the i-th element (starting from 1) of the Luby restart sequence."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while (1 << k) - 1 != i:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
+
+class Solver(object):
+    """CDCL SAT solver with two watched literals, 1UIP learning and Luby restarts."""
+
+    def __init__(self, num_variables: int = 0) -> None:
+        super().__init__()
+        self.num_variables = 0
+        self.values = list()  # literal -> 1, 0 or UNASSIGNED
+        self.level = list()  # variable -> decision level
+        self.reason = list()  # variable -> implying clause or None
+        self.activity = list()  # variable -> VSIDS activity
+        self.seen = list()  # variable -> marked by _analyze
+        self.phase = list()  # variable -> last assigned value
+        self.watches = list()  # literal -> clauses to visit when it becomes false
+        self.clauses = list()
+        self.learnts = list()
+        self.learnt_lbds = list()  # learnt clause index -> literal block distance
+        self.trail = list()
+        self.trail_lim = list()
+        self.queue_head = 0
+        self.order_heap = list()
+        self.variable_increment = 1.0
+        self.variable_decay = 0.95
+        self.restart_base = 100
+        self.max_learnts = 0
+        self.simplified_trail = 0  # trail length at the last _reduce
+        self.unsatisfiable = False
+        self.conflicts = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.ensure_variables(num_variables)
+
+    def ensure_variables(self, num_variables: int) -> None:
+        while self.num_variables < num_variables:
+            self.values.extend((UNASSIGNED, UNASSIGNED))
+            self.watches.extend((list(), list()))
+            self.level.append(0)
+            self.reason.append(None)
+            self.activity.append(0.0)
+            self.seen.append(False)
+            self.phase.append(0)
+            heapq.heappush(self.order_heap, (0.0, self.num_variables))
+            self.num_variables += 1
+
+    def add_clause(self, literals: list) -> bool:
+        """Add a clause of DIMACS literals; return False once it is unsatisfiable."""
+        if self.unsatisfiable:
+            return False
+        self._backtrack(0)
+        self.ensure_variables(max((abs(lit) for lit in literals), default=0))
+        clause = list()
+        for lit in set(literals):
+            lit = 2 * (abs(lit) - 1) + (lit < 0)
+            if lit ^ 1 in clause or self.values[lit] == 1:
+                return True  # tautological or already satisfied
+            if self.values[lit] == UNASSIGNED and lit not in clause:
+                clause.append(lit)
+        if len(clause) == 0:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self._enqueue(clause[0], None)
+            self.unsatisfiable = self._propagate() is not None
+        else:
+            self._attach(clause)
+            self.clauses.append(clause)
+        return not self.unsatisfiable
+
+    def solve(self) -> bool:
+        if self.unsatisfiable:
+            return False
+        self.max_learnts = max(len(self.clauses) // 3, 1000)
+        restart = 1
+        while True:
+            status = self._search(luby(restart) * self.restart_base)
+            if status is not None:
+                return status
+            restart += 1
+            self._reduce()
+
+    def model(self) -> list:
+        """Return the last satisfying assignment as a list of DIMACS literals."""
+        return [
+            (v + 1) if self.values[2 * v] == 1 else -(v + 1)
+            for v in range(self.num_variables)
+        ]
+
+    def _attach(self, clause: list) -> None:
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _enqueue(self, lit: int, reason) -> None:
+        self.values[lit] = 1
+        self.values[lit ^ 1] = 0
+        self.level[lit >> 1] = len(self.trail_lim)
+        self.reason[lit >> 1] = reason
+        self.trail.append(lit)
+
+    def _propagate(self):
+        """Propagate the trail; return a conflicting clause or None."""
+        values = self.values
+        watches = self.watches
+        trail = self.trail
+        level = self.level
+        reason = self.reason
+        current_level = len(self.trail_lim)
+        while self.queue_head < len(trail):
+            false_lit = trail[self.queue_head] ^ 1
+            self.queue_head += 1
+            self.propagations += 1
+            watchers = watches[false_lit]
+            kept = list()
+            watches[false_lit] = kept
+            # Clauses are only appended to the watches of other literals, so
+            # watchers does not change below.
+            num_watchers = len(watchers)
+            index = 0
+            while index < num_watchers:
+                clause = watchers[index]
+                index += 1
+                first = clause[0]
+                if first == false_lit:
+                    first = clause[1]
+                    clause[0] = first
+                    clause[1] = false_lit
+                if values[first] == 1:
+                    kept.append(clause)
+                    continue
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if values[lit] != 0:
+                        clause[1] = lit
+                        clause[k] = false_lit
+                        watches[lit].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] == 0:
+                        kept.extend(watchers[index:])
+                        self.queue_head = len(trail)
+                        return clause
+                    # inlined _enqueue(first, clause)
+                    values[first] = 1
+                    values[first ^ 1] = 0
+                    level[first >> 1] = current_level
+                    reason[first >> 1] = clause
+                    trail.append(first)
+        return None
+
+    def _analyze(self, conflict: list) -> tuple:
+        """Return the first-UIP learnt clause and the level to backtrack to."""
+        seen = self.seen
+        level = self.level
+        reason = self.reason
+        trail = self.trail
+        activity = self.activity
+        increment = self.variable_increment
+        marked = list()
+        learnt = [None]
+        counter = 0
+        lit = None
+        index = len(trail) - 1
+        clause = conflict
+        current_level = len(self.trail_lim)
+        while True:
+            for q in clause if lit is None else clause[1:]:
+                v = q >> 1
+                if not seen[v] and level[v] > 0:
+                    seen[v] = True
+                    marked.append(v)
+                    # Bump the activity. Every variable seen here is assigned,
+                    # so it goes back on the heap when it is unassigned.
+                    activity[v] += increment
+                    if level[v] == current_level:
+                        counter += 1
+                    else:
+                        learnt.append(q)
+            while not seen[trail[index] >> 1]:
+                index -= 1
+            lit = trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = reason[lit >> 1]
+        learnt[0] = lit ^ 1
+        # Drop literals implied by the other literals of the learnt clause.
+        levels = {level[q >> 1] for q in learnt[1:]}
+        learnt[1:] = [
+            q
+            for q in learnt[1:]
+            if reason[q >> 1] is None or not self._redundant(q, levels, marked)
+        ]
+        for v in marked:
+            seen[v] = False
+        backtrack_level = 0
+        if len(learnt) > 1:
+            deepest = max(range(1, len(learnt)), key=lambda i: level[learnt[i] >> 1])
+            learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+            backtrack_level = level[learnt[1] >> 1]
+        return learnt, backtrack_level
+
+    def _redundant(self, q: int, levels: set, marked: list) -> bool:
+        """Return whether q is implied by the marked literals.
+
+        The reasons of q are followed recursively through implied literals of
+        the given levels. On success, the literals visited stay marked.
+        """
+        seen = self.seen
+        level = self.level
+        reason = self.reason
+        num_marked = len(marked)
+        stack = [q]
+        while len(stack) > 0:
+            for r in reason[stack.pop() >> 1][1:]:
+                v = r >> 1
+                if seen[v] or level[v] == 0:
+                    continue
+                if reason[v] is None or level[v] not in levels:
+                    for v in marked[num_marked:]:
+                        seen[v] = False
+                    del marked[num_marked:]
+                    return False
+                seen[v] = True
+                marked.append(v)
+                stack.append(r)
+        return True
+
+    def _rebuild_heap(self) -> None:
+        self.order_heap = [
+            (-self.activity[v], v)
+            for v in range(self.num_variables)
+            if self.values[2 * v] == UNASSIGNED
+        ]
+        heapq.heapify(self.order_heap)
+
+    def _backtrack(self, level: int) -> None:
+        if len(self.trail_lim) <= level:
+            return
+        values = self.values
+        phase = self.phase
+        reason = self.reason
+        activity = self.activity
+        order_heap = self.order_heap
+        for lit in self.trail[self.trail_lim[level] :]:
+            v = lit >> 1
+            values[lit] = values[lit ^ 1] = UNASSIGNED
+            phase[v] = lit & 1
+            reason[v] = None
+            heapq.heappush(order_heap, (-activity[v], v))
+        del self.trail[self.trail_lim[level] :]
+        del self.trail_lim[level:]
+        self.queue_head = len(self.trail)
+        if len(self.order_heap) > 4 * self.num_variables:
+            self._rebuild_heap()
+
+    def _decide(self) -> bool:
+        while len(self.order_heap) > 0:
+            v = heapq.heappop(self.order_heap)[1]
+            if self.values[2 * v] == UNASSIGNED:
+                self.decisions += 1
+                self.trail_lim.append(len(self.trail))
+                self._enqueue(2 * v + self.phase[v], None)
+                return True
+        return False
+
+    def _search(self, max_conflicts: int):
+        """Run CDCL until a result is found (True/False) or a restart is due (None)."""
+        conflicts = 0
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if len(self.trail_lim) == 0:
+                    self.unsatisfiable = True
+                    return False
+                learnt, backtrack_level = self._analyze(conflict)
+                self._backtrack(backtrack_level)
+                if len(learnt) == 1:
+                    self._enqueue(learnt[0], None)
+                else:
+                    self._attach(learnt)
+                    self.learnts.append(learnt)
+                    # the number of decision levels of the literals (LBD)
+                    self.learnt_lbds.append(
+                        len({self.level[lit >> 1] for lit in learnt})
+                    )
+                    self._enqueue(learnt[0], learnt)
+                self.variable_increment /= self.variable_decay
+                if self.variable_increment > 1e100:
+                    # Activities are at most 1 / (1 - decay) increments.
+                    self.activity = [activity * 1e-100 for activity in self.activity]
+                    self.variable_increment *= 1e-100
+                    self._rebuild_heap()
+            elif conflicts >= max_conflicts:
+                self._backtrack(0)
+                return None
+            elif not self._decide():
+                return True
+
+    def _reduce(self) -> None:
+        """Simplify the clauses at level 0 and drop half of the learnt clauses.
+
+        Learnt clauses spanning the most decision levels (LBD), then the
+        longest, are dropped first. Those spanning at most two are kept.
+        """
+        if len(self.learnts) > self.max_learnts:
+            lbds = self.learnt_lbds
+            order = sorted(
+                range(len(self.learnts)), key=lambda i: (lbds[i], len(self.learnts[i]))
+            )
+            half = len(order) // 2
+            kept = order[:half] + [i for i in order[half:] if lbds[i] <= 2]
+            self.learnts = [self.learnts[i] for i in kept]
+            self.learnt_lbds = [lbds[i] for i in kept]
+            self.max_learnts = int(self.max_learnts * 1.1)
+        elif len(self.trail) == self.simplified_trail:
+            return  # no new level 0 assignments, and the watches are valid
+        self.simplified_trail = len(self.trail)
+        for literal_watches in self.watches:
+            literal_watches.clear()
+        clauses = map(self._simplify, self.clauses)
+        self.clauses = [clause for clause in clauses if clause is not None]
+        learnts = list()
+        lbds = list()
+        for clause, lbd in zip(map(self._simplify, self.learnts), self.learnt_lbds):
+            if clause is not None:
+                learnts.append(clause)
+                lbds.append(lbd)
+        self.learnts = learnts
+        self.learnt_lbds = lbds
+
+    def _simplify(self, clause: list):
+        """Attach clause without its level 0 literals, or return None if satisfied."""
+        if any(self.values[lit] == 1 for lit in clause):
+            return None  # satisfied at level 0 for good
+        clause = [lit for lit in clause if self.values[lit] == UNASSIGNED]
+        self._attach(clause)
+        return clause
+
+
+class TseitinEncoder(object):
+    """Linear-size CNF encoding of postfix expressions.
+
+    Every binary operator introduces one variable defined by a few clauses,
+    negation is mapped to the negated literal, and identical subexpressions
+    share their variable.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.operators = OPERATORS
+        self.num_variables = 0
+        self.variables = dict()  # operand symbol -> variable
+        self.clauses = list()
+        self.definitions = dict()
+        self.true_literal = None
+
+    def new_variable(self) -> int:
+        self.num_variables += 1
+        return self.num_variables
+
+    def operand(self, name: str) -> int:
+        if name not in self.variables:
+            self.variables[name] = self.new_variable()
+        return self.variables[name]
+
+    def constant(self, value: bool) -> int:
+        if self.true_literal is None:
+            self.true_literal = self.new_variable()
+            self.clauses.append([self.true_literal])
+        return self.true_literal if value else -self.true_literal
+
+    def encode(self, postfix_tokens: list) -> int:
+        """Add the definitions of postfix_tokens and return the literal of its root."""
+        stack = list()
+        for token in postfix_tokens:
+            if token in self.operators:
+                if self.operators[token].num_operands == 1:
+                    stack.append(-stack.pop())
+                else:
+                    b = stack.pop()
+                    stack.append(self._define(token, stack.pop(), b))
+            elif token in FALSE_CONSTANTS:
+                stack.append(self.constant(False))
+            elif token in TRUE_CONSTANTS:
+                stack.append(self.constant(True))
+            else:
+                stack.append(self.operand(token))
+        assert len(stack) == 1
+        return stack[0]
+
+    def _define(self, operator: str, a: int, b: int) -> int:
+        key = (operator, a, b)
+        if key in self.definitions:
+            return self.definitions[key]
+        x = self.new_variable()
+        if operator == "&":
+            self.clauses.extend(([-x, a], [-x, b], [x, -a, -b]))
+        elif operator == "|":
+            self.clauses.extend(([x, -a], [x, -b], [-x, a, b]))
+        elif operator == "^":
+            self.clauses.extend(([x, a], [x, -b], [-x, -a, b]))
+        else:  # operator == "~"
+            self.clauses.extend(([-x, -a, b], [-x, a, -b], [x, a, b], [x, -a, -b]))
+        self.definitions[key] = x
+        return x
+
+
+def read_dimacs(file) -> tuple:
+    """Read a DIMACS CNF file object; return the number of variables and the clauses.
+
+    Reading stops at a "%" line, which ends the clauses of SATLIB benchmarks.
+    """
+    num_variables = 0
+    clauses = list()
+    clause = list()
+    for line in file:
+        line = line.strip()
+        if len(line) > 0 and line[0] == "%":
+            break
+        if len(line) == 0 or line[0] == "c":
+            continue
+        if line[0] == "p":
+            num_variables = int(line.split()[2])
+            continue
+        for lit in map(int, line.split()):
+            if lit == 0:
+                clauses.append(clause)
+                clause = list()
+            else:
+                clause.append(lit)
+    if len(clause) > 0:
+        clauses.append(clause)
+    return num_variables, clauses
+
+
+def write_dimacs(num_variables: int, clauses: list, file, variables: dict = None):
+    """Write clauses in DIMACS CNF format, with variables as `c var` comments."""
+    for name, v in (variables or dict()).items():
+        print(f"c var {v} {name}", file=file)
+    print(f"p cnf {num_variables} {len(clauses)}", file=file)
+    for clause in clauses:
+        print(" ".join(map(str, clause)), 0, file=file)
+
+
+def find_model(expr):
+    """Return a satisfying assignment of the operands of expr as a dict, or None.
+
+    expr is an infix expression string or a list of postfix tokens.
+    """
+    encoder = TseitinEncoder()
+    root = encoder.encode(_to_postfix(expr))
+    solver = Solver(encoder.num_variables)
+    for clause in encoder.clauses:
+        solver.add_clause(clause)
+    solver.add_clause([root])
+    if not solver.solve():
+        return None
+    model = solver.model()
+    return {name: model[v - 1] > 0 for name, v in sorted(encoder.variables.items())}
+
+
+def is_satisfiable(expr) -> bool:
+    return find_model(expr) is not None
+
+
+def is_tautology(expr) -> bool:
+    return find_model(list(_to_postfix(expr)) + ["!"]) is None
@@ -0,0 +1,443 @@
+"""Serve conversion and evaluation requests as JSON lines over a socket.
+
+Every request is a JSON object on its own line with an operation "op", an
+"expression" and an optional "id" that is copied to the response. The
+operations are:
+
+    tokenize     the token values of the expression
+    postfix      the postfix expression
+    prefix       the prefix expression
+    operands     the sorted operand symbols
+    truth_table  {"operands": [...], "results": "0110..."}, where character i
+                 is the result of row i of the truth table
+    pdnf, pcnf   the principal normal form indices
+    metrics      queue depth, request latencies and parser counters
+    cancel       cancel the pending request whose id is "target"
+
+The response is {"id": ..., "result": ...} or {"id": ..., "error": ...}, with
+the "position" of parse errors. Requests are answered as soon as they are
+done, so responses to one connection may be out of order.
+
+Parsing and conversion run on the event loop with one warm parser. Truth
+tables and normal forms are evaluated by a pool of worker processes, at most
+one job per worker at a time; up to --max-queue more jobs wait for a worker
+and further jobs are rejected. Jobs over the variable limit (which a request
+can lower with "max_variables") are rejected, and jobs that time out or are
+cancelled stop at the next block of rows.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from converter import Converter
+from evaluator import Evaluator
+from instrumentation import Metrics
+from parser import ParseError
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import statistics
+import time
+
+# Operations answered on the event loop and by the worker processes.
+INLINE_OPERATIONS = {"tokenize", "postfix", "prefix", "operands"}
+POOL_OPERATIONS = {"truth_table", "pdnf", "pcnf"}
+
+# Number of latencies kept per operation for the percentiles.
+LATENCY_WINDOW = 1024
+
+# Per-process state of the workers, created once by initialize.
+evaluator = None
+cancel_flags = None
+
+
+def initialize(flags) -> None:
+    global evaluator, cancel_flags
+    evaluator = Evaluator()
+    cancel_flags = flags
+
+
+def evaluate(operation: str, postfix_tokens: list, slot: int, deadline: float):
+    """Return the result of a pool operation, run in a worker process.
+
+    The truth table is evaluated and converted block by block, and the job
+    gives up between blocks once cancel_flags[slot] is set or the deadline (a
+    time.time() value) has passed.
+    """
+    operands = evaluator.get_operand_symbols(postfix_tokens)
+    num_rows = 1 << len(operands)
+    result = list()
+    for offset, length, bitmask in evaluator.iter_result_bitmasks(postfix_tokens):
+        if cancel_flags[slot]:
+            raise Exception("cancelled")
+        if time.time() > deadline:
+            raise TimeoutError()
+        bits = format(bitmask, f"0{length}b")[::-1]
+        if operation == "truth_table":
+            result.append(bits)
+        elif operation == "pdnf":
+            result.extend(
+                offset + index for index, bit in enumerate(bits) if bit == "1"
+            )
+        else:
+            # row i of the truth table is maxterm num_rows - i - 1
+            result.extend(
+                num_rows - offset - index - 1
+                for index, bit in enumerate(bits)
+                if bit == "0"
+            )
+    if operation == "truth_table":
+        return {"operands": operands, "results": "".join(result)}
+    if operation == "pcnf":
+        result.reverse()
+    return result
+
+
+def _is_positive(value, types) -> bool:
+    """Return whether value is a positive number of types, JSON booleans aside."""
+    return isinstance(value, types) and not isinstance(value, bool) and value > 0
+
+
+class Server(object):
+    """Answer JSON line requests with a warm parser and a pool of workers.
+
+    Call start() in a running event loop and close() when done.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        max_variables: int = 16,
+        max_queue: int = 64,
+        timeout: float = 10.0,
+        max_pending: int = 64,
+        max_line: int = 1 << 20,
+    ) -> None:
+        super().__init__()
+        self.workers = workers or os.cpu_count()
+        self.max_variables = max_variables
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.max_line = max_line
+        self.converter = Converter()
+        self.evaluator = Evaluator()
+        self.metrics = Metrics()
+        self.counters = {
+            "requests": 0,
+            "errors": 0,
+            "rejected": 0,
+            "timeouts": 0,
+            "cancelled": 0,
+        }
+        self.latencies = dict()  # operation -> [count, seconds, recent seconds]
+        self.waiting = 0
+        self.running = 0
+        self.loop = None
+        self.slots = None  # asyncio.Queue of the free worker slots
+        self.cancel_flags = None
+        self.pool = None
+        self.server = None
+        self.connections = dict()  # handler task -> its StreamWriter
+
+    async def start(self, path: str = None, host: str = "127.0.0.1", port: int = 0):
+        """Start the pool and listen on the Unix socket path or on host:port.
+
+        Return the asyncio.Server.
+        """
+        self.loop = asyncio.get_running_loop()
+        # A worker only runs the job of its slot, whose flag cancels it.
+        self.cancel_flags = multiprocessing.Array("b", self.workers, lock=False)
+        self.slots = asyncio.Queue()
+        for slot in range(self.workers):
+            self.slots.put_nowait(slot)
+        self.pool = ProcessPoolExecutor(
+            self.workers, initializer=initialize, initargs=(self.cancel_flags,)
+        )
+        # Start the workers before listening: forked workers would otherwise
+        # inherit the sockets of the connections open at the time.
+        await asyncio.wrap_future(self.pool.submit(os.getpid))
+        if path is not None:
+            self.server = await asyncio.start_unix_server(
+                self.handle_connection, path, limit=self.max_line
+            )
+        else:
+            self.server = await asyncio.start_server(
+                self.handle_connection, host, port, limit=self.max_line
+            )
+        return self.server
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        # Aborting a connection ends its handler, which cancels its requests.
+        for writer in self.connections.values():
+            writer.transport.abort()
+        await asyncio.gather(*self.connections, return_exceptions=True)
+        if self.pool is not None:
+            for slot in range(self.workers):
+                self.cancel_flags[slot] = 1
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def handle_connection(self, reader, writer) -> None:
+        """Answer the requests of one connection concurrently.
+
+        At most max_pending requests are in progress at a time; further lines
+        are not read until one of them is answered.
+        """
+        pending = asyncio.Semaphore(self.max_pending)
+        write_lock = asyncio.Lock()
+        tasks = set()
+        requests = dict()  # request id -> task
+        self.connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                await pending.acquire()
+                try:
+                    line = await reader.readline()
+                except ValueError:  # the line is longer than max_line
+                    await self._write(writer, write_lock, {"error": "line too long"})
+                    break
+                if len(line) == 0:
+                    break
+                task = asyncio.create_task(
+                    self._respond(line, requests, writer, write_lock)
+                )
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+                task.add_done_callback(lambda _: pending.release())
+        except ConnectionError:
+            pass
+        finally:
+            # The client is gone or has closed its side: answer what was
+            # already read, unless the connection is broken.
+            if reader.at_eof() and not writer.is_closing():
+                await asyncio.gather(*tasks, return_exceptions=True)
+            for task in list(tasks):
+                task.cancel()
+            writer.close()
+            del self.connections[asyncio.current_task()]
+
+    async def _respond(self, line: bytes, requests: dict, writer, write_lock) -> None:
+        start = time.perf_counter()
+        self.counters["requests"] += 1
+        request_id = None
+        operation = None
+        response = dict()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise Exception("request must be a JSON object")
+            request_id = request.get("id")
+            operation = request.get("op")
+            if isinstance(request_id, (str, int)):
+                requests[request_id] = asyncio.current_task()
+            response["result"] = await self.handle_request(request, requests)
+        except ParseError as e:
+            response["error"] = str(e)
+            response["position"] = e.pos
+        except TimeoutError:
+            self.counters["timeouts"] += 1
+            response["error"] = "timed out"
+        except asyncio.CancelledError:
+            self.counters["cancelled"] += 1
+            response["error"] = "cancelled"
+        except Exception as e:
+            response["error"] = str(e)
+        finally:
+            if isinstance(request_id, (str, int)) and (
+                requests.get(request_id) is asyncio.current_task()
+            ):
+                del requests[request_id]
+        if "error" in response:
+            self.counters["errors"] += 1
+        response = {"id": request_id, **response}
+        if operation in INLINE_OPERATIONS or operation in POOL_OPERATIONS:
+            self._record_latency(operation, time.perf_counter() - start)
+        await self._write(writer, write_lock, response)
+
+    async def _write(self, writer, write_lock, response: dict) -> None:
+        async with write_lock:
+            if writer.is_closing():
+                return
+            try:
+                writer.write(json.dumps(response).encode() + b"\n")
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    async def handle_request(self, request: dict, requests: dict = None):
+        """Return the result of a request, or raise its error."""
+        operation = request.get("op")
+        if operation == "metrics":
+            return self.as_dict()
+        if operation == "cancel":
+            task = (requests or dict()).get(request.get("target"))
+            if task is None:
+                raise Exception(f"no pending request {request.get('target')!r}")
+            task.cancel()
+            return True
+        if operation not in INLINE_OPERATIONS and operation not in POOL_OPERATIONS:
+            raise Exception(f"unknown operation {operation!r}")
+        expression = request.get("expression")
+        if not isinstance(expression, str):
+            raise Exception("expression must be a string")
+        max_variables = request.get("max_variables", self.max_variables)
+        if not _is_positive(max_variables, int):
+            raise Exception("max_variables must be a positive integer")
+        timeout = request.get("timeout", self.timeout)
+        if not _is_positive(timeout, (int, float)):
+            raise Exception("timeout must be a positive number")
+        tokens = self.converter.tokenize(expression)
+        if operation == "tokenize":
+            return [token.value for token in tokens if token.symbol != "$"]
+        tree = self.converter.parser.parse_tree(tokens, observer=self.metrics)
+        if operation == "prefix":
+            return self.converter.list_to_str(tree.prefix())
+        postfix_tokens = list(tree.postfix())
+        if operation == "postfix":
+            return self.converter.list_to_str(postfix_tokens)
+        operands = self.evaluator.get_operand_symbols(postfix_tokens)
+        if operation == "operands":
+            return operands
+        max_variables = min(max_variables, self.max_variables)
+        if len(operands) > max_variables:
+            self.counters["rejected"] += 1
+            raise Exception(f"too many operands: {len(operands)} > {max_variables}")
+        timeout = min(timeout, self.timeout)
+        return await self.offload(operation, postfix_tokens, timeout)
+
+    async def offload(self, operation: str, postfix_tokens: list, timeout: float):
+        """Run evaluate in a worker once one is free, within timeout seconds."""
+        deadline = time.time() + timeout
+        try:
+            slot = self.slots.get_nowait()
+        except asyncio.QueueEmpty:
+            if self.waiting >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise Exception("server busy")
+            self.waiting += 1
+            try:
+                slot = await asyncio.wait_for(self.slots.get(), timeout)
+            finally:
+                self.waiting -= 1
+        self.running += 1
+        future = self.pool.submit(evaluate, operation, postfix_tokens, slot, deadline)
+        # The slot is only reused once its job has really stopped.
+        future.add_done_callback(lambda _: self._on_done(slot))
+        try:
+            return await asyncio.wait_for(
+                asyncio.wrap_future(future), deadline - time.time()
+            )
+        except (TimeoutError, asyncio.CancelledError):
+            self.cancel_flags[slot] = 1
+            raise
+
+    def _on_done(self, slot: int) -> None:
+        # Called in the thread of the pool that completed the future.
+        try:
+            self.loop.call_soon_threadsafe(self._release, slot)
+        except RuntimeError:  # the event loop is closed
+            pass
+
+    def _release(self, slot: int) -> None:
+        self.cancel_flags[slot] = 0
+        self.running -= 1
+        self.slots.put_nowait(slot)
+
+    def _record_latency(self, operation: str, seconds: float) -> None:
+        entry = self.latencies.get(operation)
+        if entry is None:
+            entry = self.latencies[operation] = [0, 0.0, deque(maxlen=LATENCY_WINDOW)]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2].append(seconds)
+
+    def as_dict(self) -> dict:
+        latency = dict()
+        for operation, (count, seconds, recent) in self.latencies.items():
+            # The percentiles are over the last LATENCY_WINDOW requests.
+            quantiles = (
+                statistics.quantiles(recent, n=100, method="inclusive")
+                if len(recent) > 1
+                else None
+            )
+            latency[operation] = {
+                "count": count,
+                "mean": seconds / count,
+                "p50": quantiles[49] if quantiles else recent[0],
+                "p99": quantiles[98] if quantiles else recent[0],
+                "max": max(recent),
+            }
+        return {
+            "queue": {
+                "workers": self.workers,
+                "running": self.running,
+                "waiting": self.waiting,
+                "max_queue": self.max_queue,
+            },
+            **self.counters,
+            "latency": latency,
+            "parser": {
+                name: value
+                for name, value in self.metrics.as_dict().items()
+                if name not in ("slowest", "traces", "phases")
+            },
+        }
+
+
+async def main(args) -> None:
+    server = Server(args.workers, args.max_variables, args.max_queue, args.timeout)
+    listener = await server.start(args.unix, args.host, args.port)
+    names = [socket.getsockname() for socket in listener.sockets]
+    print("listening on", ", ".join(map(str, names)), flush=True)
+    try:
+        await listener.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == "__main__":
+    argument_parser = argparse.ArgumentParser(description=__doc__)
+    argument_parser.add_argument("-u", "--unix", help="listen on this Unix socket")
+    argument_parser.add_argument(
+        "--host", default="127.0.0.1", help="TCP host (default: 127.0.0.1)"
+    )
+    argument_parser.add_argument(
+        "-p", "--port", type=int, default=8765, help="TCP port (default: 8765)"
+    )
+    argument_parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: CPU count)",
+    )
+    argument_parser.add_argument(
+        "-m",
+        "--max-variables",
+        type=int,
+        default=16,
+        help="reject truth tables of expressions with more operands (default: 16)",
+    )
+    argument_parser.add_argument(
+        "-q",
+        "--max-queue",
+        type=int,
+        default=64,
+        help="number of jobs that may wait for a worker (default: 64)",
+    )
+    argument_parser.add_argument(
+        "-t",
+        "--timeout",
+        type=float,
+        default=10.0,
+        help="seconds a truth table job may take (default: 10)",
+    )
+    args = argument_parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,138 @@
+"""Linear-time algebraic simplification of expressions.
+
+Every node of the syntax_tree.Node DAG is simplified once, after its
+operands, with constant folding, double negation, idempotence (A & A),
+complements (A & !A) and absorption (A & (A | B)). Operands that only
+occurred in removed subexpressions disappear from the result. The result has
+the same value as the input for every assignment of its remaining operands.
+"""
+
+from collections import namedtuple
+from evaluator import FALSE_CONSTANTS, TRUE_CONSTANTS, _to_postfix
+from naive_converter import OPERATORS
+from syntax_tree import Node
+
+Simplification = namedtuple(
+    typename="Simplification",
+    field_names=["tree", "removed_nodes", "removed_operands"],
+)
+
+
+def negate(a):
+    """Return the negation of a Node, True or False."""
+    if a is True or a is False:
+        return not a
+    if a.symbol == "!":
+        return a.children[0]
+    return Node("!", (a,))
+
+
+def _are_complements(a: Node, b: Node) -> bool:
+    return (a.symbol == "!" and a.children[0] is b) or (
+        b.symbol == "!" and b.children[0] is a
+    )
+
+
+def fold(symbol: str, a, b=None):
+    """Apply an operator to operands that are a simplified Node, True or False."""
+    if symbol == "!":
+        return negate(a)
+    if symbol == "&":
+        if a is False or b is False:
+            return False
+        if a is True:
+            return b
+        if b is True or a is b:
+            return a
+        if _are_complements(a, b):
+            return False
+        if b.symbol == "|" and a in b.children:
+            return a
+        if a.symbol == "|" and b in a.children:
+            return b
+    elif symbol == "|":
+        if a is True or b is True:
+            return True
+        if a is False:
+            return b
+        if b is False or a is b:
+            return a
+        if _are_complements(a, b):
+            return True
+        if b.symbol == "&" and a in b.children:
+            return a
+        if a.symbol == "&" and b in a.children:
+            return b
+    elif symbol == "^":
+        if a is False or b is True or a is b:
+            return True
+        if a is True:
+            return b
+        if b is False:
+            return negate(a)
+        if _are_complements(a, b):  # !B ^ B and A ^ !A are the consequent
+            return b
+    else:  # symbol == "~"
+        if a is b:
+            return True
+        if a is True:
+            return b
+        if b is True:
+            return a
+        if a is False:
+            return negate(b)
+        if b is False:
+            return negate(a)
+        if _are_complements(a, b):
+            return False
+    return Node(symbol, (a, b))
+
+
+def build(postfix_tokens: list):
+    """Return the simplified DAG of postfix_tokens, or True or False."""
+    stack = list()
+    for token in postfix_tokens:
+        if token in OPERATORS:
+            num_operands = OPERATORS[token].num_operands
+            operands = stack[-num_operands:]
+            del stack[-num_operands:]
+            stack.append(fold(token, *operands))
+        elif token in FALSE_CONSTANTS:
+            stack.append(False)
+        elif token in TRUE_CONSTANTS:
+            stack.append(True)
+        else:
+            stack.append(Node(token))
+    return stack[0]
+
+
+def _operands(postfix_tokens) -> set:
+    return {
+        token
+        for token in postfix_tokens
+        if token not in OPERATORS
+        and token not in FALSE_CONSTANTS
+        and token not in TRUE_CONSTANTS
+    }
+
+
+def simplify(expr) -> Simplification:
+    """Simplify an infix expression string, a list of postfix tokens or a Node.
+
+    Return the simplified Node, whose postfix() tokens can be passed to the
+    evaluator and converter, the number of nodes removed and the sorted
+    operands that no longer occur. A constant result is the Node "0" or "1".
+    """
+    if isinstance(expr, Node):
+        postfix_tokens = list(expr.postfix())
+    else:
+        postfix_tokens = list(_to_postfix(expr))
+    tree = build(postfix_tokens)
+    if tree is True or tree is False:
+        tree = Node("1" if tree else "0")
+    removed_operands = _operands(postfix_tokens) - _operands(tree.postfix())
+    return Simplification(
+        tree=tree,
+        removed_nodes=len(postfix_tokens) - tree.size,
+        removed_operands=sorted(removed_operands),
+    )
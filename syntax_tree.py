@@ -0,0 +1,52 @@
+import weakref
+
+
+class Node(object):
+    """An interned node of an expression DAG.
+
+    Nodes are hash-consed: constructing a node with the same symbol and the
+    same children returns the existing node, so identical subexpressions are
+    stored once and structural equality is identity. Leaves are operands with
+    no children; inner nodes are operators.
+    """
+
+    __slots__ = ("symbol", "children", "size", "__weakref__")
+
+    _table = weakref.WeakValueDictionary()
+
+    def __new__(cls, symbol: str, children: tuple = ()):
+        key = (symbol, children)
+        node = cls._table.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            node.symbol = symbol
+            node.children = children
+            # number of tokens of the postfix or prefix expression
+            size = 1
+            for child in children:
+                size += child.size
+            node.size = size
+            cls._table[key] = node
+        return node
+
+    def __repr__(self) -> str:
+        return repr(list(self.postfix()))
+
+    def postfix(self):
+        """Lazily yield the postfix tokens of the expression."""
+        stack = [(self, False)]
+        while len(stack) > 0:
+            node, visited = stack.pop()
+            if visited or len(node.children) == 0:
+                yield node.symbol
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+
+    def prefix(self):
+        """Lazily yield the prefix tokens of the expression."""
+        stack = [self]
+        while len(stack) > 0:
+            node = stack.pop()
+            yield node.symbol
+            stack.extend(reversed(node.children))
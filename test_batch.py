@@ -0,0 +1,54 @@
+from batch import run
+from test_converter import testdata
+import fileinput
+import io
+import json
+import pytest
+
+
+def test_batch():
+    lines = [data[0] + "\n" for data in testdata] + ["\n", "P $ Q\n", "(P &\n"]
+    serial = io.StringIO()
+    run(lines, serial, workers=0)
+    parallel = io.StringIO()
+    run(lines, parallel, workers=2, chunk_size=3)
+    assert parallel.getvalue() == serial.getvalue()
+    records = [json.loads(line) for line in serial.getvalue().splitlines()]
+    assert len(records) == len(testdata) + 2
+    for record, (infix_str, prefix_str, postfix_str) in zip(records, testdata):
+        assert record["expression"] == infix_str
+        assert record["prefix"] == prefix_str
+        assert record["postfix"] == postfix_str
+    assert records[-2]["line"] == len(testdata) + 2
+    assert records[-2]["position"] == 2
+    assert records[-1]["position"] == 4
+
+
+def test_batch_files(tmp_path):
+    paths = list()
+    for name, lines in [("a.txt", "P & Q\n\nP $ Q\n"), ("b.txt", "\n!P\n")]:
+        paths.append(str(tmp_path / name))
+        with open(paths[-1], "w") as file:
+            file.write(lines)
+    output = io.StringIO()
+    with fileinput.input(paths) as lines:
+        run(lines, output, workers=2, chunk_size=1)
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [(record["file"], record["line"]) for record in records] == [
+        (paths[0], 1),
+        (paths[0], 3),
+        (paths[1], 2),
+    ]
+
+
+@pytest.mark.parametrize(
+    "workers, chunk_size, message",
+    [
+        (2, 0, "chunk_size must be a positive integer"),
+        (2, -1, "chunk_size must be a positive integer"),
+        (-1, 64, "workers must be a non-negative integer"),
+    ],
+)
+def test_batch_arguments(workers, chunk_size, message):
+    with pytest.raises(Exception, match=message):
+        run(["P & Q\n"], io.StringIO(), workers, chunk_size)
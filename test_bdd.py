@@ -0,0 +1,95 @@
+from bdd import (
+    BDD,
+    are_equivalent,
+    is_satisfiable,
+    is_tautology,
+    principal_disjunctive_normal_form as bdd_pdnf,
+    variable_order,
+)
+from evaluator import Evaluator, principal_disjunctive_normal_form
+from test_converter import testdata
+from test_evaluator import extra_testdata, to_postfix
+import pytest
+
+
+@pytest.mark.parametrize("infix_str", [data[0] for data in testdata] + extra_testdata)
+def test_bdd(infix_str):
+    postfix_tokens = to_postfix(infix_str)
+    bdd = BDD(Evaluator().get_operand_symbols(postfix_tokens))
+    u = bdd.from_postfix(postfix_tokens)
+    minterms = principal_disjunctive_normal_form(postfix_tokens)
+    num_rows = 1 << len(bdd.variables)
+    assert bdd.count_models(u) == len(minterms)
+    assert bdd.is_tautology(u) == (len(minterms) == num_rows)
+    assert bdd.is_satisfiable(u) == (len(minterms) > 0)
+    model = bdd.find_model(u)
+    if model is None:
+        assert len(minterms) == 0
+    else:
+        index = sum(
+            model[name] << (len(model) - i - 1) for i, name in enumerate(bdd.variables)
+        )
+        assert index in minterms
+
+
+@pytest.mark.parametrize(
+    "expr1, expr2, equivalent",
+    [
+        ("P ^ Q", "!P | Q", True),
+        ("!(P & Q)", "!P | !Q", True),
+        ("P ~ Q", "(P & Q) | (!P & !Q)", True),
+        ("P ^ Q", "Q ^ P", False),
+        ("P | !P", "Q ^ Q", True),
+    ],
+)
+def test_are_equivalent(expr1, expr2, equivalent):
+    assert are_equivalent(expr1, expr2) == equivalent
+
+
+def test_many_variables():
+    expr = " & ".join(f"(X{i} | !X{i + 1})" for i in range(200))
+    assert is_satisfiable(expr)
+    assert not is_tautology(expr)
+    assert is_tautology(f"({expr}) ^ (X0 | !X1)")
+    bdd = BDD()
+    assert bdd.count_models(bdd.from_expression(expr)) == 202
+
+
+@pytest.mark.parametrize("heuristic", ["dfs", "fan_in", "appearance"])
+@pytest.mark.parametrize("infix_str", [data[0] for data in testdata] + extra_testdata)
+def test_minterms(infix_str, heuristic):
+    assert bdd_pdnf(infix_str, heuristic) == principal_disjunctive_normal_form(
+        infix_str
+    )
+
+
+def test_minterms_names():
+    bdd = BDD(["Q", "R", "P"])
+    u = bdd.from_expression("P & !Q")
+    assert bdd.minterms(u) == [0b001, 0b011]
+    assert bdd.minterms(u, ["P", "Q"]) == [0b10]
+    assert bdd.minterms(u, ["P", "S", "Q"]) == [0b100, 0b110]
+
+
+@pytest.mark.parametrize(
+    "heuristic, order",
+    [
+        ("dfs", ["C", "D", "E", "A", "B"]),
+        ("fan_in", ["A", "B", "C", "D", "E"]),
+        ("appearance", ["A", "B", "C", "D", "E"]),
+    ],
+)
+def test_variable_order(heuristic, order):
+    assert variable_order("(A & B) | ((C ^ D) & (E | A))", heuristic) == order
+    with pytest.raises(Exception, match="Unknown variable order"):
+        variable_order("P", "random")
+
+
+def test_computed_table_bound():
+    expr = " & ".join(f"(X{i} | !X{i + 1})" for i in range(50))
+    bdd = BDD(cache_size=8)
+    u = bdd.from_expression(expr)
+    assert len(bdd.cache) <= 8
+    assert bdd.evictions > 0
+    other = BDD()
+    assert bdd.minterms(u) == other.minterms(other.from_expression(expr))
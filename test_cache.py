@@ -0,0 +1,68 @@
+from cache import ParseCache, normalize
+from concurrent.futures import ThreadPoolExecutor
+from test_converter import testdata
+import os
+import pytest
+
+
+@pytest.mark.parametrize(
+    "source, normalized",
+    [
+        ("  P   &\tQ ", "P&Q"),
+        ("! ( P | Q )", "!(P|Q)"),
+        ("P  Q", "P Q"),
+        ("abc ~\n! !de", "abc~!!de"),
+    ],
+)
+def test_normalize(source, normalized):
+    assert normalize(source) == normalized
+
+
+def test_cache():
+    cache = ParseCache(maxsize=2)
+    result = cache.get("P ^ (Q | R)")
+    assert " ".join(result.postfix) == "P Q R | ^"
+    assert " ".join(result.prefix) == "^ P | Q R"
+    assert result.operands == ("P", "Q", "R")
+    assert cache.get("P^(Q|R)") is result
+    cache.get("P & Q")
+    cache.get("P ^ (Q | R)")  # most recently used
+    cache.get("P | Q")  # evicts P & Q
+    assert cache.get("  P^( Q|R ) ") is result
+    assert cache.stats() == {
+        "hits": 3,
+        "misses": 3,
+        "evictions": 1,
+        "size": 2,
+        "maxsize": 2,
+        "hit_rate": 0.5,
+    }
+    with pytest.raises(Exception):
+        cache.get("P & & Q")
+
+
+def test_cache_persistence(tmp_path):
+    path = str(tmp_path / "cache.pickle")
+    cache = ParseCache(path=path)
+    for infix_str, prefix_str, postfix_str in testdata:
+        cache.get(infix_str)
+    cache.save()
+    loaded = ParseCache(path=path)
+    assert loaded.stats()["size"] == cache.stats()["size"]
+    for infix_str, prefix_str, postfix_str in testdata:
+        assert " ".join(loaded.get(infix_str).postfix) == postfix_str
+    assert loaded.stats()["misses"] == 0
+    with pytest.raises(Exception, match="no path"):
+        ParseCache().save()
+    assert not os.path.exists("None")
+
+
+def test_cache_threads():
+    cache = ParseCache(maxsize=8)
+    sources = [data[0] for data in testdata] * 20
+    with ThreadPoolExecutor(4) as executor:
+        results = list(executor.map(cache.get, sources))
+    for source, result in zip(sources, results):
+        assert result.postfix == cache.get(source).postfix
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 2 * len(sources)
@@ -1,4 +1,4 @@
-from parser import Parser
+from parser import TABLES, Parser, load_tables
 from converter import Converter
 import pytest
 
@@ -56,3 +56,78 @@ def test_converter(infix_str, prefix_str, postfix_str):
     assert " ".join(postfix_tokens) == postfix_str
     prefix_tokens = converter.postfix_to_prefix(postfix_tokens)
     assert " ".join(prefix_tokens) == prefix_str
+
+
+@pytest.mark.parametrize("infix_str, prefix_str, postfix_str", testdata)
+def test_parse_tree(infix_str, prefix_str, postfix_str):
+    parser = Parser()
+    tree = parser.parse_tree(parser.tokenize(infix_str))
+    assert " ".join(tree.prefix()) == prefix_str
+    assert " ".join(tree.postfix()) == postfix_str
+    assert tree.size == len(postfix_str.split())
+
+
+def test_parse_tree_sharing():
+    parser = Parser()
+    tree = parser.parse_tree(parser.tokenize("(P & !Q) | (P & !Q)"))
+    assert tree.children[0] is tree.children[1]
+    assert tree is parser.parse_tree(parser.tokenize("P & !Q | (P & (!Q))"))
+    # Identity survives building many unrelated nodes in between.
+    parser.parse_tree(parser.tokenize(" | ".join(f"X{i}" for i in range(300000))))
+    assert tree is parser.parse_tree(parser.tokenize("(P & !Q) | (P & !Q)"))
+
+
+def test_scan():
+    parser = Parser()
+    string = " P&(Q_1 |\n!01) ~x "
+    spans = parser.scan(string)
+    lexemes = [string[spans[i + 1] : spans[i + 2]] for i in range(0, len(spans), 3)]
+    assert lexemes == ["P", "&", "(", "Q_1", "|", "!", "0", "1", ")", "~", "x"]
+    tokens = parser.tokenize(string)
+    assert [token.value for token in tokens[:-1]] == lexemes
+    assert [token.symbol for token in tokens[:3]] == ["X", "&", "("]
+    assert tokens[3].pos == 4
+    with pytest.raises(Exception, match="Illegal character \\$"):
+        parser.tokenize("P $ Q")
+
+
+def test_parse_does_not_mutate_tokens():
+    parser = Parser()
+    tokens = parser.tokenize("(P & !Q) | R")
+    copy = list(tokens)
+    assert (
+        parser.parse(tokens) == parser.parse(tokens) == ["P", "Q", "!", "&", "R", "|"]
+    )
+    assert tokens == copy
+
+
+@pytest.mark.parametrize(
+    "infix_str, prefix_str, postfix_str",
+    [
+        ("!" * 20000 + "P", "! " * 20000 + "P", "P" + " !" * 20000),
+        (
+            "(" * 10000 + "P" + ") & P" * 10000,
+            "& " * 10000 + "P" + " P" * 10000,
+            "P" + " P &" * 10000,
+        ),
+        (
+            "P ~ (" * 10000 + "P" + ")" * 10000,
+            "~ P " * 10000 + "P",
+            "P " * 10001 + "~ " * 9999 + "~",
+        ),
+    ],
+    ids=["negations", "parentheses", "right-nested"],
+)
+def test_deep_nesting(infix_str, prefix_str, postfix_str):
+    converter = Converter()
+    postfix_tokens = converter.infix_to_postfix(converter.tokenize(infix_str))
+    assert " ".join(postfix_tokens) == postfix_str
+    prefix_tokens = converter.postfix_to_prefix(postfix_tokens)
+    assert " ".join(prefix_tokens) == prefix_str
+    assert prefix_tokens == converter.infix_to_prefix(converter.tokenize(infix_str))
+
+
+def test_tables_cache(tmp_path):
+    cache_path = str(tmp_path / "tables")
+    assert load_tables(cache_path) == load_tables(cache_path) == TABLES
+    assert Converter().parser.lexer is Converter().parser.lexer
@@ -0,0 +1,113 @@
+from converter import Converter
+from evaluator import (
+    Evaluator,
+    compile,
+    principal_conjunctive_normal_form,
+    principal_disjunctive_normal_form,
+    truth_table_to_principal_conjunctive_normal_form,
+    truth_table_to_principal_disjunctive_normal_form,
+)
+from test_converter import testdata
+import pytest
+
+extra_testdata = ["P & 1", "0 | !T", "F ^ (Q ~ true)", "(A | B) & (C ^ !A) ~ D"]
+
+
+def to_postfix(infix_str):
+    converter = Converter()
+    return converter.infix_to_postfix(converter.tokenize(infix_str))
+
+
+@pytest.mark.parametrize("infix_str", [data[0] for data in testdata] + extra_testdata)
+def test_bitwise_truth_table(infix_str):
+    postfix_tokens = to_postfix(infix_str)
+    evaluator = Evaluator()
+    header, rows = evaluator.get_truth_table(postfix_tokens)
+    bitwise_header, bitwise_rows, result = evaluator.get_bitwise_truth_table(
+        postfix_tokens
+    )
+    assert bitwise_header == header
+    assert bitwise_rows == rows
+    assert result == sum(row[-1] << index for index, row in enumerate(rows))
+
+
+@pytest.mark.parametrize("infix_str", extra_testdata)
+def test_compile(infix_str):
+    evaluator = Evaluator()
+    postfix_tokens = to_postfix(infix_str)
+    function = compile(infix_str)
+    assert list(function.operands) == evaluator.get_operand_symbols(postfix_tokens)
+    # get_truth_table uses the compiled function, get_bitwise_truth_table does not.
+    header, rows, result = evaluator.get_bitwise_truth_table(postfix_tokens)
+    for row in rows:
+        assert function(*row[:-1]) is bool(row[-1])
+
+
+@pytest.mark.parametrize("infix_str", ["bool ~ P", "int & !bool | len ^ str"])
+def test_compile_builtin_names(infix_str):
+    evaluator = Evaluator()
+    postfix_tokens = to_postfix(infix_str)
+    assert evaluator.get_truth_table(postfix_tokens) == (
+        evaluator.get_bitwise_truth_table(postfix_tokens)[:2]
+    )
+    assert evaluator.get_gray_code_truth_table(postfix_tokens) == (
+        evaluator.get_truth_table(postfix_tokens)
+    )
+
+
+@pytest.mark.parametrize(
+    "infix_str",
+    [data[0] for data in testdata]
+    + extra_testdata
+    + ["(A & !B ^ C) | (D & !E ^ F) | (G & 1 ^ H) ~ (A ^ 0)"],
+)
+def test_gray_code_truth_table(infix_str):
+    evaluator = Evaluator()
+    postfix_tokens = to_postfix(infix_str)
+    assert evaluator.get_gray_code_truth_table(
+        postfix_tokens
+    ) == evaluator.get_truth_table(postfix_tokens)
+    operands, result = evaluator.get_result_bitmask(postfix_tokens)
+    assert evaluator.get_gray_code_results(postfix_tokens) == (
+        operands,
+        bytearray(result >> index & 1 for index in range(1 << len(operands))),
+    )
+
+
+@pytest.mark.parametrize("infix_str", extra_testdata)
+@pytest.mark.parametrize("start, stop, chunk_size", [(0, None, None), (3, 11, 4)])
+def test_iter_truth_table(infix_str, start, stop, chunk_size):
+    evaluator = Evaluator()
+    postfix_tokens = to_postfix(infix_str)
+    header, rows = evaluator.get_truth_table(postfix_tokens)
+    assert evaluator.get_truth_table_header(postfix_tokens) == header
+    streamed = list(evaluator.iter_truth_table(postfix_tokens, start, stop, chunk_size))
+    if chunk_size is not None:
+        assert all(len(chunk) <= chunk_size for chunk in streamed)
+        streamed = sum(streamed, start=list())
+    assert streamed == rows[start:stop]
+
+
+def test_iter_truth_table_blocks():
+    evaluator = Evaluator()
+    postfix_tokens = to_postfix(
+        "(A & !B) | (C ~ D) ^ (E & F) | G | H ~ I & J & K & L & M ^ N"
+    )
+    header, rows = evaluator.get_truth_table(postfix_tokens)
+    assert (
+        list(evaluator.iter_truth_table(postfix_tokens, 4000, 9000)) == rows[4000:9000]
+    )
+
+
+@pytest.mark.parametrize("infix_str", [data[0] for data in testdata] + extra_testdata)
+def test_principal_normal_forms(infix_str):
+    header, rows = Evaluator().get_truth_table(to_postfix(infix_str))
+    minterms = truth_table_to_principal_disjunctive_normal_form(rows)
+    maxterms = truth_table_to_principal_conjunctive_normal_form(rows)
+    assert principal_disjunctive_normal_form(infix_str) == minterms
+    assert principal_conjunctive_normal_form(infix_str) == maxterms
+    for ranges, indices in [
+        (principal_disjunctive_normal_form(infix_str, ranges=True), minterms),
+        (principal_conjunctive_normal_form(infix_str, ranges=True), maxterms),
+    ]:
+        assert [i for start, stop in ranges for i in range(start, stop)] == indices
@@ -0,0 +1,71 @@
+from bdd import are_equivalent
+from fingerprint import (
+    EquivalenceIndex,
+    exact_signature,
+    signature,
+    simulation_signature,
+)
+from generator import random_formula
+import fingerprint
+import pytest
+
+formulas = [random_formula(seed, num_operands=6, num_variables=4) for seed in range(40)]
+formulas += ["A ^ B", "!A | B", "!(A & !B)", "A | B & !B", "A", "0", "P & !P", "1"]
+
+
+@pytest.mark.parametrize("expr1", formulas[-8:])
+@pytest.mark.parametrize("expr2", formulas[-8:])
+def test_signature(expr1, expr2):
+    equivalent = are_equivalent(expr1, expr2)
+    assert (signature(expr1) == signature(expr2)) == equivalent
+    if equivalent:
+        assert simulation_signature(expr1) == simulation_signature(expr2)
+
+
+def test_exact_signature():
+    assert exact_signature("A | B & !B") == (("A",), 0b10)
+    assert exact_signature("(A ^ B) & (C | !C)") == (("A", "B"), 0b1011)
+    assert exact_signature("Q & 0") == ((), 0)
+    with pytest.raises(Exception):
+        exact_signature(" & ".join(f"X{i}" for i in range(17)))
+    padded = " & ".join(f"X{i}" for i in range(16)) + " & (Z | !Z)"
+    assert exact_signature(padded) == exact_signature(padded[: -len(" & (Z | !Z)")])
+
+
+def test_simulation_signature():
+    big = [f"X{i}" for i in range(40)]
+    assert signature(" & ".join(big))[0] == "simulation"
+    assert signature(" & ".join(big)) == signature(" & ".join(reversed(big)))
+    assert signature(" & ".join(big)) != signature(" | ".join(big))
+
+
+def test_signature_irrelevant_operands():
+    # Operands that do not change the result do not count towards
+    # EXACT_MAX_VARIABLES, on either side of it.
+    f = " | ".join(f"X{i} & X{i + 1}" for i in range(0, 16, 2))
+    padded = [f"({f}) & (Z | !Z)", f"{f} | W & !W", f"({f} | Z) & ({f} | !Z)"]
+    assert signature(f)[0] == "exact"
+    for expr in padded:
+        assert signature(expr) == signature(f)
+    index = EquivalenceIndex()
+    index.add("f", f)
+    assert [index.find(expr) for expr in padded] == [["f"]] * len(padded)
+
+
+@pytest.mark.parametrize("width, exact_max_variables", [(256, 16), (1, 16), (1, 0)])
+def test_equivalence_index(monkeypatch, width, exact_max_variables):
+    # A 1-bit simulation forces collisions, which must be rejected by the
+    # exact signatures or by the SAT solver.
+    monkeypatch.setattr(fingerprint, "SIMULATION_WIDTH", width)
+    monkeypatch.setattr(fingerprint, "EXACT_MAX_VARIABLES", exact_max_variables)
+    index = EquivalenceIndex()
+    for key, expr in enumerate(formulas):
+        index.add(key, expr)
+    assert len(index) == len(formulas)
+    for expr in formulas[::3]:
+        expected = [
+            key for key, other in enumerate(formulas) if are_equivalent(expr, other)
+        ]
+        assert index.find(expr) == expected
+    if width == 1:
+        assert index.collisions > 0
@@ -0,0 +1,67 @@
+from benchmark import compare
+from converter import Converter
+from evaluator import Evaluator
+from generator import random_formula, random_postfix
+import pytest
+
+converter = Converter()
+evaluator = Evaluator()
+
+
+def depth(postfix_tokens: list) -> int:
+    """Nesting depth of the binary operators of postfix_tokens."""
+    stack = list()
+    for token in postfix_tokens:
+        if token == "!":
+            continue
+        if token in "&|^~":
+            stack.append(max(stack.pop(), stack.pop()) + 1)
+        else:
+            stack.append(0)
+    return stack[0]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_formula(seed):
+    postfix_tokens = random_postfix(seed, num_operands=50, num_variables=5)
+    formula = random_formula(seed, num_operands=50, num_variables=5)
+    assert formula == random_formula(seed, num_operands=50, num_variables=5)
+    assert converter.infix_to_postfix(converter.tokenize(formula)) == postfix_tokens
+    assert len([t for t in postfix_tokens if t.startswith("X")]) == 50
+    assert set(evaluator.get_operand_symbols(postfix_tokens)) <= {
+        f"X{i}" for i in range(5)
+    }
+
+
+@pytest.mark.parametrize("max_depth", [1, 3, 8])
+def test_random_formula_depth(max_depth):
+    # With 2 ** max_depth operands, a balanced tree always fits.
+    postfix_tokens = random_postfix(7, num_operands=1 << max_depth, max_depth=max_depth)
+    assert depth(postfix_tokens) <= max_depth
+
+
+def test_random_formula_operators():
+    postfix_tokens = random_postfix(
+        3, operator_weights={"~": 1}, negation_rate=0.0, constant_rate=1.0
+    )
+    assert set(postfix_tokens) <= {"0", "1", "~"}
+
+
+def test_compare():
+    baseline = {"workloads": {"w": {"stages": {"a": {"min": 1.0}, "b": {"min": 1.0}}}}}
+    results = {
+        "workloads": {
+            "w": {"stages": {"a": {"min": 1.05}, "b": {"min": 1.5}, "c": {"min": 9}}},
+            "v": {"stages": {"a": {"min": 9}}},
+        }
+    }
+    assert compare(results, baseline, 0.1) == [("w", "b", 1.0, 1.5)]
+    assert compare(results, baseline, 0.01) == [
+        ("w", "a", 1.0, 1.05),
+        ("w", "b", 1.0, 1.5),
+    ]
+
+
+def test_random_formula_skew():
+    postfix_tokens = random_postfix(5, num_operands=1000, skew=1.0)
+    assert depth(postfix_tokens) == 999
@@ -0,0 +1,55 @@
+from converter import Converter
+from generator import random_formula
+from parser import IncrementalParser, ParseError, parse_stream
+from test_converter import testdata
+from test_evaluator import extra_testdata
+import io
+import mmap
+import pytest
+
+converter = Converter()
+
+
+@pytest.mark.parametrize(
+    "infix_str",
+    [data[0] for data in testdata]
+    + extra_testdata
+    + ["Alpha & Beta_2 | !gamma", "  P\n&\tQ  ", "true ^ false"],
+)
+def test_incremental(infix_str):
+    postfix_tokens = converter.infix_to_postfix(converter.tokenize(infix_str))
+    for chunk_size in [1, 2, 3, 7, len(infix_str)]:
+        assert list(parse_stream(infix_str, chunk_size).postfix()) == postfix_tokens
+        source = io.BytesIO(infix_str.encode())
+        assert list(parse_stream(source, chunk_size).postfix()) == postfix_tokens
+
+
+def test_split_identifier():
+    parser = IncrementalParser()
+    for chunk in ["Al", "pha", " & ", "Be", "ta"]:
+        parser.feed(chunk)
+    assert list(parser.close().postfix()) == ["Alpha", "Beta", "&"]
+
+
+@pytest.mark.parametrize(
+    "infix_str", ["P $ Q", "(P &", "P Q", "P & é", ")", "", "P & !!"]
+)
+def test_incremental_errors(infix_str):
+    with pytest.raises(ParseError) as expected:
+        converter.infix_to_postfix(converter.tokenize(infix_str))
+    for chunk_size in [1, 4]:
+        with pytest.raises(ParseError) as error:
+            parse_stream(infix_str.encode(), chunk_size)
+        assert str(error.value) == str(expected.value)
+        assert error.value.pos == expected.value.pos
+
+
+def test_mmap(tmp_path):
+    infix_str = random_formula(0, num_operands=5000, num_variables=50)
+    path = tmp_path / "formula.txt"
+    path.write_text(infix_str)
+    postfix_tokens = converter.infix_to_postfix(converter.tokenize(infix_str))
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            assert list(parse_stream(buffer, 1000).postfix()) == postfix_tokens
+            assert list(parse_stream(buffer[:], 999).postfix()) == postfix_tokens
@@ -0,0 +1,92 @@
+from converter import Converter
+from instrumentation import Metrics, profile
+from parser import ParseError
+from test_converter import testdata
+import io
+import json
+import pytest
+
+converter = Converter()
+parser = converter.parser
+
+
+@pytest.mark.parametrize("infix_str, prefix_str, postfix_str", testdata)
+def test_metrics(infix_str, prefix_str, postfix_str):
+    metrics = Metrics()
+    tokens = parser.tokenize(infix_str)
+    postfix_tokens = parser.parse(tokens, observer=metrics)
+    assert converter.list_to_str(postfix_tokens) == postfix_str
+    counters = metrics.as_dict()
+    assert counters["parses"] == 1
+    assert counters["errors"] == 0
+    # Every token but EOF is shifted once.
+    assert counters["tokens"] == counters["shifts"] == len(tokens) - 1
+    assert counters["reduces"] == sum(counters["reductions"].values())
+    assert counters["reductions"]["E -> X"] == sum(
+        token.symbol == "X" for token in tokens
+    )
+    assert counters["reductions"].get("E -> ( E )", 0) == infix_str.count("(")
+    assert 1 <= counters["max_stack_depth"] <= len(tokens)
+    assert counters["slowest"][0]["expression"].replace(" ", "") == infix_str.replace(
+        " ", ""
+    )
+
+
+def test_metrics_error():
+    metrics = Metrics(trace_rate=1.0)
+    with pytest.raises(ParseError):
+        parser.parse(parser.tokenize("P & (Q"), observer=metrics)
+    counters = metrics.as_dict()
+    assert counters["errors"] == 1
+    assert counters["slowest"][0]["outcome"].startswith("Expect")
+    assert counters["traces"][0]["events"][-1][0] == "end"
+
+
+def test_metrics_traces():
+    metrics = Metrics(trace_rate=1.0, max_traces=2)
+    for expr in ["P", "P & Q", "!P | Q"]:
+        parser.parse(parser.tokenize(expr), observer=metrics)
+    traces = metrics.as_dict()["traces"]
+    assert [trace["expression"] for trace in traces] == ["P & Q", "! P | Q"]
+    assert traces[0]["events"] == [
+        ("shift", "P"),
+        ("reduce", "E -> X"),
+        ("shift", "&"),
+        ("shift", "Q"),
+        ("reduce", "E -> X"),
+        ("reduce", "E -> E & E"),
+        ("end", "accept"),
+    ]
+    metrics = Metrics()
+    parser.parse(parser.tokenize("P & Q"), observer=metrics)
+    assert metrics.as_dict()["traces"] == []
+
+
+def test_metrics_slowest():
+    metrics = Metrics(max_slowest=3)
+    for i in range(10):
+        parser.parse(parser.tokenize(" & ".join(["P"] * (i + 1))), observer=metrics)
+    slowest = metrics.as_dict()["slowest"]
+    assert len(slowest) == 3
+    assert slowest == sorted(slowest, key=lambda record: -record["seconds"])
+
+
+def test_profile():
+    metrics = profile("(P ^ Q) ~ !R", Metrics())
+    counters = json.loads(metrics.to_json())
+    assert list(counters["phases"].keys()) == [
+        "tokenize",
+        "parse",
+        "convert",
+        "evaluate",
+    ]
+    assert all(phase["count"] == 1 for phase in counters["phases"].values())
+
+
+def test_debug():
+    debug_file = io.StringIO()
+    parser.parse(parser.tokenize("P & Q"), debug=True, debug_file=debug_file)
+    lines = debug_file.getvalue().splitlines()
+    assert lines[0] == "State  : 0"
+    assert lines[2] == "Action : Shift and goto state 2"
+    assert lines[5] == "Action : Reduce rule [E -> X] with ['P']"
@@ -0,0 +1,67 @@
+from bdd import are_equivalent
+from generator import random_formula
+from minimise import (
+    Cube,
+    _prime_implicants_sets,
+    cube_cost,
+    minimise,
+    minimise_pos,
+    minimise_sop,
+    pos_to_str,
+    prime_implicants,
+    sop_to_str,
+)
+from test_converter import testdata
+from test_evaluator import extra_testdata
+import pytest
+import random
+
+
+@pytest.mark.parametrize(
+    "infix_str",
+    [data[0] for data in testdata]
+    + extra_testdata
+    + [random_formula(seed, num_operands=12, num_variables=6) for seed in range(10)],
+)
+@pytest.mark.parametrize("form", ["sop", "pos"])
+@pytest.mark.parametrize("method", ["exact", "heuristic"])
+def test_minimise(infix_str, form, method):
+    assert are_equivalent(minimise(infix_str, form, method), infix_str)
+
+
+def test_prime_implicants():
+    # A & !C | B & C over (A, B, C) has the consensus term A & B.
+    assert sorted(prime_implicants([3, 4, 6, 7], 3)) == [
+        Cube(value=3, mask=4),
+        Cube(value=4, mask=2),
+        Cube(value=6, mask=1),
+    ]
+    minterms = sorted(random.Random(0).sample(range(1 << 8), 100))
+    assert sorted(prime_implicants(minterms, 8)) == sorted(
+        _prime_implicants_sets(minterms, 8)
+    )
+
+
+def test_minimise_sop():
+    operands = ["A", "B", "C"]
+    assert sop_to_str(minimise_sop([3, 4, 6, 7], 3), operands) == "B & C | A & !C"
+    # A cyclic prime implicant chart with 6 primes, covered by 3 of them.
+    assert len(minimise_sop([0, 1, 2, 5, 6, 7], 3, method="exact")) == 3
+    assert len(minimise_sop([0, 1, 2, 5, 6, 7], 3, method="heuristic")) <= 4
+    # Covers of 5 cubes have 11 or 12 literals.
+    cubes = minimise_sop([0, 3, 4, 6, 7, 8, 9, 10, 11, 13, 14, 15], 4, method="exact")
+    assert len(cubes) == 5
+    assert sum(cube_cost(cube, 4) for cube in cubes) == 11
+    assert sop_to_str(minimise_sop([1, 3], 2, dont_cares=[0, 2]), ["A", "B"]) == "1"
+    assert sop_to_str(minimise_sop([], 2), ["A", "B"]) == "0"
+
+
+def test_minimise_pos():
+    # maxterms 0 and 1 of (A, B) are the false rows 3 and 2, where A is true.
+    cubes = minimise_pos([0, 1], 2)
+    assert cubes == [Cube(value=2, mask=1)]
+    assert pos_to_str(cubes, ["A", "B"]) == "!A"
+    assert minimise("(A ^ B) & (B ^ C)", "pos") == "(!B | C) & (!A | B)"
+    assert minimise("A | B", "pos") == "A | B"
+    assert minimise("A & !A", "pos") == "0"
+    assert minimise("A | !A", "pos") == "1"
@@ -0,0 +1,43 @@
+from evaluator import principal_disjunctive_normal_form
+from generator import random_formula
+from itertools import islice
+from models import count_models, iter_model_indices, iter_models
+from test_converter import testdata
+from test_evaluator import extra_testdata
+import pytest
+
+
+@pytest.mark.parametrize(
+    "infix_str",
+    [data[0] for data in testdata]
+    + extra_testdata
+    + [
+        random_formula(seed, num_operands=20, num_variables=8, constant_rate=0.1)
+        for seed in range(10)
+    ],
+)
+def test_models(infix_str):
+    minterms = principal_disjunctive_normal_form(infix_str)
+    assert list(iter_model_indices(infix_str)) == minterms
+    assert count_models(infix_str) == len(minterms)
+
+
+def test_iter_models():
+    assert list(iter_models("A ^ !B")) == [
+        {"A": False, "B": False},
+        {"A": False, "B": True},
+        {"A": True, "B": False},
+    ]
+    assert list(iter_models("P & !P")) == []
+    assert list(iter_models("1")) == [{}]
+
+
+def test_many_operands():
+    # 2 ** 80 assignments, of which 3 ** 40 make every X{i} & Y{i} false.
+    infix_str = " | ".join(f"X{i} & Y{i}" for i in range(40))
+    assert count_models(infix_str) == (1 << 80) - 3**40
+    models = list(islice(iter_models(infix_str), 3))
+    assert len(models) == 3
+    assert all(
+        any(model[f"X{i}"] and model[f"Y{i}"] for i in range(40)) for model in models
+    )
@@ -0,0 +1,162 @@
+from evaluator import compile
+from observations import (
+    convert_csv,
+    count_true,
+    evaluate_columns,
+    evaluate_file,
+    read_binary_chunks,
+)
+from test_converter import testdata
+from test_evaluator import extra_testdata, to_postfix
+import io
+import pytest
+import random
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+requires_numpy = pytest.mark.skipif(numpy is None, reason="NumPy is not installed")
+use_numpy_values = [pytest.param(True, marks=requires_numpy), False]
+
+infix_strs = [data[0] for data in testdata] + extra_testdata + ["1", "P & 0"]
+
+
+def random_rows(names: list, num_rows: int, seed: int = 0) -> list:
+    generator = random.Random(seed)
+    return [[generator.randrange(2) for _ in names] for _ in range(num_rows)]
+
+
+def expected_results(infix_str: str, rows: list, names: list) -> list:
+    function = compile(infix_str)
+    indices = [list(names).index(name) for name in function.operands]
+    return [int(function(*(row[index] for index in indices))) for row in rows]
+
+
+@pytest.mark.parametrize("infix_str", infix_strs)
+def test_evaluate_columns(infix_str):
+    postfix_tokens = to_postfix(infix_str)
+    # The extra column is ignored.
+    names = compile(infix_str).operands + ("Unused",)
+    rows = random_rows(names, 200)
+    expected = expected_results(infix_str, rows, names)
+    int_columns = {
+        name: sum(row[index] << row_index for row_index, row in enumerate(rows))
+        for index, name in enumerate(names)
+    }
+    expected_int = sum(value << index for index, value in enumerate(expected))
+    result = evaluate_columns(postfix_tokens, int_columns, len(rows))
+    assert result == expected_int
+    assert count_true(result) == sum(expected)
+
+
+@requires_numpy
+@pytest.mark.parametrize("infix_str", infix_strs)
+def test_evaluate_numpy_columns(infix_str):
+    postfix_tokens = to_postfix(infix_str)
+    names = compile(infix_str).operands + ("Unused",)
+    rows = random_rows(names, 200)
+    expected = expected_results(infix_str, rows, names)
+    matrix = numpy.array(rows, dtype=bool)
+    bool_columns = {name: matrix[:, index] for index, name in enumerate(names)}
+    result = evaluate_columns(postfix_tokens, bool_columns)
+    assert result.tolist() == [bool(value) for value in expected]
+    packed_columns = dict()
+    for name, column in bool_columns.items():
+        packed = numpy.packbits(column, bitorder="little")
+        packed_columns[name] = numpy.frombuffer(
+            packed.tobytes() + bytes(-len(packed) % 8), "<u8"
+        )
+    expected_int = sum(value << index for index, value in enumerate(expected))
+    result = evaluate_columns(postfix_tokens, packed_columns, len(rows))
+    assert int.from_bytes(result.tobytes(), "little") == expected_int
+    assert count_true(result) == sum(expected)
+
+
+def test_missing_column():
+    with pytest.raises(Exception, match="No column for operands"):
+        evaluate_columns("P & Q", {"P": 1}, 1)
+
+
+@pytest.mark.parametrize(
+    "separator, true, false", [(",", "1", "0"), (", ", "true", "F")]
+)
+@pytest.mark.parametrize("use_numpy", use_numpy_values)
+def test_evaluate_file(separator, true, false, use_numpy):
+    names = ["A", "B", "C", "D", "E"]
+    rows = random_rows(names, 1000, seed=1)
+    lines = [separator.join(names)] + [
+        separator.join(true if value else false for value in row) for row in rows
+    ]
+    csv_file = io.BytesIO("\n".join(lines).encode())
+    binary_file = io.BytesIO()
+    convert_csv(csv_file, binary_file, chunk_rows=300, use_numpy=use_numpy)
+    for infix_str in ["A & !B | C ^ D ~ E", "(A | E) & 1", "!C"]:
+        expected = expected_results(infix_str, rows, names)
+        csv_file.seek(0)
+        results = list(evaluate_file(infix_str, csv_file, 77, use_numpy))
+        assert sum(num_rows for _, num_rows in results) == len(rows)
+        if separator == ",":
+            assert [num_rows for _, num_rows in results] == [77] * 12 + [76]
+        assert sum(count_true(result) for result, _ in results) == sum(expected)
+        binary_file.seek(0)
+        columns = list(read_binary_chunks(binary_file, use_numpy=use_numpy))
+        assert sum(num_rows for _, num_rows in columns) == len(rows)
+        assert sum(
+            count_true(evaluate_columns(infix_str, chunk, num_rows))
+            for chunk, num_rows in columns
+        ) == sum(expected)
+
+
+def test_padding_bits():
+    # Bits past num_rows are set in the columns but not in the results.
+    assert evaluate_columns("P", {"P": 0b1111}, 2) == 0b11
+    assert evaluate_columns("!P | P", {"P": 0b1111}, 2) == 0b11
+
+
+@requires_numpy
+def test_numpy_padding_bits():
+    packed = numpy.array([(1 << 64) - 1], dtype="<u8")
+    result = evaluate_columns("P", {"P": packed}, 3)
+    assert result.tolist() == [0b111]
+    assert count_true(result) == 3
+    assert packed.tolist() == [(1 << 64) - 1]
+    column = numpy.array([True, False])
+    result = evaluate_columns("P", {"P": column})
+    assert result is not column
+    result[0] = False
+    assert column.tolist() == [True, False]
+
+
+@pytest.mark.parametrize("use_numpy", use_numpy_values)
+def test_evaluate_binary_file(use_numpy):
+    names = ["A", "B", "C"]
+    rows = random_rows(names, 150, seed=2)
+    lines = [",".join(names)] + [",".join(map(str, row)) for row in rows]
+    binary_file = io.BytesIO()
+    convert_csv(io.BytesIO("\n".join(lines).encode()), binary_file, 64, use_numpy)
+    expected = expected_results("A & !B | C", rows, names)
+    for file in [io.BytesIO(binary_file.getvalue()), io.BufferedReader(binary_file)]:
+        file.seek(0)
+        results = list(evaluate_file("A & !B | C", file, use_numpy=use_numpy))
+        assert [num_rows for _, num_rows in results] == [64, 64, 22]
+        assert sum(count_true(result) for result, _ in results) == sum(expected)
+
+
+def test_truncated_binary_file():
+    binary_file = io.BytesIO()
+    convert_csv(io.BytesIO(b"A,B\n0,1\n1,1\n"), binary_file)
+    for size in [10, 20, len(binary_file.getvalue()) - 1]:
+        with pytest.raises(Exception, match="observation file"):
+            list(read_binary_chunks(io.BytesIO(binary_file.getvalue()[:size])))
+
+
+@pytest.mark.parametrize("chunk_rows", [0, -1])
+def test_chunk_rows(chunk_rows):
+    with pytest.raises(Exception, match="chunk_rows must be a positive integer"):
+        list(evaluate_file("A", io.BytesIO(b"A\n1\n"), chunk_rows, False))
+    output = io.BytesIO()
+    with pytest.raises(Exception, match="chunk_rows must be a positive integer"):
+        convert_csv(io.BytesIO(b"A\n1\n"), output, chunk_rows, False)
+    assert output.getvalue() == b""
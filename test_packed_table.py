@@ -0,0 +1,45 @@
+from evaluator import Evaluator
+from packed_table import PackedTruthTable, open_truth_table, write_truth_table
+from test_converter import testdata
+from test_evaluator import extra_testdata, to_postfix
+import io
+import pytest
+
+
+@pytest.mark.parametrize("infix_str", [data[0] for data in testdata] + extra_testdata)
+def test_packed_truth_table(infix_str):
+    header, rows = Evaluator().get_truth_table(to_postfix(infix_str))
+    table = PackedTruthTable.from_expression(infix_str)
+    assert table.operands + ["result"] == header
+    assert len(table) == len(rows)
+    assert list(table) == rows
+    assert table.count_true() == sum(row[-1] for row in rows)
+
+
+def test_truth_table_file(tmp_path):
+    # 14 operands, i.e. 4 blocks of the bit-sliced evaluator.
+    infix_str = "(A ^ B) & !(C ~ D) | E & P & G | (H | I) ^ J & K ~ L | M ^ !N"
+    table = PackedTruthTable.from_expression(infix_str)
+    path = tmp_path / "table.pctt"
+    with open(path, "wb") as file:
+        count = write_truth_table(infix_str, file)
+    buffer = io.BytesIO()
+    table.write(buffer)
+    assert path.read_bytes() == buffer.getvalue()
+    assert len(buffer.getvalue()) % 8 == 0
+    with open_truth_table(path) as mapped_table:
+        assert mapped_table.operands == table.operands
+        assert mapped_table.count_true(chunk_size=100) == count == table.count_true()
+        for index in [0, 1, 4095, 4096, 12345, len(table) - 1]:
+            assert mapped_table.row(index) == table.row(index)
+        with pytest.raises(IndexError):
+            mapped_table.result(len(table))
+
+
+def test_truth_table_file_errors(tmp_path):
+    path = tmp_path / "table.pctt"
+    path.write_bytes(b"not a truth table")
+    with pytest.raises(Exception, match="not a truth table file"):
+        open_truth_table(path)
+    with pytest.raises(Exception, match="bytes of results"):
+        PackedTruthTable(["P", "Q"], bytearray(2))
@@ -0,0 +1,59 @@
+from evaluator import (
+    principal_conjunctive_normal_form,
+    principal_disjunctive_normal_form,
+)
+from parallel import (
+    evaluate_shard,
+    get_true_runs,
+    merge_shards,
+    parse_shard,
+    runs_to_normal_forms,
+)
+from test_converter import testdata
+from test_evaluator import extra_testdata, to_postfix
+import parallel
+import pytest
+
+# 14 operands, i.e. 4 blocks of the bit-sliced evaluator.
+wide_infix_str = "(A ^ B) & !(C ~ D) | E & P & G | (H | I) ^ J & K ~ L | M ^ !N"
+
+
+@pytest.mark.parametrize("infix_str", [data[0] for data in testdata] + extra_testdata)
+def test_principal_normal_forms(infix_str):
+    postfix_tokens = to_postfix(infix_str)
+    operands, runs = get_true_runs(postfix_tokens, workers=0)
+    assert runs_to_normal_forms(operands, runs) == (
+        principal_disjunctive_normal_form(postfix_tokens),
+        principal_conjunctive_normal_form(postfix_tokens),
+    )
+
+
+@pytest.mark.parametrize("count", [1, 2, 3, 4, 7])
+def test_merge_shards(count):
+    postfix_tokens = to_postfix(wide_infix_str)
+    shards = [evaluate_shard(postfix_tokens, index, count) for index in range(count)]
+    shards.reverse()
+    operands, runs = merge_shards(shards)
+    assert runs_to_normal_forms(operands, runs, ranges=True) == (
+        principal_disjunctive_normal_form(postfix_tokens, ranges=True),
+        principal_conjunctive_normal_form(postfix_tokens, ranges=True),
+    )
+    if count > 1:
+        with pytest.raises(Exception, match="Missing rows"):
+            merge_shards(shards[1:])
+
+
+def test_process_pool():
+    assert parallel.principal_disjunctive_normal_form(
+        wide_infix_str, workers=2, num_shards=3
+    ) == principal_disjunctive_normal_form(wide_infix_str)
+    assert parallel.principal_conjunctive_normal_form(
+        wide_infix_str, ranges=True, workers=2
+    ) == principal_conjunctive_normal_form(wide_infix_str, ranges=True)
+
+
+def test_parse_shard():
+    assert parse_shard("3/8") == (3, 8)
+    for spec in ["8/8", "-1/8", "3", "a/b"]:
+        with pytest.raises(Exception, match="Invalid shard"):
+            parse_shard(spec)
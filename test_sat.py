@@ -0,0 +1,83 @@
+from evaluator import compile, principal_disjunctive_normal_form
+from sat import Solver, TseitinEncoder, find_model, is_satisfiable, is_tautology
+from sat import read_dimacs, write_dimacs
+from test_converter import testdata
+from test_evaluator import extra_testdata, to_postfix
+import io
+import random
+import pytest
+
+
+@pytest.mark.parametrize("infix_str", [data[0] for data in testdata] + extra_testdata)
+def test_sat(infix_str):
+    postfix_tokens = to_postfix(infix_str)
+    minterms = principal_disjunctive_normal_form(postfix_tokens)
+    function = compile(postfix_tokens)
+    assert is_satisfiable(infix_str) == (len(minterms) > 0)
+    assert is_tautology(infix_str) == (len(minterms) == 1 << len(function.operands))
+    model = find_model(postfix_tokens)
+    if model is not None:
+        assert function(*(model[name] for name in function.operands))
+
+
+def pigeonhole(num_pigeons: int, num_holes: int) -> list:
+    def var(pigeon, hole):
+        return pigeon * num_holes + hole + 1
+
+    clauses = [[var(p, h) for h in range(num_holes)] for p in range(num_pigeons)]
+    for h in range(num_holes):
+        for p in range(num_pigeons):
+            for q in range(p + 1, num_pigeons):
+                clauses.append([-var(p, h), -var(q, h)])
+    return clauses
+
+
+def test_pigeonhole():
+    solver = Solver()
+    for clause in pigeonhole(7, 6):
+        solver.add_clause(clause)
+    assert not solver.solve()
+    solver = Solver()
+    for clause in pigeonhole(6, 6):
+        solver.add_clause(clause)
+    assert solver.solve()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_random_3sat(seed):
+    rng = random.Random(seed)
+    num_variables = 150
+    clauses = [
+        [rng.choice((-1, 1)) * rng.randint(1, num_variables) for _ in range(3)]
+        for _ in range(int(num_variables * 4.26))
+    ]
+    solver = Solver(num_variables)
+    for clause in clauses:
+        solver.add_clause(clause)
+    if solver.solve():
+        model = set(solver.model())
+        assert all(any(lit in model for lit in clause) for clause in clauses)
+
+
+def test_dimacs():
+    encoder = TseitinEncoder()
+    root = encoder.encode(to_postfix("(P ^ Q) & (Q ^ R) & P & !R"))
+    encoder.clauses.append([root])
+    file = io.StringIO()
+    write_dimacs(encoder.num_variables, encoder.clauses, file, encoder.variables)
+    file.seek(0)
+    num_variables, clauses = read_dimacs(file)
+    assert (num_variables, clauses) == (encoder.num_variables, encoder.clauses)
+    solver = Solver(num_variables)
+    for clause in clauses:
+        solver.add_clause(clause)
+    assert not solver.solve()
+
+
+def test_dimacs_satlib_trailer():
+    file = io.StringIO("c uf\np cnf 3 2\n 1 -2 0\n2 3 0\n%\n0\n\n")
+    assert read_dimacs(file) == (3, [[1, -2], [2, 3]])
+    solver = Solver(3)
+    for clause in [[1, -2], [2, 3]]:
+        solver.add_clause(clause)
+    assert solver.solve()
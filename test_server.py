@@ -0,0 +1,127 @@
+from evaluator import (
+    principal_conjunctive_normal_form,
+    principal_disjunctive_normal_form,
+)
+from server import Server
+from test_converter import testdata
+import asyncio
+import json
+
+# 32 operands, i.e. 2 ** 20 blocks of the bit-sliced evaluator.
+slow_infix_str = " & ".join(f"X{i} ~ Y{i}" for i in range(16))
+
+
+async def request_all(server: Server, requests: list) -> dict:
+    """Send requests on one connection and return the responses by id."""
+    listener = await server.start()
+    host, port = listener.sockets[0].getsockname()[:2]
+    reader, writer = await asyncio.open_connection(host, port)
+    for request in requests:
+        writer.write(json.dumps(request).encode() + b"\n")
+    writer.write_eof()
+    responses = dict()
+    async for line in reader:
+        response = json.loads(line)
+        responses[response["id"]] = response
+    writer.close()
+    await server.close()
+    return responses
+
+
+def test_server():
+    requests = list()
+    for index, (infix_str, _, _) in enumerate(testdata):
+        for operation in ["prefix", "postfix", "pdnf", "pcnf"]:
+            requests.append(
+                {"id": f"{index} {operation}", "op": operation, "expression": infix_str}
+            )
+    requests.append({"id": "metrics", "op": "metrics"})
+    server = Server(workers=2)
+    responses = asyncio.run(request_all(server, requests))
+    assert len(responses) == len(requests)
+    for index, (infix_str, prefix_str, postfix_str) in enumerate(testdata):
+        assert responses[f"{index} prefix"]["result"] == prefix_str
+        assert responses[f"{index} postfix"]["result"] == postfix_str
+        assert responses[f"{index} pdnf"]["result"] == (
+            principal_disjunctive_normal_form(infix_str)
+        )
+        assert responses[f"{index} pcnf"]["result"] == (
+            principal_conjunctive_normal_form(infix_str)
+        )
+    metrics = server.as_dict()
+    assert metrics["requests"] == len(requests)
+    assert metrics["errors"] == 0
+    assert metrics["latency"]["pdnf"]["count"] == len(testdata)
+    assert metrics["queue"]["running"] == metrics["queue"]["waiting"] == 0
+    assert metrics["parser"]["parses"] == 4 * len(testdata)
+
+
+def test_server_errors():
+    requests = [
+        {"id": 1, "op": "postfix", "expression": "(P &"},
+        {"id": 2, "op": "transpose", "expression": "P"},
+        {"id": 3, "op": "pdnf", "expression": "A & B & C", "max_variables": 2},
+        {"id": 4, "op": "tokenize", "expression": "P&!Q"},
+        {"id": 5, "op": "truth_table", "expression": "P ^ Q"},
+        {"id": 6, "op": "cancel", "target": 42},
+        {"id": 7, "op": "pdnf", "expression": "P", "max_variables": "2"},
+        {"id": 8, "op": "pdnf", "expression": "P", "max_variables": None},
+        {"id": 9, "op": "pdnf", "expression": "P", "max_variables": 0},
+        {"id": 10, "op": "pdnf", "expression": "P", "timeout": -1},
+        {"id": 11, "op": "pdnf", "expression": "P", "timeout": True},
+        {"id": 12, "op": "pdnf", "expression": "P", "timeout": 0.5},
+    ]
+    responses = asyncio.run(request_all(Server(workers=1), requests))
+    assert responses[1]["position"] == 4
+    assert responses[2]["error"] == "unknown operation 'transpose'"
+    assert responses[3]["error"] == "too many operands: 3 > 2"
+    assert responses[4]["result"] == ["P", "&", "!", "Q"]
+    assert responses[5]["result"] == {"operands": ["P", "Q"], "results": "1101"}
+    assert responses[6]["error"] == "no pending request 42"
+    for request_id in [7, 8, 9]:
+        assert responses[request_id]["error"] == (
+            "max_variables must be a positive integer"
+        )
+    for request_id in [10, 11]:
+        assert responses[request_id]["error"] == "timeout must be a positive number"
+    assert responses[12]["result"] == [1]
+
+
+async def backpressure() -> list:
+    server = Server(workers=1, max_variables=32, max_queue=1, timeout=60)
+    listener = await server.start()
+    reader, writer = await asyncio.open_connection(
+        *listener.sockets[0].getsockname()[:2]
+    )
+    requests = [
+        {"id": 1, "op": "pdnf", "expression": slow_infix_str, "timeout": 0.2},
+        {"id": 2, "op": "pdnf", "expression": slow_infix_str},
+        {"id": 3, "op": "pdnf", "expression": "P | Q"},
+        {"id": 4, "op": "cancel", "target": 2},
+        # Job 1 stops at its deadline, so this does not wait for its rows.
+        {"id": 5, "op": "pdnf", "expression": "P | Q"},
+    ]
+    responses = dict()
+    for request in requests:
+        writer.write(json.dumps(request).encode() + b"\n")
+        if request["id"] == 4:
+            while len(responses) < 4:
+                response = json.loads(await reader.readline())
+                responses[response["id"]] = response
+    response = json.loads(await asyncio.wait_for(reader.readline(), 10))
+    responses[response["id"]] = response
+    metrics = server.as_dict()
+    writer.close()
+    await server.close()
+    return responses, metrics
+
+
+def test_server_backpressure():
+    responses, metrics = asyncio.run(backpressure())
+    assert responses[1]["error"] == "timed out"
+    assert responses[2]["error"] == "cancelled"
+    assert responses[3]["error"] == "server busy"
+    assert responses[4]["result"] is True
+    assert responses[5]["result"] == [1, 2, 3]
+    assert metrics["timeouts"] == metrics["cancelled"] == metrics["rejected"] == 1
+    assert metrics["queue"]["running"] == metrics["queue"]["waiting"] == 0
@@ -0,0 +1,55 @@
+from bdd import are_equivalent
+from converter import Converter
+from generator import random_formula
+from simplify import simplify
+from test_converter import testdata
+from test_evaluator import extra_testdata
+import pytest
+
+converter = Converter()
+
+
+@pytest.mark.parametrize(
+    "infix_str",
+    [data[0] for data in testdata]
+    + extra_testdata
+    + [
+        random_formula(seed, num_operands=30, num_variables=4, constant_rate=0.2)
+        for seed in range(20)
+    ],
+)
+def test_simplify(infix_str):
+    result = simplify(infix_str)
+    postfix_tokens = list(result.tree.postfix())
+    assert are_equivalent(postfix_tokens, infix_str)
+    num_tokens = len(converter.infix_to_postfix(converter.tokenize(infix_str)))
+    assert result.removed_nodes == num_tokens - len(postfix_tokens) >= 0
+
+
+@pytest.mark.parametrize(
+    "infix_str, postfix_str, removed_nodes, removed_operands",
+    [
+        ("x & 1", "x", 2, []),
+        ("!!x", "x", 2, []),
+        ("x | x", "x", 2, []),
+        ("A & (A | B)", "A", 4, ["B"]),
+        ("(A & B) | A", "A", 4, ["B"]),
+        ("P & !P | Q", "Q", 5, ["P"]),
+        ("(P ~ 0) ^ !(Q | T)", "P", 7, ["Q"]),
+        ("(A ^ B) & 0 | false", "0", 6, ["A", "B"]),
+        ("!A ^ A", "A", 3, []),
+        ("A & B", "A B &", 0, []),
+    ],
+)
+def test_simplify_rules(infix_str, postfix_str, removed_nodes, removed_operands):
+    result = simplify(infix_str)
+    assert converter.list_to_str(result.tree.postfix()) == postfix_str
+    assert result.removed_nodes == removed_nodes
+    assert result.removed_operands == removed_operands
+
+
+def test_simplify_deep():
+    depth = 20000
+    infix_str = "".join(f"X{i} & !!(" for i in range(depth)) + "1" + ")" * depth
+    result = simplify(converter.parser.parse_tree(converter.tokenize(infix_str)))
+    assert result.removed_nodes == 2 * depth + 2